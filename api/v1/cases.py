@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+from typing import Any, Dict, List
+
+from fastapi import APIRouter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+
+from api.v1.jobs import INGEST_ROUTES
+from core import jobs
+from core.database import collection
+from helpers.orders import cached_case_needs_orders
+
+app = APIRouter()
+
+LOOKUP_MAX_CASES = int(os.getenv("LOOKUP_MAX_CASES", "1000"))
+
+
+# (court, route) -> builds the same ac_query the route itself looks the case
+# up with, so a hit here is exactly what that route would serve from cache.
+def _dc_case_query(case):
+    return {
+        "courtType": case.get("courtType"),
+        "case_reg_no": case.get("case_reg_no"),
+        "rgyear": case.get("rgyear"),
+        "est_code": case.get("est_code"),
+        "case_type": case.get("case_type"),
+        "state_code": case.get("state_code"),
+        "dist_code": case.get("dist_code"),
+        "court_complex_code": case.get("court_complex_code"),
+    }
+
+
+def _hc3_case_query(case):
+    return {
+        "case_reg_no": case.get("case_reg_no"),
+        "rgyear": case.get("rgyear"),
+        "case_type": case.get("case_type"),
+        "state_code": case.get("state_code"),
+        "court_complex_code": case.get("court_complex_code"),
+    }
+
+
+def _sci_case_query(case):
+    return {
+        "courtType": "supremecourt",
+        "case_no": case.get("case_no"),
+        "state_code": case.get("state_code"),
+        "dist_code": case.get("dist_code"),
+        "rgyear": case.get("rgyear"),
+    }
+
+
+def _cino_query(court_type):
+    return lambda case: {"courtType": court_type, "cino": case.get("cino")}
+
+
+# The second value says whether the route re-scrapes a cached case that has
+# no orders yet (cached_case_needs_orders); those count as misses here too.
+CACHE_QUERIES = {
+    ("dc", "bulk_i"): (_cino_query("distcourts"), True),
+    ("dc", "getcaseInfo"): (_dc_case_query, True),
+    ("hc3", "bulk_i"): (_cino_query("highcourt"), True),
+    ("hc3", "getcaseInfo"): (_hc3_case_query, True),
+    ("hc2", "bulk_i"): (_cino_query("highcourt"), False),
+    ("sci", "getcaseInfo"): (_sci_case_query, False),
+}
+
+
+class CaseLookupRequest(BaseModel):
+    cases: List[Dict[str, Any]]
+    enqueue: bool = True
+
+
+def _lookup_key(query):
+    return tuple(sorted(query.items()))
+
+
+def resolve_identity(case):
+    """Validate one lookup entry; returns (court, route, payload, ac_query)."""
+    court = case.get("court")
+    routes = INGEST_ROUTES.get(court)
+    if not routes:
+        raise ValueError(f"court must be one of {', '.join(sorted(INGEST_ROUTES))}")
+
+    # A cino identifies the case outright; otherwise fall back to the
+    # case-number route.
+    route = "bulk_i" if case.get("cino") and "bulk_i" in routes else "getcaseInfo"
+    if route not in routes:
+        raise ValueError(f"{court} cases are looked up by cino")
+
+    model = routes[route][0]
+    payload = model(**{k: v for k, v in case.items() if k != "court"}).dict()
+    build_query, _ = CACHE_QUERIES[(court, route)]
+    return court, route, payload, build_query(payload)
+
+
+def find_cached(queries):
+    """Every cached case matching any of `queries`, in one $or round trip,
+    keyed the way _lookup_key keys a query."""
+    if not queries:
+        return {}
+
+    found = {}
+    field_sets = {tuple(sorted(query)) for query in queries}
+    for doc in collection.find({"$or": queries}):
+        for fields in field_sets:
+            key = tuple((field, doc.get(field)) for field in fields)
+            found.setdefault(key, doc)
+    return found
+
+
+def partition_cases(cases):
+    """Split case identities into cache hits and misses with one Mongo query.
+
+    Returns (hits, misses, invalid, to_queue); to_queue maps (court, route)
+    to the deduplicated payloads that need scraping.
+    """
+    resolved = {}
+    invalid = []
+    for index, case in enumerate(cases):
+        try:
+            resolved[index] = resolve_identity(case)
+        except (ValueError, ValidationError) as exc:
+            detail = json.loads(exc.json()) if isinstance(exc, ValidationError) else str(exc)
+            invalid.append({"index": index, "error": detail})
+
+    unique_queries = list({
+        _lookup_key(query): query for _, _, _, query in resolved.values()
+    }.values())
+    found = find_cached(unique_queries)
+
+    hits, misses, to_queue, seen_misses = [], [], {}, set()
+    for index, (court, route, payload, query) in resolved.items():
+        doc = found.get(_lookup_key(query))
+        checks_orders = CACHE_QUERIES[(court, route)][1]
+        if doc and not (checks_orders and cached_case_needs_orders(doc)):
+            hits.append({"index": index, "case": doc})
+            continue
+        misses.append({"index": index, "court": court, "route": route})
+        if _lookup_key(query) not in seen_misses:
+            seen_misses.add(_lookup_key(query))
+            to_queue.setdefault((court, route), []).append(payload)
+
+    return hits, misses, invalid, to_queue
+
+
+def enqueue_misses(to_queue):
+    queued = []
+    for (court, route), payloads in to_queue.items():
+        job_id = jobs.submit_batch(court, payloads, route)
+        queued.append({"job_id": job_id, "court": court, "route": route,
+                       "total": len(payloads)})
+    return queued
+
+
+@app.post("/cases/lookup")
+async def lookup_cases(lookup: CaseLookupRequest):
+    if len(lookup.cases) > LOOKUP_MAX_CASES:
+        return JSONResponse(
+            content={"error": f"at most {LOOKUP_MAX_CASES} cases per lookup"},
+            status_code=400
+        )
+
+    hits, misses, invalid, to_queue = await asyncio.to_thread(
+        partition_cases, lookup.cases)
+    queued = await asyncio.to_thread(enqueue_misses, to_queue) if lookup.enqueue else []
+
+    return {
+        "hits": [
+            {"index": hit["index"],
+             "case": jsonable_encoder(dict(hit["case"], _id=str(hit["case"]["_id"])))}
+            for hit in hits
+        ],
+        "misses": misses,
+        "invalid": invalid,
+        "jobs": queued,
+    }
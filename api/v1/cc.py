@@ -6,8 +6,11 @@ from dotenv import load_dotenv
 from core.database import collection
 import pytz
 import os
-import base64
 from core.s3_client import s3_client
+from helpers.orders import OrderKeyIndex, record_order_outcomes
+from helpers.pdf_upload import PdfUpload, iter_base64
+from helpers.rate_limit import limiter_for
+from helpers.timing import stage
 import requests
 from datetime import datetime
 
@@ -34,7 +37,7 @@ def format_date(date_str):
 
 from datetime import datetime
 
-def transform_case_data(response_json: dict, case_reg_no: str):
+def transform_case_data(response_json: dict, case_reg_no: str, fetch_orders: bool = True):
     def format_date(date_str):
         if not date_str:
             return None
@@ -55,23 +58,22 @@ def transform_case_data(response_json: dict, case_reg_no: str):
             file_name = f"case_data/orders/{case_number}_{hearing_date}.pdf"
             s3_url = f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{file_name}"
             try:
-                s3_client.head_object(Bucket=BUCKET_NAME, Key=file_name)
-                print(f"✅ File already exists in S3: {s3_url}")
-                return s3_url
+                if stored_keys.has(file_name):
+                    print(f"✅ File already exists in S3: {s3_url}")
+                    return s3_url
             except s3_client.exceptions.ClientError as e:
-                if e.response["Error"]["Code"] != "404":
-                    print(f"❌ S3 Error checking file: {e}")
-                    return None
+                print(f"❌ S3 Error checking file: {e}")
+                return None
 
-            pdf_bytes = base64.b64decode(base64_data)
-
-            s3_client.put_object(
-                Bucket=BUCKET_NAME,
-                Key=file_name,
-                Body=pdf_bytes,
-                ContentType="application/pdf",
-                ContentDisposition="inline"
-            )
+            upload = PdfUpload(s3_client, BUCKET_NAME, file_name, require_pdf=False)
+            try:
+                for chunk in iter_base64(base64_data):
+                    if upload.feed(chunk):
+                        upload.flush()
+                upload.finish()
+            except Exception:
+                upload.abort()
+                raise
 
             print(f"📄 Uploaded new PDF to S3: {s3_url}")
             return s3_url
@@ -82,6 +84,8 @@ def transform_case_data(response_json: dict, case_reg_no: str):
 
     data = response_json.get("data", {})
     hearing_details = data.get("caseHearingDetails", [])
+    stored_keys = OrderKeyIndex(
+        s3_client, BUCKET_NAME, f"case_data/orders/{data.get('caseNumber')}_")
 
     case_history_raw = []
     seen_dates = set()
@@ -115,7 +119,7 @@ def transform_case_data(response_json: dict, case_reg_no: str):
         case_number = data.get("caseNumber")
         order_type_id = hearing.get("orderTypeId", 1)
 
-        if not case_number:
+        if not case_number or not fetch_orders:
             continue
 
         api_url = (
@@ -134,27 +138,34 @@ def transform_case_data(response_json: dict, case_reg_no: str):
             'sec-ch-ua-platform': '"Windows"'
         }
 
-        try:
-            response = requests.get(api_url, headers=headers, timeout=15)
-            res_json = response.json()
-
-            if response.status_code == 200 and res_json.get("data", {}).get("dailyOrderPdf"):
-                base64_blob = res_json["data"]["dailyOrderPdf"]
-                s3_url = upload_pdf_to_s3(base64_blob, case_number, formatted_date)
-
-                if s3_url:
-                    orders.append({
-                        "order_number": str(order_counter),
-                        "order_date": formatted_date,
-                        "order_link": s3_url
-                    })
-                    order_counter += 1
-            else:
-                print(f"ℹ️ No daily order found for hearing on {formatted_date}")
-
-        except Exception as e:
-            print(f"⚠️ Error fetching order for hearing {formatted_date}: {e}")
-            continue
+        with stage("orders"):
+            try:
+                limiter = limiter_for(api_url)
+                limiter.wait()
+                response = requests.get(api_url, headers=headers, timeout=15)
+                limiter.record(response.status_code)
+                res_json = response.json()
+
+                if response.status_code == 200 and res_json.get("data", {}).get("dailyOrderPdf"):
+                    base64_blob = res_json["data"]["dailyOrderPdf"]
+                    s3_url = upload_pdf_to_s3(base64_blob, case_number, formatted_date)
+
+                    if s3_url:
+                        orders.append({
+                            "order_number": str(order_counter),
+                            "order_date": formatted_date,
+                            "order_link": s3_url
+                        })
+                        order_counter += 1
+                else:
+                    print(f"ℹ️ No daily order found for hearing on {formatted_date}")
+
+            except Exception as e:
+                print(f"⚠️ Error fetching order for hearing {formatted_date}: {e}")
+                continue
+
+    if fetch_orders:
+        record_order_outcomes("cc", orders)
 
     case_history_sorted = sorted(
         [ch for ch in case_history_raw if ch["_sort_key"]],
@@ -201,8 +212,9 @@ def fetch_submit_hc_info(case_data: CaseRequest):
     session = requests.Session()
     query = case_data.dict()
     ac_query = {"case_reg_no": query.get("case_reg_no")}
-    if case_data.refresh_flag != "1":
-        existing_case = collection.find_one(ac_query)
+    if case_data.refresh != "1":
+        with stage("mongo_lookup"):
+            existing_case = collection.find_one(ac_query)
         if existing_case:
             existing_case["_id"] = str(existing_case["_id"])
             return JSONResponse(content=existing_case)
@@ -217,19 +229,22 @@ def fetch_submit_hc_info(case_data: CaseRequest):
             'sec-ch-ua-mobile': '?0',
             'sec-ch-ua-platform': '"Windows"'
         }
-        response = session.get(
-            f"https://e-jagriti.gov.in/services/case/caseFilingService/v2/getCaseStatus?caseNumber={query.get('case_reg_no')}",
-            headers=headers
-        )
+        status_url = f"https://e-jagriti.gov.in/services/case/caseFilingService/v2/getCaseStatus?caseNumber={query.get('case_reg_no')}"
+        limiter = limiter_for(status_url)
+        limiter.wait()
+        with stage("history"):
+            response = session.get(status_url, headers=headers)
+        limiter.record(response.status_code)
         response_json = response.json()
         transformed_data = transform_case_data(response_json, query.get("case_reg_no"))
-        result = collection.update_one(
-                ac_query, {"$set": transformed_data}, upsert=True)
-        if result.upserted_id:
-                transformed_data["_id"] = str(result.upserted_id)
-        else:
-                doc = collection.find_one(ac_query)
-                transformed_data["_id"] = str(doc["_id"])
+        with stage("mongo_save"):
+            result = collection.update_one(
+                    ac_query, {"$set": transformed_data}, upsert=True)
+            if result.upserted_id:
+                    transformed_data["_id"] = str(result.upserted_id)
+            else:
+                    doc = collection.find_one(ac_query)
+                    transformed_data["_id"] = str(doc["_id"])
                 
         return JSONResponse(content=transformed_data)
     finally:
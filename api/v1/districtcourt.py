@@ -1,9 +1,10 @@
+import asyncio
 import base64
+import contextvars
 import json
 import random
-import threading
 import time
-import requests
+import httpx
 from bs4 import BeautifulSoup
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
@@ -15,26 +16,43 @@ from dotenv import load_dotenv
 from core.database import collection, save_case
 from core.s3_client import s3_client
 from core.lambda_client import lambda_client
-from helpers.solve_captcha import solve_captcha
-from helpers.requests import safe_get
+from helpers.solve_captcha import (
+    record_captcha_search,
+    record_captcha_verdict,
+    solve_captcha,
+)
 from helpers.orders import (
+    OrderKeyIndex,
     cached_case_needs_orders,
     order_pdf_s3_key,
     orders_stamp,
+    record_order_outcomes,
     stable_order_doc_id,
+    stored_order_links,
 )
+from helpers.pdf_upload import CHUNK_SIZE, NotAPdfError, PdfUpload
+from helpers.metrics import Counter, Gauge
+from helpers.ndjson import ndjson_response
+from helpers.rate_limit import limiter_for
+from helpers.singleflight import SingleFlight, flight_key
+from helpers.timing import stage, timed
+from helpers.view_history import fast_parser_enabled, parse_view_history
 from helpers.ecourts_session import (
     BASE_URL,
     EcourtsBlockedError,
     EcourtsGateError,
-    breaker,
+    egress_of,
+    egress_status,
+    egresses,
+    fleet_breaker_status,
     gate_rejected,
     invalidate_gate,
     looks_blocked,
+    pick_egress,
+    refresh_breakers,
     resolve_gate,
 )
 import os
-from http.client import RemoteDisconnected
 load_dotenv()
 REGION_NAME = os.getenv("REGION_NAME")
 app = APIRouter()
@@ -48,22 +66,75 @@ BROWSER_HEADERS = {
 
 APP_TOKEN_RE = re.compile(r'name="app_token"[^>]*value="([^"]+)"')
 
-ECOURTS_PROXY = os.getenv("ECOURTS_PROXY")
-POOL_SIZE = int(os.getenv("ECOURTS_POOL_SIZE", "4"))
+# Sessions per egress (see ECOURTS_PROXIES); the pool grows with every
+# proxy added.
+POOL_SIZE_PER_EGRESS = int(os.getenv("ECOURTS_POOL_SIZE", "4"))
+POOL_SIZE = POOL_SIZE_PER_EGRESS * len(egresses)
 BLOCK_RETRIES = 4
 
 SESSION_MAX_AGE_SECONDS = int(os.getenv("ECOURTS_SESSION_MAX_AGE", "600"))
 SESSION_MAX_USES = int(os.getenv("ECOURTS_SESSION_MAX_USES", "25"))
+SESSION_ROTATE_MARGIN_SECONDS = int(os.getenv("ECOURTS_SESSION_ROTATE_MARGIN", "60"))
+
+POOL_WARMER_ENABLED = os.getenv("ECOURTS_POOL_WARMER", "1") == "1"
+CAPTCHA_PREFETCH_ENABLED = os.getenv("ECOURTS_CAPTCHA_PREFETCH", "0") == "1"
+# securimage keeps a code valid for 15 minutes server-side; stay well inside it
+CAPTCHA_PREFETCH_TTL_SECONDS = int(os.getenv("ECOURTS_CAPTCHA_TTL", "300"))
+POOL_WARM_INTERVAL_SECONDS = float(os.getenv("ECOURTS_POOL_WARM_INTERVAL", "5"))
+
+# Orders of one case processed at once, and PDF downloads in flight per
+# eCourts host across every request in this worker.
+ORDER_PIPELINE_CONCURRENCY = int(os.getenv("ECOURTS_ORDER_CONCURRENCY", "4"))
+HOST_CONCURRENCY = int(os.getenv("ECOURTS_HOST_CONCURRENCY", "4"))
+
+PAGE_TIMEOUT = httpx.Timeout(180, connect=30)
+AJAX_TIMEOUT = httpx.Timeout(120, connect=10)
 
 _pool = []
-_pool_lock = threading.Lock()
-_ecourts_gate_slot = threading.Semaphore(POOL_SIZE)
+_pool_lock = asyncio.Lock()
+_pool_stats = {"hits": 0, "misses": 0, "warmed": 0, "rotated": 0, "warm_failures": 0}
+_in_use = 0
+_warmer_task = None
+# Waiting here is an await, not a parked threadpool thread, so a burst of
+# scrapes queues for an eCourts slot without starving the rest of the app.
+_ecourts_gate_slot = asyncio.Semaphore(POOL_SIZE)
+_host_slots = {}
+# Concurrent scrapes of the same case share one upstream fetch: one session,
+# one captcha, one save_case.
+case_scrapes = SingleFlight("dc_case")
+
+ECOURTS_POOL_SESSIONS = Gauge(
+    "ecourts_pool_sessions",
+    "eCourts sessions per egress: idle in the pool, or checked out by a scrape.",
+    labels=("egress", "state"),
+    collect=lambda: [
+        ({"egress": egress.key, "state": state}, count)
+        for egress in egresses
+        for state, count in (("idle", _idle_on(egress)), ("in_use", egress.in_use))
+    ],
+)
+ECOURTS_POOL_EVENTS = Counter(
+    "ecourts_pool_events_total",
+    "eCourts pool activity: hits and misses (hit rate = hits / (hits + "
+    "misses)), sessions warmed, rotated out and warm failures.",
+    labels=("event",),
+    collect=lambda: [({"event": event}, count) for event, count in _pool_stats.items()],
+)
+
 
+def ecourts_host_slot(url):
+    host = httpx.URL(url).host
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = _host_slots[host] = asyncio.Semaphore(HOST_CONCURRENCY)
+    return slot
 
-def ecourts_gate_headers(session, force_refresh=False):
+
+async def ecourts_gate_headers(session, force_refresh=False):
     """Validated gate headers. The delimeter is global and probe-checked once
     per process, not scraped blind per session."""
-    return resolve_gate(session, getattr(session, "_app_token", ""), force_refresh)
+    return await resolve_gate(
+        session, getattr(session, "_app_token", ""), force_refresh)
 
 
 def remember_app_token(session, token):
@@ -83,100 +154,366 @@ def session_expired(session):
     return getattr(session, "_uses", 0) >= SESSION_MAX_USES
 
 
-def new_ecourts_session():
-    session = requests.Session()
-    session.headers.update(BROWSER_HEADERS)
-    if ECOURTS_PROXY:
-        session.proxies.update({"http": ECOURTS_PROXY, "https": ECOURTS_PROXY})
+def session_due_for_rotation(session):
+    """Close enough to its age limit that the warmer should replace it now,
+    rather than let a request find it expired and bootstrap inline."""
+    age = time.monotonic() - getattr(session, "_created_at", 0)
+    return age > SESSION_MAX_AGE_SECONDS - SESSION_ROTATE_MARGIN_SECONDS
+
+
+async def safe_get(session, url, params=None, max_retries=5, headers=None):
+    """GET on the given client. Unlike helpers.requests.safe_get this never
+    swaps the client out, so the PHP session cookie survives a dropped
+    connection."""
+    limiter = limiter_for(url, egress_of(session).key)
+    for attempt in range(max_retries):
+        try:
+            await limiter.wait_async()
+
+            response = await session.get(
+                url,
+                params=params,
+                timeout=PAGE_TIMEOUT,
+                headers=headers
+            )
+            limiter.record(response.status_code, blocked=looks_blocked(response))
+            return response
+
+        except httpx.TimeoutException:
+            print(f"[warn] Timeout (attempt {attempt + 1})")
+            limiter.timed_out()
+
+        except httpx.TransportError:
+            print(f"[warn] Server disconnected (attempt {attempt + 1})")
+            limiter.dropped()
+
+    raise Exception("[error] GET request failed after retries")
+
 
+async def new_ecourts_session(egress=None):
+    egress = egress or await pick_egress()
+    session = httpx.AsyncClient(
+        headers=BROWSER_HEADERS,
+        proxy=egress.proxy,
+        follow_redirects=True,
+    )
+
+    session._egress = egress
     session._created_at = time.monotonic()
     session._uses = 0
     session._gate_ready = False
     session._search_validated = False
+    # not used yet, so the warmer may prefetch a captcha for its first search
+    session._captcha_search = True
 
-    response = safe_get(session, BASE_URL + "?p=casestatus/index")
-    if looks_blocked(response):
-        session.close()
-        breaker.record_block()
-        raise EcourtsBlockedError(
-            "eCourts is refusing requests from this IP (HTTP 405 throttle "
-            "stub). Retry later, or route through another IP via ECOURTS_PROXY."
-        )
+    try:
+        response = await safe_get(session, BASE_URL + "?p=casestatus/index")
+        if looks_blocked(response):
+            await egress.breaker.record_block()
+            raise EcourtsBlockedError(
+                "eCourts is refusing requests from this IP (HTTP 405 throttle "
+                "stub). Retry later, or route through another IP via ECOURTS_PROXIES."
+            )
+
+        match = APP_TOKEN_RE.search(response.text)
+        remember_app_token(session, match.group(1) if match else "")
+        await ecourts_gate_headers(session)
+    except BaseException:
+        await session.aclose()
+        raise
 
-    match = APP_TOKEN_RE.search(response.text)
-    remember_app_token(session, match.group(1) if match else "")
-    ecourts_gate_headers(session)
     session._gate_ready = True
-    breaker.record_success()
+    await egress.breaker.record_success()
     return session
 
 
-def rewarm_session(session):
-    response = safe_get(session, BASE_URL + "?p=casestatus/index")
+async def rewarm_session(session):
+    response = await safe_get(session, BASE_URL + "?p=casestatus/index")
     if looks_blocked(response):
-        breaker.record_block()
+        await egress_of(session).breaker.record_block()
         raise EcourtsBlockedError(
             "eCourts is refusing requests from this IP (HTTP 405 throttle "
-            "stub). Retry later, or route through another IP via ECOURTS_PROXY."
+            "stub). Retry later, or route through another IP via ECOURTS_PROXIES."
         )
     match = APP_TOKEN_RE.search(response.text)
     remember_app_token(session, match.group(1) if match else "")
-    invalidate_gate()
-    ecourts_gate_headers(session, force_refresh=True)
+    invalidate_gate(session)
+    await ecourts_gate_headers(session, force_refresh=True)
     session._search_validated = False
     return session._app_token
 
 
-def _acquire_session():
-    with _pool_lock:
-        while _pool:
-            session = _pool.pop()
-            if not session_expired(session):
-                session._uses = getattr(session, "_uses", 0) + 1
-                return session
-            session.close()
+@timed("captcha")
+async def solve_session_captcha(session):
+    """Load a fresh securimage code on this session and read it."""
+    captcha_response = await safe_get(session, f"{CAPTCHA_URL}? {random.random()}")
+    image_base64 = base64.b64encode(captcha_response.content).decode("utf-8")
+    return await asyncio.to_thread(
+        solve_captcha,
+        lambda_client=lambda_client, image_base64=image_base64, frm="hc",
+        court="dc")
+
+
+async def _prefetch_captcha(session):
+    try:
+        captcha_text = await solve_session_captcha(session)
+    except Exception as exc:
+        print(f"[captcha] prefetch failed: {exc}")
+        return None
+    return (captcha_text, time.monotonic()) if captcha_text else None
+
+
+def _prefetched_fresh(task):
+    if not task.done() or task.cancelled() or not task.result():
+        return False
+    _, solved_at = task.result()
+    return time.monotonic() - solved_at < CAPTCHA_PREFETCH_TTL_SECONDS
+
 
+def schedule_captcha_prefetch(session):
+    """Solve the session's next captcha while it sits idle in the pool.
+
+    securimage only honours the last image served to the PHP session, so one
+    pending solve per session is all that can ever be useful.
+    """
+    if not CAPTCHA_PREFETCH_ENABLED:
+        return
+    # a session last used by a captcha-free route (viewHistory ingest) is
+    # likely to serve one again; a solve for it would only go to waste
+    if not getattr(session, "_captcha_search", True):
+        return
+    task = getattr(session, "_captcha_task", None)
+    if task is not None and (not task.done() or _prefetched_fresh(task)):
+        return
+    # a fresh context: the solve belongs to no request, least of all the one
+    # releasing the session, so its stage is recorded as background
+    session._captcha_task = asyncio.get_running_loop().create_task(
+        _prefetch_captcha(session), context=contextvars.Context())
+
+
+async def take_prefetched_captcha(session):
+    """The prefetched code for this session, or None if there is none or it
+    has outlived CAPTCHA_PREFETCH_TTL_SECONDS. A solve still in flight is
+    awaited - it is already further along than a fresh fetch would be."""
+    task = getattr(session, "_captcha_task", None)
+    session._captcha_task = None
+    if task is None:
+        return None
+    await asyncio.wait([task])
+    return task.result()[0] if _prefetched_fresh(task) else None
+
+
+async def close_session(session):
+    task = getattr(session, "_captcha_task", None)
+    if task is not None and not task.done():
+        task.cancel()
+    await session.aclose()
+
+
+def _idle_on(egress):
+    return sum(1 for session in _pool if egress_of(session) is egress)
+
+
+async def _acquire_session():
+    """A warm session when one is idle on a healthy egress - the least
+    loaded egress first - otherwise a new one on the least-loaded egress."""
+    healthy = [egress for egress in egresses if not egress.breaker.is_open()]
+    stale = []
+    session = None
+    async with _pool_lock:
+        for candidate in reversed(_pool):
+            if session_expired(candidate):
+                stale.append(candidate)
+            elif egress_of(candidate) in healthy and (
+                    session is None
+                    or egress_of(candidate).in_use < egress_of(session).in_use):
+                session = candidate
+        for expired in stale:
+            _pool.remove(expired)
+        if session is not None:
+            _pool.remove(session)
+            session._uses = getattr(session, "_uses", 0) + 1
+            egress_of(session).in_use += 1
+
+    for expired in stale:
+        await close_session(expired)
+    if session is not None:
+        _pool_stats["hits"] += 1
+        return session
+
+    _pool_stats["misses"] += 1
     last_error = None
     for attempt in range(1, BLOCK_RETRIES + 1):
+        # raises the breaker error once every egress is shedding
+        egress = await pick_egress()
+        egress.in_use += 1
         try:
-            session = new_ecourts_session()
+            session = await new_ecourts_session(egress)
             session._uses = 1
             return session
         except EcourtsBlockedError as exc:
+            egress.in_use -= 1
             last_error = exc
-            breaker.check()
-            print(f"[warn] eCourts throttling this IP (attempt {attempt})")
-            time.sleep(min(2 ** attempt, 20))
+            print(f"[warn] eCourts throttling {egress.key} (attempt {attempt})")
+            await asyncio.sleep(min(2 ** attempt, 20))
+        except BaseException:
+            egress.in_use -= 1
+            raise
     raise last_error
 
 
-def _release_session(session, discard=False):
+async def _release_session(session, discard=False):
     if discard or session_expired(session):
-        session.close()
+        await close_session(session)
         return
-    with _pool_lock:
-        if len(_pool) < POOL_SIZE:
+    async with _pool_lock:
+        if _idle_on(egress_of(session)) < POOL_SIZE_PER_EGRESS:
             _pool.append(session)
+            schedule_captcha_prefetch(session)
             return
-    session.close()
+    await close_session(session)
 
 
-def acquire_ecourts_session():
-    breaker.check()
-    _ecourts_gate_slot.acquire()
+@timed("session")
+async def acquire_ecourts_session():
+    global _in_use
+    # shed before queueing for a slot when every egress breaker is open
+    await pick_egress()
+    await _ecourts_gate_slot.acquire()
+    _in_use += 1
     try:
-        return _acquire_session()
+        session = await _acquire_session()
     except BaseException:
+        _in_use -= 1
         _ecourts_gate_slot.release()
         raise
+    # set again by submit_search_with_captcha if this use needs a captcha
+    session._captcha_search = False
+    return session
 
 
-def release_ecourts_session(session, discard=False):
+async def release_ecourts_session(session, discard=False):
+    global _in_use
+    egress_of(session).in_use -= 1
     try:
-        _release_session(session, discard)
+        await _release_session(session, discard)
     finally:
+        _in_use -= 1
         _ecourts_gate_slot.release()
 
+
+async def _refill_egress(egress):
+    while _idle_on(egress) + egress.in_use < POOL_SIZE_PER_EGRESS:
+        await egress.breaker.refresh()
+        egress.breaker.check()
+        try:
+            session = await new_ecourts_session(egress)
+        except Exception:
+            _pool_stats["warm_failures"] += 1
+            raise
+
+        async with _pool_lock:
+            if _idle_on(egress) + egress.in_use < POOL_SIZE_PER_EGRESS:
+                _pool.append(session)
+                _pool_stats["warmed"] += 1
+                continue
+        await close_session(session)
+        break
+
+
+async def refill_pool():
+    """One warmer pass: retire idle sessions near their age limit, then top
+    each egress up so its idle + checked-out sessions reach
+    POOL_SIZE_PER_EGRESS. Egresses whose breaker is open are left alone."""
+    async with _pool_lock:
+        retired = [s for s in _pool if session_expired(s) or session_due_for_rotation(s)]
+        for session in retired:
+            _pool.remove(session)
+
+    for session in retired:
+        await close_session(session)
+    _pool_stats["rotated"] += len(retired)
+
+    failures = []
+    await refresh_breakers()
+    for egress in egresses:
+        if egress.breaker.is_open():
+            continue
+        try:
+            await _refill_egress(egress)
+        except Exception as exc:
+            failures.append(f"{egress.key}: {exc}")
+
+    for session in list(_pool):
+        schedule_captcha_prefetch(session)
+
+    if failures:
+        raise Exception("; ".join(failures))
+
+
+async def _warm_pool_forever():
+    while True:
+        try:
+            await refill_pool()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"[pool] warm pass failed: {exc}")
+        await asyncio.sleep(POOL_WARM_INTERVAL_SECONDS)
+
+
+def start_pool_warmer():
+    global _warmer_task
+    if POOL_WARMER_ENABLED and _warmer_task is None:
+        _warmer_task = asyncio.get_running_loop().create_task(_warm_pool_forever())
+
+
+async def stop_pool_warmer():
+    global _warmer_task
+    task, _warmer_task = _warmer_task, None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async with _pool_lock:
+        idle = list(_pool)
+        _pool.clear()
+    for session in idle:
+        await close_session(session)
+
+
+def pool_status():
+    served = _pool_stats["hits"] + _pool_stats["misses"]
+    return {
+        "size": POOL_SIZE,
+        "idle": len(_pool),
+        "in_use": _in_use,
+        "warmer": _warmer_task is not None,
+        "hit_rate": round(_pool_stats["hits"] / served, 4) if served else None,
+        "egresses": [
+            {"egress": egress.key, "idle": _idle_on(egress), "in_use": egress.in_use}
+            for egress in egresses
+        ],
+        **_pool_stats,
+    }
+
+@app.get("/dc/breaker")
+async def ecourts_breaker_status():
+    """This worker's view of its egress breaker plus every egress recorded in
+    the shared breaker store, so a trip anywhere in the fleet is visible."""
+    local = await asyncio.to_thread(egress_status)
+    fleet = await asyncio.to_thread(fleet_breaker_status)
+    return JSONResponse(content={"local": local, "fleet": fleet})
+
+
+@app.get("/dc/pool")
+async def ecourts_pool_status():
+    return JSONResponse(content=pool_status())
+
+
 class CaseRequest(BaseModel):
     case_type: str
     case_reg_no: str
@@ -225,6 +562,7 @@ def build_case_base_path(metadata: dict):
 def build_case_json_key(metadata: dict):
     return build_case_base_path(metadata) + "metadata.json"
 
+@timed("s3_metadata")
 def upload_case_json_to_s3(
     s3_client,
     bucket_name,
@@ -245,32 +583,36 @@ def upload_case_json_to_s3(
 
     return f"s3://{bucket_name}/{key}"
 
-def safe_post(session, url, data, headers=None, max_retries=3):
+async def safe_post(session, url, data, headers=None, max_retries=3):
+    egress = egress_of(session)
+    limiter = limiter_for(url, egress.key)
     for attempt in range(max_retries):
         try:
-            time.sleep(random.uniform(1.2, 2.0))
+            await limiter.wait_async()
 
             merged_headers = {"Connection": "close"}
-            merged_headers.update(ecourts_gate_headers(session))
+            merged_headers.update(await ecourts_gate_headers(session))
             if headers:
                 merged_headers.update(headers)
 
             if isinstance(data, dict) and "app_token" in data:
                 data["app_token"] = getattr(session, "_app_token", "") or data["app_token"]
 
-            response = session.post(
+            response = await session.post(
                 url,
                 data=data,
-                timeout=(10, 120),
+                timeout=AJAX_TIMEOUT,
                 headers=merged_headers
             )
 
-            if looks_blocked(response):
-                breaker.record_block()
+            blocked = looks_blocked(response)
+            limiter.record(response.status_code, blocked=blocked)
+            if blocked:
+                await egress.breaker.record_block()
                 raise EcourtsBlockedError(
                     "eCourts is refusing requests from this IP (HTTP 405 "
                     "throttle stub). Retry later, or route through another IP "
-                    "via ECOURTS_PROXY."
+                    "via ECOURTS_PROXIES."
                 )
 
             try:
@@ -280,20 +622,21 @@ def safe_post(session, url, data, headers=None, max_retries=3):
 
             if gate_rejected(response) and attempt < max_retries - 1:
                 print(f"[warn] Gate rejected, re-warming (attempt {attempt+1})")
-                token = rewarm_session(session)
+                token = await rewarm_session(session)
                 if isinstance(data, dict) and "app_token" in data:
                     data["app_token"] = token
                 continue
 
-            breaker.record_success()
+            await egress.breaker.record_success()
             return response
 
-        except (requests.exceptions.ConnectionError, RemoteDisconnected) as e:
-            print(f"[warn] Server disconnected (attempt {attempt+1})")
-            session.close()
-
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             print(f"[warn] Timeout (attempt {attempt+1})")
+            limiter.timed_out()
+
+        except httpx.TransportError:
+            print(f"[warn] Server disconnected (attempt {attempt+1})")
+            limiter.dropped()
 
     raise Exception("[error] eCourts request failed after retries")
 
@@ -450,46 +793,106 @@ def extract_acts_and_sections(
     return acts_and_sections
 
 
-def order_pdf_headers(session):
+def extract_order_rows(soup, table_class="order_table"):
+    # eCourts splits orders across two tables - "Interim Orders" and "Final
+    # Orders / Judgements". Reading only the first silently drops every final
+    # judgement, which is usually the order that actually matters.
+    rows = []
+    for table in soup.find_all("table", {"class": table_class}):
+        order_type = order_section_type(table)
+        for row in table.find_all("tr"):
+            anchor = next(
+                (a for a in row.find_all("a")
+                 if "displayPdf" in a.get("onclick", "")),
+                None,
+            )
+            rows.append({
+                "order_type": order_type,
+                "header": row.find("th") is not None,
+                "cells": [td.text.strip() for td in row.find_all("td")],
+                "onclick": anchor.get("onclick", "") if anchor else None,
+            })
+    return rows
+
+
+def parse_view_history_soup(markup):
+    """The viewHistory sections via the BeautifulSoup extractors - the
+    reference parse_view_history is checked against."""
+    soup = BeautifulSoup(markup, "html.parser")
+    return {
+        "case_status": extract_table_data(soup, "table case_status_table table-bordered"),
+        "case_details": extract_table_data(soup, "table case_details_table table-bordered"),
+        "petitioner_and_advocate": extract_list_data(soup, "table table-bordered Petitioner_Advocate_table petitioner-advocate-list border"),
+        "respondent_and_advocate": extract_list_data(soup, "table table-bordered Respondent_Advocate_table respondent-advocate-list border"),
+        "fir_details": extract_fir_details(soup, "FIR_details_table"),
+        "actsandSection": extract_acts_and_sections(soup)["actsandSection"],
+        "case_history": extract_case_history(soup),
+        "case_transfer": extract_case_transfer(soup),
+        "order_rows": extract_order_rows(soup),
+    }
+
+
+@timed("parse")
+def parse_history_markup(markup):
+    if fast_parser_enabled():
+        return parse_view_history(markup)
+    return parse_view_history_soup(markup)
+
+
+def history_metadata(case_info, parsed):
+    return {
+        **case_info,
+        "fir_details": parsed["fir_details"],
+        **parsed["case_details"],
+        **parsed["case_status"],
+        "petitioner_and_advocate": parsed["petitioner_and_advocate"],
+        "respondent_and_advocate": parsed["respondent_and_advocate"],
+        "actsandSection": parsed["actsandSection"],
+        "case_history": parsed["case_history"],
+        "case_transfer": parsed["case_transfer"],
+    }
+
+
+async def order_pdf_headers(session):
     """Gate headers minus the AJAX-only bits - this GET is a document fetch."""
-    headers = dict(ecourts_gate_headers(session))
+    headers = dict(await ecourts_gate_headers(session))
     headers.pop("X-Requested-With", None)
     headers["Accept"] = "application/pdf,application/octet-stream;q=0.9,*/*;q=0.8"
     headers["Referer"] = BASE_URL + "?p=home/viewHistory"
     return headers
 
 
-def download_order_pdf(session, pdf_url):
-    """Fetch the temporary PDF URL and return its bytes, or None.
+async def upload_order_pdf(session, pdf_url, s3_client, bucket_name, s3_key):
+    """Stream the temporary PDF URL into S3; returns the stored size or None.
 
-    The old code streamed `response.raw` straight into S3, which skips content
-    decoding and never checks that what came back is a PDF at all - an HTML
-    "Invalid Request" page would land in the bucket as application/pdf.
+    The body is checked for a %PDF header before anything is written - an
+    HTML "Invalid Request" page must not land in the bucket as
+    application/pdf - and only PdfUpload's part buffer is ever held in memory.
     """
+    upload = PdfUpload(s3_client, bucket_name, s3_key)
     try:
-        response = session.get(
+        async with session.stream(
+            "GET",
             pdf_url,
-            headers=order_pdf_headers(session),
-            timeout=(30, 180),
-        )
-    except Exception as exc:
+            headers=await order_pdf_headers(session),
+            timeout=PAGE_TIMEOUT,
+        ) as response:
+            if response.status_code != 200:
+                print(f"[dc/orders] PDF {pdf_url} returned HTTP {response.status_code}")
+                return None
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                if upload.feed(chunk):
+                    await asyncio.to_thread(upload.flush)
+        return await asyncio.to_thread(upload.finish)
+    except NotAPdfError as exc:
+        print(f"[dc/orders] {pdf_url} did not return a PDF ({exc})")
+    except httpx.HTTPError as exc:
         print(f"[dc/orders] PDF fetch failed for {pdf_url}: {exc}")
-        return None
-
-    if response.status_code != 200:
-        print(f"[dc/orders] PDF {pdf_url} returned HTTP {response.status_code}")
-        return None
-
-    body = response.content
-    start = body.find(b"%PDF", 0, 1024)
-    if start < 0:
-        print(
-            f"[dc/orders] {pdf_url} did not return a PDF "
-            f"({len(body)} bytes, starts {body[:40]!r})"
-        )
-        return None
-
-    return body[start:]
+    except Exception:
+        await asyncio.to_thread(upload.abort)
+        raise
+    await asyncio.to_thread(upload.abort)
+    return None
 
 
 def order_section_type(table):
@@ -508,82 +911,137 @@ def order_section_type(table):
     return "order"
 
 
-def fetch_and_store_orders(
-    soup,
+@timed("orders")
+async def fetch_and_store_orders(
+    rows,
     session,
     metadata,
     case_details,
     s3_client,
     bucket_name,
     region_name,
-    table_class="order_table",
     pdf_endpoint="https://services.ecourts.gov.in/ecourtindia_v6/?p=home/display_pdf",
-    pdf_base_url="https://services.ecourts.gov.in/ecourtindia_v6/"
+    pdf_base_url="https://services.ecourts.gov.in/ecourtindia_v6/",
+    known_orders=None,
 ):
     orders_prefix = build_case_base_path(metadata) + "orders/"
     orders = []
     seen_doc_ids = set()
 
-    # eCourts splits orders across two tables - "Interim Orders" and "Final
-    # Orders / Judgements". Reading only the first silently drops every final
-    # judgement, which is usually the order that actually matters.
-    order_tables = soup.find_all("table", {"class": table_class})
-
-    if not order_tables:
-        print(f"[dc/orders] no '{table_class}' table in markup, 0 orders")
+    if not rows:
+        print("[dc/orders] no order_table rows in markup, 0 orders")
         return orders
 
-    rows = [
-        (order_section_type(table), row)
-        for table in order_tables
-        for row in table.find_all("tr")
-    ]
     remember_app_token(session, case_details.get("app_token", ""))
 
-    for order_type, row in rows:
-        if row.find("th"):
+    # display_pdf posts ride the session's app_token chain, so they go one at
+    # a time; the S3 checks, PDF downloads and uploads around them overlap.
+    token_chain = asyncio.Lock()
+    order_slots = asyncio.Semaphore(ORDER_PIPELINE_CONCURRENCY)
+
+    stored_keys = OrderKeyIndex(s3_client, bucket_name, orders_prefix)
+
+    async def s3_has(s3_key):
+        return await asyncio.to_thread(stored_keys.has, s3_key)
+
+    async def store_order(order, values):
+        s3_key = order_pdf_s3_key(orders_prefix, order["order_date"], values[3])
+        s3_url = f"https://{bucket_name}.s3.{region_name}.amazonaws.com/{s3_key}"
+        order_payload = {
+            "normal_v": values[0],
+            "case_val": values[1],
+            "court_code": values[2],
+            "filename": values[3],
+            "appFlag": values[4] if len(values) > 4 else "",
+            "ajax_req": "true",
+            "app_token": getattr(session, "_app_token", "")
+        }
+
+        async with order_slots:
+            exists = asyncio.create_task(s3_has(s3_key))
+            try:
+                try:
+                    async with token_chain:
+                        order_response = await safe_post(
+                            session, pdf_endpoint, order_payload)
+                except Exception as exc:
+                    print(f"[dc/orders] display_pdf request failed for {values[3]}: {exc}")
+                    return None, "unavailable"
+
+                try:
+                    pdf_path = order_response.json().get("order", "").replace("\\", "")
+                except Exception:
+                    print(
+                        f"[dc/orders] display_pdf non-JSON for {values[3]}: "
+                        f"HTTP {order_response.status_code} "
+                        f"{order_response.text[:160]!r}"
+                    )
+                    return None, "unavailable"
+
+                if not pdf_path:
+                    return None, "not_uploaded"
+
+                try:
+                    if await exists:
+                        return s3_url, "available"
+                    async with ecourts_host_slot(pdf_base_url):
+                        size = await upload_order_pdf(
+                            session, f"{pdf_base_url}{pdf_path}",
+                            s3_client, bucket_name, s3_key)
+                    if size is None:
+                        return None, "unavailable"
+                    print(f"[dc/orders] stored {s3_key} ({size} bytes)")
+                except Exception as exc:
+                    print(f"[dc/orders] S3 store failed for {s3_key}: {exc}")
+                    return None, "unavailable"
+
+                return s3_url, "available"
+            finally:
+                # settle the check on every path so a failed one is retrieved
+                exists.cancel()
+                await asyncio.gather(exists, return_exceptions=True)
+
+    pending = []
+
+    for row in rows:
+        if row["header"]:
             continue
 
-        cols = row.find_all("td")
+        cols = row["cells"]
         if len(cols) < 3:
             continue
 
-        order_number = cols[0].text.strip()
-        order_date = cols[1].text.strip()
-
-        anchor = next(
-            (a for a in row.find_all("a")
-             if "displayPdf" in a.get("onclick", "")),
-            None,
-        )
+        order_number = cols[0]
+        order_date = cols[1]
+        onclick = row["onclick"]
 
         # A data row either links its PDF or carries a real date. A header row
         # rendered with <td> instead of <th> has neither.
-        if not anchor and not re.search(r"\d", order_date):
+        if onclick is None and not re.search(r"\d", order_date):
             continue
 
-        def keep(link, status, order_type=order_type):
-            orders.append({
-                "order_number": order_number,
-                "order_date": order_date,
-                "order_link": link,
-                "order_status": status,
-                "order_type": order_type,
-            })
+        order = {
+            "order_number": order_number,
+            "order_date": order_date,
+            "order_link": None,
+            "order_status": "not_uploaded",
+            "order_type": row["order_type"],
+        }
 
-        if not anchor:
-            keep(None, "not_uploaded")
+        if onclick is None:
+            orders.append(order)
             continue
 
-        match = re.search(r"displayPdf\((.*?)\)", anchor.get("onclick", ""))
+        match = re.search(r"displayPdf\((.*?)\)", onclick)
 
         if not match:
-            keep(None, "not_uploaded")
+            orders.append(order)
             continue
 
         values = [v.strip().strip("'") for v in match.group(1).split(",")]
         if len(values) < 4:
-            keep(None, "unavailable")
+            order["order_status"] = "unavailable"
+            orders.append(order)
             continue
 
         doc_id = stable_order_doc_id(values[3])
@@ -591,76 +1049,30 @@ def fetch_and_store_orders(
             continue
         seen_doc_ids.add(doc_id)
 
-        order_payload = {
-            "normal_v": values[0],
-            "case_val": values[1],
-            "court_code": values[2],
-            "filename": values[3],
-            "appFlag": values[4] if len(values) > 4 else "",
-            "ajax_req": "true",
-            "app_token": getattr(session, "_app_token", "")
-        }
-
-        try:
-            order_response = safe_post(session, pdf_endpoint, order_payload)
-        except Exception as exc:
-            print(f"[dc/orders] display_pdf request failed for {values[3]}: {exc}")
-            keep(None, "unavailable")
-            continue
-
-        try:
-            pdf_path = order_response.json().get("order", "").replace("\\", "")
-        except Exception:
-            print(
-                f"[dc/orders] display_pdf non-JSON for {values[3]}: "
-                f"HTTP {order_response.status_code} "
-                f"{order_response.text[:160]!r}"
-            )
-            keep(None, "unavailable")
+        orders.append(order)
+        if doc_id in (known_orders or {}):
+            order["order_link"] = known_orders[doc_id]
+            order["order_status"] = "available"
             continue
+        pending.append((order, store_order(order, values)))
 
-        if not pdf_path:
-            keep(None, "not_uploaded")
-            continue
-
-        final_pdf_url = f"{pdf_base_url}{pdf_path}"
-        s3_key = order_pdf_s3_key(orders_prefix, order_date, values[3])
-        s3_url = f"https://{bucket_name}.s3.{region_name}.amazonaws.com/{s3_key}"
-
-        try:
-            try:
-                s3_client.head_object(Bucket=bucket_name, Key=s3_key)
-            except s3_client.exceptions.ClientError as e:
-                if e.response["Error"]["Code"] != "404":
-                    raise
-                body = download_order_pdf(session, final_pdf_url)
-                if body is None:
-                    keep(None, "unavailable")
-                    continue
-                s3_client.put_object(
-                    Bucket=bucket_name,
-                    Key=s3_key,
-                    Body=body,
-                    ContentType="application/pdf",
-                    ContentDisposition="inline",
-                )
-                print(f"[dc/orders] stored {s3_key} ({len(body)} bytes)")
-        except Exception as exc:
-            print(f"[dc/orders] S3 store failed for {s3_key}: {exc}")
-            keep(None, "unavailable")
-            continue
-
-        keep(s3_url, "available")
+    # Rows keep their table order; each stored order fills in its own entry.
+    results = await asyncio.gather(*(job for _, job in pending))
+    for (order, _), (link, status) in zip(pending, results):
+        order["order_link"] = link
+        order["order_status"] = status
+    record_order_outcomes("dc", orders)
 
     print(
         f"[dc/orders] rows={len(rows)} kept={len(orders)} "
-        f"withLink={sum(1 for o in orders if o['order_link'])}"
+        f"withLink={sum(1 for o in orders if o['order_link'])} "
+        f"fetched={len(pending)}"
     )
     return orders
 
 
 @app.post("/getcaseInfo")
-def fetch_submit_info(case_data: CaseRequest):
+async def fetch_submit_info(case_data: CaseRequest):
     query = case_data.dict()
     ac_query = {
         "courtType": query.get("courtType"),
@@ -672,7 +1084,8 @@ def fetch_submit_info(case_data: CaseRequest):
         "dist_code": query.get("dist_code"),
         "court_complex_code": query.get("court_complex_code")
     }
-    existing_case = collection.find_one(ac_query)
+    with stage("mongo_lookup"):
+        existing_case = await asyncio.to_thread(collection.find_one, ac_query)
 
     if (
         existing_case
@@ -682,10 +1095,17 @@ def fetch_submit_info(case_data: CaseRequest):
         existing_case["_id"] = str(existing_case["_id"])
         return JSONResponse(content=jsonable_encoder(existing_case))
 
+    return await case_scrapes.run(
+        flight_key("getcaseInfo", **ac_query),
+        lambda: scrape_case_by_number(case_data, existing_case),
+    )
+
+
+async def scrape_case_by_number(case_data: CaseRequest, existing_case):
     existing_case_id = existing_case["_id"] if existing_case else None
 
     try:
-        session = acquire_ecourts_session()
+        session = await acquire_ecourts_session()
     except EcourtsBlockedError as exc:
         return JSONResponse(content={"error": str(exc)}, status_code=503)
 
@@ -693,7 +1113,7 @@ def fetch_submit_info(case_data: CaseRequest):
     discard = False
 
     try:
-        html_content, search_app_token = submit_search_with_captcha(
+        html_content, search_app_token = await submit_search_with_captcha(
             session,
             BASE_URL + "?p=casestatus/submitCaseNo",
             {
@@ -760,54 +1180,38 @@ def fetch_submit_info(case_data: CaseRequest):
 
                 second_url = "https://services.ecourts.gov.in/ecourtindia_v6/?p=home/viewHistory"
 
-                second_response = safe_post(
-                    session, second_url, second_payload)
+                with stage("history"):
+                    second_response = await safe_post(
+                        session, second_url, second_payload)
 
                 if second_response.status_code == 200:
                     case_details = second_response.json()
-                    soup = BeautifulSoup(case_details.get(
-                        "data_list", ""), "html.parser")
-
-                    case_status = extract_table_data(
-                        soup, "table case_status_table table-bordered")
-                    case_details = extract_table_data(
-                        soup, "table case_details_table table-bordered")
-                    case_petitioner = {"petitioner_and_advocate": extract_list_data(
-                        soup, "table table-bordered Petitioner_Advocate_table petitioner-advocate-list border")}
-                    case_respondent = {"respondent_and_advocate": extract_list_data(
-                        soup, "table table-bordered Respondent_Advocate_table respondent-advocate-list border")}
-                    case_fir_details = {"fir_details": extract_fir_details(
-                        soup, "FIR_details_table")}
-                    acts_and_sections = extract_acts_and_sections(soup)
-                    case_history = {"case_history": extract_case_history(soup)}
-                    case_transfer = {
-                        "case_transfer": extract_case_transfer(soup)}
-
-                    metadata = {
-                      **case_info, **case_fir_details, **case_details, **case_status, **case_petitioner,
-                                      **case_respondent, **acts_and_sections, **case_history, **case_transfer  
-                    }
-
-                    case_json_s3_path = upload_case_json_to_s3(
-                    s3_client,"dl-shared-gyl-vidilekh",metadata
+                    parsed = parse_history_markup(case_details.get("data_list", ""))
+                    case_details = parsed["case_details"]
+                    metadata = history_metadata(case_info, parsed)
+
+                    case_json_s3_path = await asyncio.to_thread(
+                        upload_case_json_to_s3,
+                        s3_client, "dl-shared-gyl-vidilekh", metadata
                     )
 
-                    orders = fetch_and_store_orders(
-                        soup,
+                    orders = await fetch_and_store_orders(
+                        parsed["order_rows"],
                         session,
                         metadata,
                         case_details,
                         s3_client,
                         "dl-shared-gyl-vidilekh",
-                        REGION_NAME
+                        REGION_NAME,
+                        known_orders=stored_order_links(existing_case),
                     )
 
 
-                    final_response = {**case_info, **case_fir_details, **case_details, **case_status, **case_petitioner,
-                                      **case_respondent, **acts_and_sections, **case_history, **case_transfer,"s3_prefix" : case_json_s3_path, "orders": orders, "orders_synced_at": orders_stamp()}
+                    final_response = {**metadata, "s3_prefix" : case_json_s3_path, "orders": orders, "orders_synced_at": orders_stamp()}
 
                     
-                    final_response["_id"] = save_case(final_response, existing_case_id)
+                    final_response["_id"] = await asyncio.to_thread(
+                        save_case, final_response, existing_case_id)
 
                     return JSONResponse(content=final_response, status_code=200)
                 else:
@@ -820,20 +1224,21 @@ def fetch_submit_info(case_data: CaseRequest):
         return JSONResponse(content={"error": str(exc)}, status_code=503)
 
     finally:
-        release_ecourts_session(session, discard)
+        await release_ecourts_session(session, discard)
 
 
-def get_app_token(session, force_refresh=False):
+async def get_app_token(session, force_refresh=False):
     cached = getattr(session, "_app_token", "")
     if cached and not force_refresh:
         return cached
 
-    response = safe_get(session, BASE_URL + "?p=casestatus/index")
+    with stage("app_token"):
+        response = await safe_get(session, BASE_URL + "?p=casestatus/index")
     if looks_blocked(response):
-        breaker.record_block()
+        await egress_of(session).breaker.record_block()
         raise EcourtsBlockedError(
             "eCourts is refusing requests from this IP while refreshing the "
-            "app_token. Retry later, or route through another IP via ECOURTS_PROXY."
+            "app_token. Retry later, or route through another IP via ECOURTS_PROXIES."
         )
     match = APP_TOKEN_RE.search(response.text)
     if not match:
@@ -841,15 +1246,18 @@ def get_app_token(session, force_refresh=False):
     return remember_app_token(session, match.group(1) if match else "")
 
 
-def submit_search_with_captcha(session, url, payload, result_key,
-                               captcha_field="fcaptcha_code"):
-    app_token = get_app_token(session)
+async def submit_search_with_captcha(session, url, payload, result_key,
+                                     captcha_field="fcaptcha_code"):
+    session._captcha_search = True
+    app_token = await get_app_token(session)
+
+    prefetched = await take_prefetched_captcha(session)
 
     for attempt in range(1, MAX_RETRIES + 1):
-        captcha_response = safe_get(session, f"{CAPTCHA_URL}? {random.random()}")
-        image_base64 = base64.b64encode(captcha_response.content).decode("utf-8")
-        captcha_text = solve_captcha(
-            lambda_client=lambda_client, image_base64=image_base64, frm="hc")
+        if attempt == 1 and prefetched:
+            captcha_text = prefetched
+        else:
+            captcha_text = await solve_session_captcha(session)
         if not captcha_text:
             print(f"[warn] Captcha solver returned nothing (attempt {attempt})")
             continue
@@ -859,7 +1267,8 @@ def submit_search_with_captcha(session, url, payload, result_key,
         body["ajax_req"] = "true"
         body["app_token"] = app_token
 
-        response = safe_post(session, url, body)
+        with stage("search"):
+            response = await safe_post(session, url, body)
 
         try:
             response_json = response.json()
@@ -873,18 +1282,19 @@ def submit_search_with_captcha(session, url, payload, result_key,
 
         if "invalid request" in error_msg:
             print(f"[warn] Gate rejected the request (attempt {attempt})")
-            invalidate_gate()
-            ecourts_gate_headers(session, force_refresh=True)
-            app_token = get_app_token(session, force_refresh=True)
+            invalidate_gate(session)
+            await ecourts_gate_headers(session, force_refresh=True)
+            app_token = await get_app_token(session, force_refresh=True)
             continue
 
         if "captcha" in error_msg:
             print(f"[warn] Invalid captcha (attempt {attempt})")
+            record_captcha_verdict("dc", "rejected")
             continue
 
         if "session" in error_msg or "expire" in error_msg:
             print(f"[warn] Session expired, refreshing token (attempt {attempt})")
-            app_token = get_app_token(session, force_refresh=True)
+            app_token = await get_app_token(session, force_refresh=True)
             continue
 
         html = response_json.get(result_key, "")
@@ -892,25 +1302,68 @@ def submit_search_with_captcha(session, url, payload, result_key,
             print(f"[warn] Empty {result_key} (attempt {attempt})")
             continue
 
+        record_captcha_verdict("dc", "accepted")
+        record_captcha_search("dc", attempt, solved=True)
         session._search_validated = True
         return html, app_token
 
+    record_captcha_search("dc", MAX_RETRIES, solved=False)
     return None, app_token
 
 
-@app.post("/dc/bulk_q/partyname")
-def fetch_submit_info(case_data: CaseRequestBulk):
-    case_info = {}
+def iter_party_search_results(html_content, case_data):
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    for row in soup.find_all("tr"):
+        cols = row.find_all("td")
+        if len(cols) < 3:
+            continue
+
+        case_number = cols[1].get_text(strip=True)
+        party_details = cols[2].get_text(" ", strip=True)
+        party_details = re.sub(
+            r"\s*Vs\.?\s*", " Vs ", party_details, flags=re.IGNORECASE)
+        party_details = re.sub(r"\s+", " ", party_details).strip()
+
+        view_link = row.find("a", class_="someclass")
+        if not view_link:
+            continue
+
+        onClick_data = view_link.get("onclick", "")
+        match = re.search(r"viewHistory\((.*?)\)", onClick_data)
+
+        if not match:
+            continue
+
+        params = match.group(1)
+        values = [v.strip().strip("'") for v in params.split(",")]
+
+        yield {
+            "case_no": values[0],
+            "cino": values[1],
+            "court_code": values[2] or None,
+            "state_code": values[5] or None,
+            "dist_code": values[6] or None,
+            "court_complex_code": values[7] or None,
+            "est_code": case_data.est_code or None,
+            "rgyear": case_data.rgyearP,
+            "case_number": case_number,
+            "party_details": party_details,
+            "courtType": case_data.courtType
+        }
 
+
+@app.post("/dc/bulk_q/partyname")
+async def fetch_submit_info(case_data: CaseRequestBulk, stream: bool = False):
     try:
-        session = acquire_ecourts_session()
+        session = await acquire_ecourts_session()
     except EcourtsBlockedError as exc:
         return JSONResponse(content={"error": str(exc)}, status_code=503)
 
     discard = False
 
     try:
-        html_content, _ = submit_search_with_captcha(
+        html_content, _ = await submit_search_with_captcha(
             session,
             BASE_URL + "?p=casestatus/submitPartyName",
             {
@@ -934,65 +1387,27 @@ def fetch_submit_info(case_data: CaseRequestBulk):
         if "Record not found" in html_content:
             return JSONResponse(content={"error": "Invalid case details"}, status_code=404)
 
-        soup = BeautifulSoup(html_content, "html.parser")
-        view_link = soup.find("a", class_="someclass")
-        rows = soup.find_all("tr")
-
-        results = []
-        for row in rows:
-            cols = row.find_all("td")
-            if len(cols) < 3:
-                continue
-
-            case_number = cols[1].get_text(strip=True)
-            party_details = cols[2].get_text(" ", strip=True)
-            party_details = re.sub(
-                r"\s*Vs\.?\s*", " Vs ", party_details, flags=re.IGNORECASE)
-            party_details = re.sub(r"\s+", " ", party_details).strip()
+        results = iter_party_search_results(html_content, case_data)
+        if stream:
+            # parsing runs while the client reads; the session is already
+            # back in the pool by then
+            return ndjson_response(results)
 
-            view_link = row.find("a", class_="someclass")
-            if not view_link:
-                continue
-
-            onClick_data = view_link.get("onclick", "")
-            match = re.search(r"viewHistory\((.*?)\)", onClick_data)
-
-            if not match:
-                continue
-
-            params = match.group(1)
-            values = [v.strip().strip("'") for v in params.split(",")]
-
-            case_info = {
-                "case_no": values[0],
-                "cino": values[1],
-                "court_code": values[2] or None,
-                "state_code": values[5] or None,
-                "dist_code": values[6] or None,
-                "court_complex_code": values[7] or None,
-                "est_code": case_data.est_code or None,
-                "rgyear": case_data.rgyearP,
-                "case_number": case_number,
-                "party_details": party_details,
-                "courtType": case_data.courtType
-            }
-
-            results.append(case_info)
-
-        return JSONResponse(content={"data": results}, status_code=200)
+        return JSONResponse(content={"data": list(results)}, status_code=200)
 
     except (EcourtsBlockedError, EcourtsGateError) as exc:
         discard = True
         return JSONResponse(content={"error": str(exc)}, status_code=503)
 
     finally:
-        release_ecourts_session(session, discard)
+        await release_ecourts_session(session, discard)
 
 CNR_HISTORY_URL = BASE_URL + "?p=cnr_status/viewCNRHistory/"
 HISTORY_URL = BASE_URL + "?p=home/viewHistory"
 
 
-def fetch_history_by_search(session, case_info):
+@timed("history")
+async def fetch_history_by_search(session, case_info):
     """Pull case history through the search route.
 
     Only this route renders the `displayPdf(...)` order anchors that carry the
@@ -1018,7 +1433,7 @@ def fetch_history_by_search(session, case_info):
     if case_info.get("est_code") is not None:
         payload["est_code"] = str(case_info["est_code"])
 
-    response = safe_post(session, HISTORY_URL, payload)
+    response = await safe_post(session, HISTORY_URL, payload)
 
     if response.status_code != 200:
         return "", f"viewHistory returned HTTP {response.status_code}"
@@ -1031,7 +1446,8 @@ def fetch_history_by_search(session, case_info):
     return body.get("data_list") or "", str(body.get("errormsg", "") or "")
 
 
-def fetch_history_by_cnr(session, cino):
+@timed("history")
+async def fetch_history_by_cnr(session, cino):
     """Pull case history straight from a CNR.
 
     `home/viewHistory` needs prior search state in the PHP session, so calling
@@ -1046,7 +1462,7 @@ def fetch_history_by_cnr(session, cino):
         "app_token": getattr(session, "_app_token", ""),
     }
 
-    response = safe_post(session, CNR_HISTORY_URL, payload)
+    response = await safe_post(session, CNR_HISTORY_URL, payload)
 
     if response.status_code != 200:
         return "", f"CNR lookup returned HTTP {response.status_code}"
@@ -1061,32 +1477,40 @@ def fetch_history_by_cnr(session, cino):
 
 
 @app.post("/dc/bulk_i/partyname")
-def fetch_submit_info(single_case: CaseRequestBulkIngest):
+async def fetch_submit_info(single_case: CaseRequestBulkIngest):
+    query = single_case.dict()
+
+    ac_query = {
+        "courtType": "distcourts",
+        "cino": query.get("cino")
+    }
+
+    with stage("mongo_lookup"):
+        existing_case = await asyncio.to_thread(collection.find_one, ac_query)
+
+    if (
+        existing_case
+        and single_case.refresh == 0
+        and not cached_case_needs_orders(existing_case)
+    ):
+        existing_case["_id"] = str(existing_case["_id"])
+        return JSONResponse(content=jsonable_encoder(existing_case))
+
+    return await case_scrapes.run(
+        flight_key("bulk_i", **ac_query),
+        lambda: scrape_case_by_cnr(single_case, existing_case),
+    )
+
+
+async def scrape_case_by_cnr(single_case: CaseRequestBulkIngest, existing_case):
     try:
-        session = acquire_ecourts_session()
+        session = await acquire_ecourts_session()
     except EcourtsBlockedError as exc:
         return JSONResponse(content={"error": str(exc)}, status_code=503)
 
     discard = False
 
     try:
-        query = single_case.dict()
-
-        ac_query = {
-            "courtType": "distcourts",
-            "cino": query.get("cino")
-        }
-
-        existing_case = collection.find_one(ac_query)
-
-        if (
-            existing_case
-            and single_case.refresh == 0
-            and not cached_case_needs_orders(existing_case)
-        ):
-            existing_case["_id"] = str(existing_case["_id"])
-            return JSONResponse(content=jsonable_encoder(existing_case))
-
         existing_case_id = existing_case["_id"] if existing_case else None
 
         case_info = {
@@ -1101,16 +1525,16 @@ def fetch_submit_info(single_case: CaseRequestBulkIngest):
             "courtType": "distcourts"
         }
 
-        get_app_token(session)
+        await get_app_token(session)
 
         # Search route first - it is the only one whose markup carries the
         # order tokens. Fall back to the CNR route when the PHP session has no
         # search state, accepting that those orders arrive without links.
-        data_list, errormsg = fetch_history_by_search(session, case_info)
+        data_list, errormsg = await fetch_history_by_search(session, case_info)
         source = "viewHistory"
 
         if not data_list.strip():
-            data_list, errormsg = fetch_history_by_cnr(session, case_info["cino"])
+            data_list, errormsg = await fetch_history_by_cnr(session, case_info["cino"])
             source = "viewCNRHistory"
 
         print(
@@ -1126,48 +1550,32 @@ def fetch_submit_info(single_case: CaseRequestBulkIngest):
                 status_code=502
             )
 
-        soup = BeautifulSoup(data_list, "html.parser")
-
-        case_status = extract_table_data(soup, "table case_status_table table-bordered")
-        case_details = extract_table_data(soup, "table case_details_table table-bordered")
-        case_petitioner = {"petitioner_and_advocate": extract_list_data(soup, "table table-bordered Petitioner_Advocate_table petitioner-advocate-list border")}
-        case_respondent = {"respondent_and_advocate": extract_list_data(soup, "table table-bordered Respondent_Advocate_table respondent-advocate-list border")}
-        case_fir_details = {"fir_details": extract_fir_details(soup, "FIR_details_table")}
-        acts_and_sections = extract_acts_and_sections(soup)
-        case_history = {"case_history": extract_case_history(soup)}
-        case_transfer = {"case_transfer": extract_case_transfer(soup)}
+        parsed = parse_history_markup(data_list)
+        case_history = parsed["case_history"]
 
         print(
-            f"[dc/bulk_i] cino={single_case.cino} history_rows={len(case_history['case_history'])} "
-            f"sample_dates={[h.get('hearingDate') for h in case_history['case_history'][:3]]}"
+            f"[dc/bulk_i] cino={single_case.cino} history_rows={len(case_history)} "
+            f"sample_dates={[h.get('hearingDate') for h in case_history[:3]]}"
         )
 
-        metadata = {
-            **case_info,
-            **case_fir_details,
-            **case_details,
-            **case_status,
-            **case_petitioner,
-            **case_respondent,
-            **acts_and_sections,
-            **case_history,
-            **case_transfer
-        }
+        metadata = history_metadata(case_info, parsed)
 
-        case_json_s3_path = upload_case_json_to_s3(
+        case_json_s3_path = await asyncio.to_thread(
+            upload_case_json_to_s3,
             s3_client,
             "dl-shared-gyl-vidilekh",
             metadata
         )
 
-        orders = fetch_and_store_orders(
-            soup,
+        orders = await fetch_and_store_orders(
+            parsed["order_rows"],
             session,
             metadata,
             {"app_token": getattr(session, "_app_token", "")},
             s3_client,
             "dl-shared-gyl-vidilekh",
-            REGION_NAME
+            REGION_NAME,
+            known_orders=stored_order_links(existing_case),
         )
 
         final_response = {
@@ -1178,7 +1586,8 @@ def fetch_submit_info(single_case: CaseRequestBulkIngest):
         }
     
 
-        final_response["_id"] = save_case(final_response, existing_case_id)
+        final_response["_id"] = await asyncio.to_thread(
+            save_case, final_response, existing_case_id)
 
         return JSONResponse(content=final_response, status_code=200)
 
@@ -1187,4 +1596,4 @@ def fetch_submit_info(single_case: CaseRequestBulkIngest):
         return JSONResponse(content={"error": str(exc)}, status_code=503)
 
     finally:
-        release_ecourts_session(session, discard)
\ No newline at end of file
+        await release_ecourts_session(session, discard)
\ No newline at end of file
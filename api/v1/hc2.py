@@ -12,10 +12,22 @@ from typing import Optional
 from dotenv import load_dotenv
 from core.database import collection, save_case
 from core.s3_client import s3_client
-from helpers.solve_captcha import solve_captcha
+from helpers.solve_captcha import (
+    record_captcha_search,
+    record_captcha_verdict,
+    solve_captcha,
+)
 from core.lambda_client import lambda_client
 from helpers.requests import safe_get,safe_post
-from helpers.orders import hc_source_ref, order_pdf_s3_key, stable_order_doc_id
+from helpers.timing import stage, timed
+from helpers.orders import (
+    OrderKeyIndex,
+    hc_source_ref,
+    order_pdf_s3_key,
+    record_order_outcomes,
+    stable_order_doc_id,
+    stored_order_links,
+)
 import os
 import html
 load_dotenv()
@@ -81,6 +93,7 @@ def build_orders_prefix(metadata: dict):
 def build_case_json_key(metadata: dict):
     return build_case_base_path(metadata) + "metadata.json"
 
+@timed("s3_metadata")
 def upload_case_json_to_s3(
     s3_client,
     bucket_name,
@@ -320,7 +333,9 @@ def extract_high_court_case_history(soup):
     return history
 
 
-def extract_and_upload_orders(soup, s3_client, session, BUCKET_NAME, REGION_NAME,metadata):
+@timed("orders")
+def extract_and_upload_orders(soup, s3_client, session, BUCKET_NAME, REGION_NAME,metadata,
+                              known_orders=None):
     orders = []
     table = soup.find("table", class_="order_table")
 
@@ -328,6 +343,7 @@ def extract_and_upload_orders(soup, s3_client, session, BUCKET_NAME, REGION_NAME
         return orders
 
     orders_prefix = build_case_base_path(metadata) + "orders/"
+    stored_keys = OrderKeyIndex(s3_client, BUCKET_NAME, orders_prefix)
     seen_doc_ids = set()
     rows = table.find_all("tr")[1:]
     for row in rows:
@@ -347,12 +363,17 @@ def extract_and_upload_orders(soup, s3_client, session, BUCKET_NAME, REGION_NAME
         if doc_id in seen_doc_ids:
             continue
         seen_doc_ids.add(doc_id)
+        if doc_id in (known_orders or {}):
+            orders.append({
+                "order_number": order_number,
+                "order_date": order_date,
+                "order_link": known_orders[doc_id]
+            })
+            continue
         s3_key = order_pdf_s3_key(orders_prefix, order_date, source_ref)
+        s3_url = f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{s3_key}"
         try:
-            s3_client.head_object(Bucket=BUCKET_NAME, Key=s3_key)
-            s3_url = f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{s3_key}"
-        except s3_client.exceptions.ClientError as e:
-            if e.response['Error']['Code'] == "404":
+            if not stored_keys.has(s3_key):
                 response = session.get(final_pdf_url, stream=True)
                 if response.status_code == 200:
                     s3_client.upload_fileobj(
@@ -364,13 +385,12 @@ def extract_and_upload_orders(soup, s3_client, session, BUCKET_NAME, REGION_NAME
                             'ContentDisposition': 'inline'
                         }
                     )
-                    s3_url = f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{s3_key}"
                 else:
                     print(f"❌ Failed to fetch PDF from {final_pdf_url}")
                     s3_url = None
-            else:
-                print(f"❌ S3 Error: {e}")
-                s3_url = None
+        except s3_client.exceptions.ClientError as e:
+            print(f"❌ S3 Error: {e}")
+            s3_url = None
 
         orders.append({
             "order_number": order_number,
@@ -378,10 +398,12 @@ def extract_and_upload_orders(soup, s3_client, session, BUCKET_NAME, REGION_NAME
             "order_link": s3_url
         })
 
+    record_order_outcomes("hc2", orders)
     return orders
 
 
-def parse_case_history(html, payload, second_payload,session):
+@timed("parse")
+def case_history_metadata(html, payload, second_payload):
     soup = BeautifulSoup(html, "html.parser")
 
     case_details = extract_table_data(soup, "Case Details", [
@@ -448,6 +470,11 @@ def parse_case_history(html, payload, second_payload,session):
         "case_transfer": [],
         "orders" : []
     }
+    return metadata, soup
+
+
+def parse_case_history(html, payload, second_payload,session, known_orders=None):
+    metadata, soup = case_history_metadata(html, payload, second_payload)
     case_json_s3_path = upload_case_json_to_s3(
         s3_client,"dl-shared-gyl-vidilekh",metadata=metadata
         )
@@ -458,7 +485,8 @@ def parse_case_history(html, payload, second_payload,session):
         session=session,
         BUCKET_NAME="dl-shared-gyl-vidilekh",
         REGION_NAME=REGION_NAME,
-        metadata=metadata
+        metadata=metadata,
+        known_orders=known_orders
     )
     metadata["orders"] = orders_hc
 
@@ -514,7 +542,8 @@ def fetch_submit_hc_info(case_data: CaseRequest):
         "state_code": query.get("state_code"),
         "court_complex_code": query.get("court_complex_code")
     }
-    existing_case = collection.find_one(ac_query)
+    with stage("mongo_lookup"):
+        existing_case = collection.find_one(ac_query)
 
     if existing_case and case_data.refresh == 0:
         existing_case["_id"] = str(existing_case["_id"])
@@ -540,7 +569,8 @@ def fetch_submit_hc_info(case_data: CaseRequest):
             'content-type': 'application/x-www-form-urlencoded',
             'origin': 'https://hcservices.ecourts.gov.in',
         }
-        response = safe_post(session=session, url="https://hcservices.ecourts.gov.in/ecourtindiaHC/cases/case_no_qry.php", headers=headers, data=payload)
+        with stage("search"):
+            response = safe_post(session=session, url="https://hcservices.ecourts.gov.in/ecourtindiaHC/cases/case_no_qry.php", headers=headers, data=payload)
         clean_text = response.text.lstrip('\ufeff').replace("<br/>", " ")
         decoded = html.unescape(html.unescape(clean_text)).strip()
         values = decoded.split("~")
@@ -560,10 +590,12 @@ def fetch_submit_hc_info(case_data: CaseRequest):
                 'Referer': 'https://hcservices.ecourts.gov.in/',
                 'Content-Type': 'application/x-www-form-urlencoded',
             }
-        second_resp = safe_post(session=session,url="https://hcservices.ecourts.gov.in/hcservices/cases_qry/o_civil_case_history.php",data=second_payload,headers=headers)
+        with stage("history"):
+            second_resp = safe_post(session=session,url="https://hcservices.ecourts.gov.in/hcservices/cases_qry/o_civil_case_history.php",data=second_payload,headers=headers)
 
         result = parse_case_history(
-                second_resp.text, payload, second_payload, session=session)
+                second_resp.text, payload, second_payload, session=session,
+                known_orders=stored_order_links(existing_case))
         
         result["_id"] = save_case(result, existing_case_id)
         return JSONResponse(content=result, status_code=200)
@@ -580,11 +612,12 @@ def fetch_submit_info(case_data: CaseAdvocateBulk):
 
     try:
         for attempt in range(1, MAX_RETRIES + 1):
-            captcha_response = safe_get(session=session,url="https://hcservices.ecourts.gov.in/ecourtindiaHC/securimage/securimage_show.php?0.026039539400995126")
-            image_base64 = base64.b64encode(
-                captcha_response.content
-            ).decode("utf-8")
-            expression = solve_captcha(lambda_client=lambda_client,image_base64=image_base64,frm="hc")
+            with stage("captcha"):
+                captcha_response = safe_get(session=session,url="https://hcservices.ecourts.gov.in/ecourtindiaHC/securimage/securimage_show.php?0.026039539400995126")
+                image_base64 = base64.b64encode(
+                    captcha_response.content
+                ).decode("utf-8")
+                expression = solve_captcha(lambda_client=lambda_client,image_base64=image_base64,frm="hc",court="hc2")
             if not expression:
                 continue
 
@@ -608,20 +641,27 @@ def fetch_submit_info(case_data: CaseAdvocateBulk):
             'referer': 'https://hcservices.ecourts.gov.in/'          
             }
 
-            response = safe_post(session, url="https://hcservices.ecourts.gov.in/ecourtindiaHC/cases/qs_civil_advocate_qry.php", data=payload, headers=headers)
+            with stage("search"):
+                response = safe_post(session, url="https://hcservices.ecourts.gov.in/ecourtindiaHC/cases/qs_civil_advocate_qry.php", data=payload, headers=headers)
             if response.status_code == 403:
                 continue
             if response.status_code != 200:
                 return JSONResponse(content={"error": f"Upstream returned {response.status_code}"}, status_code=502)
             if "error1" in response.text:
+                # error1 is the site's invalid-captcha answer
+                record_captcha_verdict("hc2", "rejected")
+                record_captcha_search("hc2", attempt, solved=False)
                 return JSONResponse(content={"error": "Invalid case details"}, status_code=404)
 
+            record_captcha_verdict("hc2", "accepted")
+            record_captcha_search("hc2", attempt, solved=True)
             results = extract_case_data(case_data,response.text)
             return JSONResponse(
                 content={"data": results},
                 status_code=200
             )
-            
+
+        record_captcha_search("hc2", MAX_RETRIES, solved=False)
         return JSONResponse(
             content={"error": "Unable to get response from HC at this moment"},
             status_code=404
@@ -639,11 +679,12 @@ def fetch_submit_info(case_data: CasePartyBulk):
 
     try:
         for attempt in range(1, MAX_RETRIES + 1):
-            captcha_response = safe_get(session=session,url="https://hcservices.ecourts.gov.in/ecourtindiaHC/securimage/securimage_show.php?0.026039539400995126")
-            image_base64 = base64.b64encode(
-                captcha_response.content
-            ).decode("utf-8")
-            expression = solve_captcha(lambda_client=lambda_client,image_base64=image_base64,frm="hc")
+            with stage("captcha"):
+                captcha_response = safe_get(session=session,url="https://hcservices.ecourts.gov.in/ecourtindiaHC/securimage/securimage_show.php?0.026039539400995126")
+                image_base64 = base64.b64encode(
+                    captcha_response.content
+                ).decode("utf-8")
+                expression = solve_captcha(lambda_client=lambda_client,image_base64=image_base64,frm="hc",court="hc2")
             if not expression:
                 continue
 
@@ -666,20 +707,27 @@ def fetch_submit_info(case_data: CasePartyBulk):
             'origin': 'https://hcservices.ecourts.gov.in',
             'referer': 'https://hcservices.ecourts.gov.in/'
             }
-            response = safe_post(session, url="https://hcservices.ecourts.gov.in/ecourtindiaHC/cases/ki_petres_qry.php", data=payload, headers=headers)
+            with stage("search"):
+                response = safe_post(session, url="https://hcservices.ecourts.gov.in/ecourtindiaHC/cases/ki_petres_qry.php", data=payload, headers=headers)
             if response.status_code == 403:
                 continue
             if response.status_code != 200:
                 return JSONResponse(content={"error": f"Upstream returned {response.status_code}"}, status_code=502)
             if "error1" in response.text:
+                # error1 is the site's invalid-captcha answer
+                record_captcha_verdict("hc2", "rejected")
+                record_captcha_search("hc2", attempt, solved=False)
                 return JSONResponse(content={"error": "Invalid case details"}, status_code=404)
 
+            record_captcha_verdict("hc2", "accepted")
+            record_captcha_search("hc2", attempt, solved=True)
             results = extract_case_data(case_data,response.text)
             return JSONResponse(
                 content={"data": results},
                 status_code=200
             )
-            
+
+        record_captcha_search("hc2", MAX_RETRIES, solved=False)
         return JSONResponse(
             content={"error": "Unable to get response from Ecourts at this moment"},
             status_code=404
@@ -700,7 +748,8 @@ def fetch_submit_hc_info(case_data: CaseRequestBulkIngest):
             "cino": query.get("cino")
         }
    
-    existing_case = collection.find_one(ac_query)
+    with stage("mongo_lookup"):
+        existing_case = collection.find_one(ac_query)
 
     if existing_case and case_data.refresh == 0:
         existing_case["_id"] = str(existing_case["_id"])
@@ -735,10 +784,12 @@ def fetch_submit_hc_info(case_data: CaseRequestBulkIngest):
                 'Referer': 'https://hcservices.ecourts.gov.in/',
                 'Content-Type': 'application/x-www-form-urlencoded',
             }
-        second_resp = safe_post(session=session,url="https://hcservices.ecourts.gov.in/hcservices/cases_qry/o_civil_case_history.php",data=second_payload,headers=headers)
+        with stage("history"):
+            second_resp = safe_post(session=session,url="https://hcservices.ecourts.gov.in/hcservices/cases_qry/o_civil_case_history.php",data=second_payload,headers=headers)
 
         result = parse_case_history(
-                second_resp.text, payload, second_payload, session=session)
+                second_resp.text, payload, second_payload, session=session,
+                known_orders=stored_order_links(existing_case))
 
         print(
             f"[hc2/bulk_i] cino={case_data.cino} status={second_resp.status_code} "
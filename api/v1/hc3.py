@@ -2,8 +2,8 @@ import base64
 import html
 import json
 import os
-import random
 import re
+import threading
 import time
 from http.client import RemoteDisconnected
 from typing import Optional
@@ -21,14 +21,26 @@ from core.database import collection, save_case
 from core.lambda_client import lambda_client
 from core.s3_client import s3_client
 from helpers.orders import (
+    OrderKeyIndex,
     cached_case_needs_orders,
     hc_source_ref,
     order_pdf_s3_key,
     orders_stamp,
+    record_order_outcomes,
     stable_order_doc_id,
+    stored_order_links,
 )
+from helpers.metrics import Counter, Gauge
+from helpers.ndjson import ndjson_response
+from helpers.pdf_upload import CHUNK_SIZE, NotAPdfError, PdfUpload
+from helpers.rate_limit import limiter_for
 from helpers.requests import safe_get, safe_post
-from helpers.solve_captcha import solve_captcha
+from helpers.solve_captcha import (
+    record_captcha_search,
+    record_captcha_verdict,
+    solve_captcha,
+)
+from helpers.timing import stage, timed
 
 load_dotenv()
 BUCKET_NAME = os.getenv("BUCKET_NAME")
@@ -70,6 +82,13 @@ CASE_PAGE_MARKER = "case_details_table"
 app = APIRouter()
 MAX_RETRIES = 5
 
+# Warm sessions kept per (state_code, court_code), and the limits after
+# which a session is dropped instead of going back to the pool.
+HC_POOL_PER_KEY = int(os.getenv("HC_POOL_PER_KEY", "2"))
+HC_POOL_MAX_IDLE = int(os.getenv("HC_POOL_MAX_IDLE", "16"))
+HC_SESSION_MAX_AGE_SECONDS = int(os.getenv("HC_SESSION_MAX_AGE", "600"))
+HC_SESSION_MAX_USES = int(os.getenv("HC_SESSION_MAX_USES", "25"))
+
 
 class HighCourtScrapeError(Exception):
     """The high court app refused to serve the case history page."""
@@ -144,6 +163,7 @@ def build_case_json_key(metadata: dict):
     return build_case_base_path(metadata) + "metadata.json"
 
 
+@timed("s3_metadata")
 def upload_case_json_to_s3(s3_client, bucket_name, metadata):
     key = build_case_json_key(metadata)
 
@@ -212,15 +232,19 @@ def hc_post(session, url, data, max_retries=4):
     to.
     """
     last_error = None
+    limiter = limiter_for(url)
 
     for attempt in range(1, max_retries + 1):
         try:
-            time.sleep(random.uniform(1.0, 1.8))
-            return session.post(url, data=data, headers=HC_HEADERS, timeout=(30, 180))
+            limiter.wait()
+            response = session.post(url, data=data, headers=HC_HEADERS, timeout=(30, 180))
+            limiter.record(response.status_code)
+            return response
         except (requests.exceptions.ConnectionError,
                 requests.exceptions.Timeout,
                 RemoteDisconnected) as exc:
             last_error = exc
+            limiter.dropped()
             print(f"[hc3] {url} attempt {attempt} failed: {type(exc).__name__}")
 
     raise HighCourtScrapeError(
@@ -228,22 +252,26 @@ def hc_post(session, url, data, max_retries=4):
     )
 
 
-def hc_get(session, url, headers=None, max_retries=4):
+def hc_get(session, url, headers=None, max_retries=4, stream=False):
     """GET on the given session, retrying the connection drops HC hands out.
 
     Order PDFs go through here: without a retry a single dropped connection
     loses the order for good, and the case is then cached with a null link.
     """
     last_error = None
+    limiter = limiter_for(url)
 
     for attempt in range(1, max_retries + 1):
         try:
-            time.sleep(random.uniform(1.0, 1.8))
-            return session.get(url, headers=headers, timeout=(30, 180))
+            limiter.wait()
+            response = session.get(url, headers=headers, timeout=(30, 180), stream=stream)
+            limiter.record(response.status_code)
+            return response
         except (requests.exceptions.ConnectionError,
                 requests.exceptions.Timeout,
                 RemoteDisconnected) as exc:
             last_error = exc
+            limiter.dropped()
             print(f"[hc3] GET {url} attempt {attempt} failed: {type(exc).__name__}")
 
     raise HighCourtScrapeError(
@@ -251,27 +279,143 @@ def hc_get(session, url, headers=None, max_retries=4):
     )
 
 
-def open_hc_session(state_code, dist_code, court_code):
-    """Fresh session primed with the search form so it carries a real app cookie."""
+CSRF_TOKEN_RE = re.compile(r'csrfMagicToken\s*=\s*"([^"]+)"')
+
+# (state_code, court_code) -> idle warm sessions, newest last. Routes run in
+# the threadpool, hence a plain lock.
+_hc_pool = {}
+_hc_pool_lock = threading.Lock()
+_hc_pool_stats = {"hits": 0, "misses": 0, "warmups": 0, "retired": 0}
+
+
+def _hc_idle_sessions():
+    with _hc_pool_lock:
+        return sum(len(sessions) for sessions in _hc_pool.values())
+
+
+HC_POOL_IDLE_SESSIONS = Gauge(
+    "hc_pool_idle_sessions",
+    "Warm hcservices sessions idle in the pool, across every bench.",
+    collect=lambda: [({}, _hc_idle_sessions())],
+)
+HC_POOL_EVENTS = Counter(
+    "hc_pool_events_total",
+    "hcservices pool activity: hits and misses (hit rate = hits / (hits + "
+    "misses)), form warmups and sessions retired.",
+    labels=("event",),
+    collect=lambda: [({"event": event}, count) for event, count in _hc_pool_stats.items()],
+)
+
+
+def new_hc_session():
     session = requests.Session()
     session.headers.update({"user-agent": USER_AGENT})
+    session._created_at = time.monotonic()
+    session._uses = 0
+    # form url -> csrf-magic token read off it (None when the page had none)
+    session._warm_forms = {}
+    return session
+
+
+def hc_session_expired(session):
+    age = time.monotonic() - session._created_at
+    return age > HC_SESSION_MAX_AGE_SECONDS or session._uses >= HC_SESSION_MAX_USES
+
+
+def warm_hc_form(session, form_url, state_code, dist_code, court_code):
+    """Load a search form once per session so it carries a real app cookie.
+
+    csrf-magic mints its token per session, so the one on the page is kept
+    and reused for as long as the session lives.
+    """
+    if form_url in session._warm_forms:
+        return session._warm_forms[form_url]
 
     try:
-        session.get(
-            CASE_FORM_URL,
+        page = session.get(
+            form_url,
             params={
                 "state_cd": state_code,
                 "dist_cd": dist_code,
                 "court_code": court_code,
             },
             timeout=(30, 120),
-        )
+        ).text
     except requests.exceptions.RequestException as exc:
         print(f"[hc3] session warm-up failed ({type(exc).__name__}); continuing")
+        return None
 
+    match = CSRF_TOKEN_RE.search(page)
+    session._warm_forms[form_url] = match.group(1) if match else None
+    with _hc_pool_lock:
+        _hc_pool_stats["warmups"] += 1
+    return session._warm_forms[form_url]
+
+
+@timed("session")
+def acquire_hc_session(state_code, dist_code, court_code, form_url=CASE_FORM_URL):
+    """A warm session for this bench, from the pool when one is idle."""
+    key = (state_code, court_code)
+    session, stale = None, []
+
+    with _hc_pool_lock:
+        idle = _hc_pool.get(key, [])
+        while idle and session is None:
+            candidate = idle.pop()
+            if hc_session_expired(candidate):
+                stale.append(candidate)
+            else:
+                session = candidate
+        if not idle:
+            _hc_pool.pop(key, None)
+        _hc_pool_stats["hits" if session else "misses"] += 1
+        _hc_pool_stats["retired"] += len(stale)
+
+    for expired in stale:
+        expired.close()
+
+    if session is None:
+        session = new_hc_session()
+    session._pool_key = key
+    session._uses += 1
+    warm_hc_form(session, form_url, state_code, dist_code, court_code)
     return session
 
 
+def release_hc_session(session, discard=False):
+    if not (discard or hc_session_expired(session)):
+        with _hc_pool_lock:
+            idle = _hc_pool.setdefault(session._pool_key, [])
+            total_idle = sum(len(sessions) for sessions in _hc_pool.values())
+            if len(idle) < HC_POOL_PER_KEY and total_idle < HC_POOL_MAX_IDLE:
+                idle.append(session)
+                return
+            if not idle:
+                _hc_pool.pop(session._pool_key, None)
+    session.close()
+
+
+def close_hc_pool():
+    with _hc_pool_lock:
+        idle = [session for sessions in _hc_pool.values() for session in sessions]
+        _hc_pool.clear()
+    for session in idle:
+        session.close()
+
+
+def hc_pool_status():
+    with _hc_pool_lock:
+        served = _hc_pool_stats["hits"] + _hc_pool_stats["misses"]
+        return {
+            "per_key": HC_POOL_PER_KEY,
+            "max_idle": HC_POOL_MAX_IDLE,
+            "idle": sum(len(sessions) for sessions in _hc_pool.values()),
+            "keys": len(_hc_pool),
+            "hit_rate": round(_hc_pool_stats["hits"] / served, 4) if served else None,
+            **_hc_pool_stats,
+        }
+
+
 TOKEN_RE = re.compile(r"^[0-9a-f]{64}$", re.IGNORECASE)
 
 
@@ -282,12 +426,11 @@ def record_token(parts):
     return ""
 
 
-def parse_case_records(raw_text):
+def iter_case_records(raw_text):
     text = (raw_text or "").strip().lstrip("﻿").strip()
     if not text or text.upper().startswith("ERROR"):
-        return []
+        return
 
-    records = []
     for chunk in text.split("##"):
         chunk = chunk.strip().lstrip("﻿")
         if not chunk:
@@ -297,16 +440,18 @@ def parse_case_records(raw_text):
         if len(parts) < 4:
             continue
 
-        records.append({
+        yield {
             "case_no": parts[0],
             "case_number": clean_text(html.unescape(re.sub(r"<br\s*/?>", " ", parts[1]))),
             "party_details": clean_text(html.unescape(re.sub(r"<br\s*/?>", " ", parts[2]))),
             "cino": parts[3],
             "court_code": parts[4] if len(parts) > 4 else "",
             "token": record_token(parts),
-        })
+        }
 
-    return records
+
+def parse_case_records(raw_text):
+    return list(iter_case_records(raw_text))
 
 
 def split_hc_case_no(case_no):
@@ -321,6 +466,7 @@ def split_hc_case_no(case_no):
     }
 
 
+@timed("search")
 def search_cases(session, *, state_code, dist_code, court_code,
                  case_type, case_reg_no, rgyear):
     response = hc_post(session, CASE_QRY_URL, {
@@ -381,15 +527,16 @@ def load_case_history(session, *, state_code, dist_code, court_code,
                 f"carried a usable token for {cino or case_no}"
             )
 
-        response = hc_post(session, CASE_HISTORY_URL, {
-            "court_code": court_code,
-            "state_code": state_code,
-            "dist_code": dist_code,
-            "case_no": record["case_no"],
-            "cino": record["cino"],
-            "token": record["token"],
-            "appFlag": "",
-        })
+        with stage("history"):
+            response = hc_post(session, CASE_HISTORY_URL, {
+                "court_code": court_code,
+                "state_code": state_code,
+                "dist_code": dist_code,
+                "case_no": record["case_no"],
+                "cino": record["cino"],
+                "token": record["token"],
+                "appFlag": "",
+            })
 
         page = response.text or ""
         if response.status_code == 200 and CASE_PAGE_MARKER in page:
@@ -781,43 +928,54 @@ PDF_HEADERS = {
 }
 
 
-def download_order_pdf(session, pdf_url):
-    """Fetch an order PDF; returns (bytes, status).
+def upload_order_pdf(session, pdf_url, s3_key):
+    """Stream an order PDF into S3; returns (stored size, status).
 
     Status uses the district court vocabulary so both courts read the same in
     the case file: `not_uploaded` when the court says the order is not there,
     `unavailable` when the fetch itself failed.
     """
     try:
-        response = hc_get(session, pdf_url, headers=PDF_HEADERS)
+        response = hc_get(session, pdf_url, headers=PDF_HEADERS, stream=True)
     except HighCourtScrapeError as exc:
         print(f"[hc/orders] PDF fetch failed for {pdf_url}: {exc}")
         return None, "unavailable"
 
-    if response.status_code != 200:
-        print(f"[hc/orders] PDF {pdf_url} returned HTTP {response.status_code}")
+    # display_pdf.php leaks a UTF-8 BOM ahead of the %PDF header; PdfUpload
+    # drops it while sniffing the first chunk.
+    upload = PdfUpload(s3_client, S3_BUCKET, s3_key)
+    try:
+        if response.status_code != 200:
+            print(f"[hc/orders] PDF {pdf_url} returned HTTP {response.status_code}")
+            return None, "unavailable"
+
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if upload.feed(chunk):
+                upload.flush()
+        return upload.finish(), "available"
+    except NotAPdfError as exc:
+        upload.abort()
+        # An unpublished order answers HTTP 200 with
+        # "Orders is not uploaded for case number ..." instead of a PDF.
+        if "not uploaded" in exc.head[:500].decode("utf-8", "ignore").lower():
+            return None, "not_uploaded"
+        print(f"[hc/orders] {pdf_url} did not return a PDF ({exc})")
         return None, "unavailable"
-
-    body = response.content
-    # display_pdf.php leaks a UTF-8 BOM ahead of the %PDF header.
-    start = body.find(b"%PDF", 0, 1024)
-    if start >= 0:
-        return body[start:], "available"
-
-    # An unpublished order answers HTTP 200 with
-    # "Orders is not uploaded for case number ..." instead of a PDF.
-    if "not uploaded" in body[:500].decode("utf-8", "ignore").lower():
-        return None, "not_uploaded"
-
-    print(
-        f"[hc/orders] {pdf_url} did not return a PDF "
-        f"({len(body)} bytes, starts {body[:40]!r})"
-    )
-    return None, "unavailable"
+    except requests.exceptions.RequestException as exc:
+        upload.abort()
+        print(f"[hc/orders] PDF fetch failed for {pdf_url}: {exc}")
+        return None, "unavailable"
+    except Exception:
+        upload.abort()
+        raise
+    finally:
+        response.close()
 
 
-def store_orders(orders, session, metadata):
+@timed("orders")
+def store_orders(orders, session, metadata, known_orders=None):
     orders_prefix = build_orders_prefix(metadata)
+    stored_keys = OrderKeyIndex(s3_client, S3_BUCKET, orders_prefix)
     seen_doc_ids = set()
     stored = []
 
@@ -836,29 +994,24 @@ def store_orders(orders, session, metadata):
             continue
         seen_doc_ids.add(doc_id)
 
+        if doc_id in (known_orders or {}):
+            order["order_link"] = known_orders[doc_id]
+            order["order_status"] = "available"
+            stored.append(order)
+            continue
+
         s3_key = order_pdf_s3_key(orders_prefix, order.get("order_date"), source_ref)
         s3_url = f"https://{S3_BUCKET}.s3.{REGION_NAME}.amazonaws.com/{s3_key}"
         status = "available"
 
         try:
-            try:
-                s3_client.head_object(Bucket=S3_BUCKET, Key=s3_key)
-            except s3_client.exceptions.ClientError as e:
-                if e.response["Error"]["Code"] != "404":
-                    raise
-                body, status = download_order_pdf(
-                    session, urljoin(HC_CASES_BASE, href))
-                if body is None:
+            if not stored_keys.has(s3_key):
+                size, status = upload_order_pdf(
+                    session, urljoin(HC_CASES_BASE, href), s3_key)
+                if size is None:
                     s3_url = None
                 else:
-                    s3_client.put_object(
-                        Bucket=S3_BUCKET,
-                        Key=s3_key,
-                        Body=body,
-                        ContentType="application/pdf",
-                        ContentDisposition="inline",
-                    )
-                    print(f"[hc/orders] stored {s3_key} ({len(body)} bytes)")
+                    print(f"[hc/orders] stored {s3_key} ({size} bytes)")
         except Exception as exc:
             print(f"[hc/orders] S3 store failed for {s3_key}: {exc}")
             s3_url, status = None, "unavailable"
@@ -866,6 +1019,7 @@ def store_orders(orders, session, metadata):
         order["order_link"] = s3_url
         order["order_status"] = status
         stored.append(order)
+    record_order_outcomes("hc3", stored)
 
     print(
         f"[hc/orders] rows={len(orders)} kept={len(stored)} "
@@ -874,7 +1028,9 @@ def store_orders(orders, session, metadata):
     return stored
 
 
-def parse_case_history(page, context, session):
+@timed("parse")
+def case_history_metadata(page, context):
+    """The case page as case metadata, plus its order rows (not yet stored)."""
     soup = BeautifulSoup(page, "html.parser")
 
     case_details = extract_case_details(soup)
@@ -939,8 +1095,13 @@ def parse_case_history(page, context, session):
         "document_details": extract_document_details(soup),
         "orders": [],
     }
+    return metadata, extract_orders(soup)
 
-    metadata["orders"] = store_orders(extract_orders(soup), session, metadata)
+
+def parse_case_history(page, context, session, known_orders=None):
+    metadata, orders = case_history_metadata(page, context)
+    metadata["orders"] = store_orders(
+        orders, session, metadata, known_orders=known_orders)
     metadata["orders_synced_at"] = orders_stamp()
     metadata["s3_prefix"] = upload_case_json_to_s3(
         s3_client, S3_BUCKET, metadata=metadata)
@@ -948,12 +1109,10 @@ def parse_case_history(page, context, session):
     return metadata
 
 
-def extract_case_data(case_data, raw_text):
-    results = []
-
-    for record in parse_case_records(raw_text):
+def iter_case_data(case_data, raw_text):
+    for record in iter_case_records(raw_text):
         case_number = record["case_number"]
-        results.append({
+        yield {
             "case_no": record["case_no"],
             "case_number": case_number,
             "cino": record["cino"],
@@ -963,9 +1122,11 @@ def extract_case_data(case_data, raw_text):
             "courtType": case_data.courtType,
             "rgyear": case_number.split("/")[-1] if "/" in case_number else None,
             "party_details": record["party_details"],
-        })
+        }
 
-    return results
+
+def extract_case_data(case_data, raw_text):
+    return list(iter_case_data(case_data, raw_text))
 
 
 BULK_ERRORS = {
@@ -999,36 +1160,16 @@ def classify_bulk_response(raw_text):
     return "ok", ""
 
 
-CSRF_TOKEN_RE = re.compile(r'csrfMagicToken\s*=\s*"([^"]+)"')
-
-
 def open_bulk_session(form_url, state_code, dist_code, court_code, fallback_csrf):
-    """Warm a session on the search form so the captcha binds to a real cookie.
+    """Pooled session warmed on the search form, so the captcha binds to a
+    real cookie, plus the csrf-magic token cached for it."""
+    session = acquire_hc_session(state_code, dist_code, court_code, form_url)
+    return session, session._warm_forms.get(form_url) or fallback_csrf
 
-    csrf-magic mints its token per session, so it has to be read off the form
-    rather than hardcoded.
-    """
-    session = requests.Session()
-    session.headers.update({"user-agent": USER_AGENT})
-    csrf = fallback_csrf
 
-    try:
-        page = session.get(
-            form_url,
-            params={
-                "state_cd": state_code,
-                "dist_cd": dist_code,
-                "court_code": court_code,
-            },
-            timeout=(30, 120),
-        ).text
-        match = CSRF_TOKEN_RE.search(page)
-        if match:
-            csrf = match.group(1)
-    except requests.exceptions.RequestException as exc:
-        print(f"[hc3] bulk session warm-up failed ({type(exc).__name__}); continuing")
-
-    return session, csrf
+@app.get("/hc3/pool")
+def hc_session_pool_status():
+    return JSONResponse(content=hc_pool_status())
 
 
 @app.post("/hc3/getcaseInfo")
@@ -1041,7 +1182,8 @@ def fetch_submit_hc_info(case_data: CaseRequest):
         "state_code": query.get("state_code"),
         "court_complex_code": query.get("court_complex_code")
     }
-    existing_case = collection.find_one(ac_query)
+    with stage("mongo_lookup"):
+        existing_case = collection.find_one(ac_query)
 
     if (
         existing_case
@@ -1053,8 +1195,9 @@ def fetch_submit_hc_info(case_data: CaseRequest):
 
     existing_case_id = existing_case["_id"] if existing_case else None
     dist_code = case_data.dist_code or "1"
-    session = open_hc_session(
+    session = acquire_hc_session(
         case_data.state_code, dist_code, case_data.court_complex_code)
+    discard = False
 
     try:
         page, record = load_case_history(
@@ -1081,7 +1224,9 @@ def fetch_submit_hc_info(case_data: CaseRequest):
             "est_code": case_data.est_code,
         }
 
-        result = parse_case_history(page, context, session=session)
+        result = parse_case_history(
+            page, context, session=session,
+            known_orders=stored_order_links(existing_case))
         result["_id"] = save_case(result, existing_case_id)
         return JSONResponse(content=result, status_code=200)
 
@@ -1091,15 +1236,17 @@ def fetch_submit_hc_info(case_data: CaseRequest):
             status_code=404
         )
     except HighCourtScrapeError as e:
+        discard = True
         return JSONResponse(content={"error": str(e)}, status_code=502)
     except Exception as e:
+        discard = True
         return JSONResponse(content={"error": str(e)}, status_code=500)
     finally:
-        session.close()
+        release_hc_session(session, discard)
 
 
 @app.post("/hc3/bulk_q/advname")
-def fetch_submit_adv_info(case_data: CaseAdvocateBulk):
+def fetch_submit_adv_info(case_data: CaseAdvocateBulk, stream: bool = False):
     session, csrf = open_bulk_session(
         ADVOCATE_FORM_URL,
         case_data.state_code,
@@ -1107,14 +1254,17 @@ def fetch_submit_adv_info(case_data: CaseAdvocateBulk):
         case_data.court_code,
         "sid:7567188e555e8f8123a017fcb8690f2099cd60c9",
     )
+    discard = False
     last_error = "Unable to get response from HC at this moment"
 
     try:
         for attempt in range(1, MAX_RETRIES + 1):
-            captcha_response = safe_get(session=session, url=CAPTCHA_URL)
-            image_base64 = base64.b64encode(captcha_response.content).decode("utf-8")
-            expression = solve_captcha(
-                lambda_client=lambda_client, image_base64=image_base64, frm="hc")
+            with stage("captcha"):
+                captcha_response = safe_get(session=session, url=CAPTCHA_URL)
+                image_base64 = base64.b64encode(captcha_response.content).decode("utf-8")
+                expression = solve_captcha(
+                    lambda_client=lambda_client, image_base64=image_base64, frm="hc",
+                    court="hc3")
             if not expression:
                 last_error = "Could not read the high court captcha"
                 continue
@@ -1132,10 +1282,12 @@ def fetch_submit_adv_info(case_data: CaseAdvocateBulk):
                 "captcha": str(expression),
             }
 
-            response = safe_post(
-                session, url=ADVOCATE_QRY_URL, data=payload, headers=HC_HEADERS)
+            with stage("search"):
+                response = safe_post(
+                    session, url=ADVOCATE_QRY_URL, data=payload, headers=HC_HEADERS)
             if response.status_code == 403:
                 last_error = "The high court site refused the request"
+                discard = True
                 continue
             if response.status_code != 200:
                 return JSONResponse(
@@ -1146,10 +1298,16 @@ def fetch_submit_adv_info(case_data: CaseAdvocateBulk):
             state, message = classify_bulk_response(response.text)
             if state == "retry":
                 last_error = message
+                record_captcha_verdict("hc3", "rejected")
                 print(f"[hc3] advname attempt {attempt}/{MAX_RETRIES}: {message}")
                 continue
+            record_captcha_verdict("hc3", "accepted")
+            record_captcha_search("hc3", attempt, solved=True)
             if state == "error":
                 return JSONResponse(content={"error": message}, status_code=400)
+            if stream:
+                rows = iter_case_data(case_data, response.text) if state != "empty" else ()
+                return ndjson_response(rows)
             if state == "empty":
                 return JSONResponse(content={"data": []}, status_code=200)
 
@@ -1158,17 +1316,19 @@ def fetch_submit_adv_info(case_data: CaseAdvocateBulk):
                 status_code=200
             )
 
+        record_captcha_search("hc3", MAX_RETRIES, solved=False)
         return JSONResponse(content={"error": last_error}, status_code=502)
 
     except Exception as e:
+        discard = True
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
     finally:
-        session.close()
+        release_hc_session(session, discard)
 
 
 @app.post("/hc3/bulk_q/partyname")
-def fetch_submit_party_info(case_data: CasePartyBulk):
+def fetch_submit_party_info(case_data: CasePartyBulk, stream: bool = False):
     session, csrf = open_bulk_session(
         PARTY_FORM_URL,
         case_data.state_code,
@@ -1176,14 +1336,17 @@ def fetch_submit_party_info(case_data: CasePartyBulk):
         case_data.court_code,
         "sid:23d31510c4c2834412b00b753ea0836fcf4f1ca8",
     )
+    discard = False
     last_error = "Unable to get response from Ecourts at this moment"
 
     try:
         for attempt in range(1, MAX_RETRIES + 1):
-            captcha_response = safe_get(session=session, url=CAPTCHA_URL)
-            image_base64 = base64.b64encode(captcha_response.content).decode("utf-8")
-            expression = solve_captcha(
-                lambda_client=lambda_client, image_base64=image_base64, frm="hc")
+            with stage("captcha"):
+                captcha_response = safe_get(session=session, url=CAPTCHA_URL)
+                image_base64 = base64.b64encode(captcha_response.content).decode("utf-8")
+                expression = solve_captcha(
+                    lambda_client=lambda_client, image_base64=image_base64, frm="hc",
+                    court="hc3")
             if not expression:
                 last_error = "Could not read the high court captcha"
                 continue
@@ -1200,10 +1363,12 @@ def fetch_submit_party_info(case_data: CasePartyBulk):
                 "captcha": str(expression),
             }
 
-            response = safe_post(
-                session, url=PARTY_QRY_URL, data=payload, headers=HC_HEADERS)
+            with stage("search"):
+                response = safe_post(
+                    session, url=PARTY_QRY_URL, data=payload, headers=HC_HEADERS)
             if response.status_code == 403:
                 last_error = "The high court site refused the request"
+                discard = True
                 continue
             if response.status_code != 200:
                 return JSONResponse(
@@ -1214,10 +1379,16 @@ def fetch_submit_party_info(case_data: CasePartyBulk):
             state, message = classify_bulk_response(response.text)
             if state == "retry":
                 last_error = message
+                record_captcha_verdict("hc3", "rejected")
                 print(f"[hc3] partyname attempt {attempt}/{MAX_RETRIES}: {message}")
                 continue
+            record_captcha_verdict("hc3", "accepted")
+            record_captcha_search("hc3", attempt, solved=True)
             if state == "error":
                 return JSONResponse(content={"error": message}, status_code=400)
+            if stream:
+                rows = iter_case_data(case_data, response.text) if state != "empty" else ()
+                return ndjson_response(rows)
             if state == "empty":
                 return JSONResponse(content={"data": []}, status_code=200)
 
@@ -1226,13 +1397,15 @@ def fetch_submit_party_info(case_data: CasePartyBulk):
                 status_code=200
             )
 
+        record_captcha_search("hc3", MAX_RETRIES, solved=False)
         return JSONResponse(content={"error": last_error}, status_code=502)
 
     except Exception as e:
+        discard = True
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
     finally:
-        session.close()
+        release_hc_session(session, discard)
 
 
 @app.post("/hc3/bulk_i")
@@ -1241,7 +1414,8 @@ def fetch_submit_hc_bulk_ingest(case_data: CaseRequestBulkIngest):
         "courtType": "highcourt",
         "cino": case_data.cino,
     }
-    existing_case = collection.find_one(ac_query)
+    with stage("mongo_lookup"):
+        existing_case = collection.find_one(ac_query)
 
     if (
         existing_case
@@ -1267,7 +1441,8 @@ def fetch_submit_hc_bulk_ingest(case_data: CaseRequestBulkIngest):
 
     court_code = case_data.court_complex_code or case_data.court_code
     dist_code = case_data.dist_code or "1"
-    session = open_hc_session(case_data.state_code, dist_code, court_code)
+    session = acquire_hc_session(case_data.state_code, dist_code, court_code)
+    discard = False
 
     try:
         page, record = load_case_history(
@@ -1296,7 +1471,9 @@ def fetch_submit_hc_bulk_ingest(case_data: CaseRequestBulkIngest):
             "est_code": None,
         }
 
-        result = parse_case_history(page, context, session=session)
+        result = parse_case_history(
+            page, context, session=session,
+            known_orders=stored_order_links(existing_case))
 
         print(
             f"[hc3/bulk_i] cino={case_data.cino} "
@@ -1323,8 +1500,10 @@ def fetch_submit_hc_bulk_ingest(case_data: CaseRequestBulkIngest):
     except HighCourtCaseNotFound as e:
         return JSONResponse(content={"error": str(e)}, status_code=404)
     except HighCourtScrapeError as e:
+        discard = True
         return JSONResponse(content={"error": str(e)}, status_code=502)
     except Exception as e:
+        discard = True
         return JSONResponse(content={"error": str(e)}, status_code=500)
     finally:
-        session.close()
+        release_hc_session(session, discard)
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+
+from api.v1 import districtcourt, hc2, hc3, sci
+from core import jobs
+
+app = APIRouter()
+
+JOB_WORKERS_ENABLED = os.getenv("JOBS_WORKERS", "1") == "1"
+
+# Per-process caps. DC defaults to the eCourts pool size so queued ingests
+# never wait on a session the pool can't hand out.
+JOB_CONCURRENCY = {
+    "dc": int(os.getenv("JOBS_CONCURRENCY_DC", str(districtcourt.POOL_SIZE))),
+    "hc3": int(os.getenv("JOBS_CONCURRENCY_HC3", "2")),
+    "hc2": int(os.getenv("JOBS_CONCURRENCY_HC2", "2")),
+    "sci": int(os.getenv("JOBS_CONCURRENCY_SCI", "1")),
+}
+
+
+def route_endpoint(router, path):
+    for route in router.routes:
+        if getattr(route, "path", None) == path:
+            return route.endpoint
+    raise LookupError(f"no route {path}")
+
+
+# court -> job route -> (request model, the endpoint that scrapes one case).
+# bulk_i ingests by cino; getcaseInfo by case number, for lookups that miss.
+INGEST_ROUTES = {
+    "dc": {
+        "bulk_i": (districtcourt.CaseRequestBulkIngest,
+                   route_endpoint(districtcourt.app, "/dc/bulk_i/partyname")),
+        "getcaseInfo": (districtcourt.CaseRequest,
+                        route_endpoint(districtcourt.app, "/getcaseInfo")),
+    },
+    "hc3": {
+        "bulk_i": (hc3.CaseRequestBulkIngest, route_endpoint(hc3.app, "/hc3/bulk_i")),
+        "getcaseInfo": (hc3.CaseRequest, route_endpoint(hc3.app, "/hc3/getcaseInfo")),
+    },
+    "hc2": {
+        "bulk_i": (hc2.CaseRequestBulkIngest, route_endpoint(hc2.app, "/hc2/bulk_i")),
+    },
+    "sci": {
+        "getcaseInfo": (sci.CaseRequest, route_endpoint(sci.app, "/sci/getcaseInfo")),
+    },
+}
+BULK_INGEST_COURTS = sorted(c for c, routes in INGEST_ROUTES.items() if "bulk_i" in routes)
+
+
+def ingest_handler(model, endpoint):
+    """Run a scrape route for one queued payload, exactly as an HTTP call
+    would, and hand back (status_code, decoded body)."""
+
+    async def handle(payload):
+        request = model(**payload)
+        if asyncio.iscoroutinefunction(endpoint):
+            response = await endpoint(request)
+        else:
+            response = await asyncio.to_thread(endpoint, request)
+        return response.status_code, json.loads(response.body)
+
+    return handle
+
+
+workers = jobs.JobWorkers(
+    {
+        court: {name: ingest_handler(*route) for name, route in routes.items()}
+        for court, routes in INGEST_ROUTES.items()
+    },
+    JOB_CONCURRENCY,
+)
+
+
+def start_job_workers():
+    if JOB_WORKERS_ENABLED:
+        workers.start()
+
+
+async def stop_job_workers():
+    await workers.stop()
+
+
+class IngestJobRequest(BaseModel):
+    court: str
+    cases: List[Dict[str, Any]]
+
+
+@app.post("/jobs/bulk_i")
+async def submit_ingest_job(job: IngestJobRequest):
+    if job.court not in BULK_INGEST_COURTS:
+        return JSONResponse(
+            content={"error": f"court must be one of {', '.join(BULK_INGEST_COURTS)}"},
+            status_code=400
+        )
+
+    model = INGEST_ROUTES[job.court]["bulk_i"][0]
+    cases = []
+    for index, case in enumerate(job.cases):
+        try:
+            cases.append(model(**case).dict())
+        except ValidationError as exc:
+            return JSONResponse(
+                content={"error": f"case {index} is invalid", "detail": json.loads(exc.json())},
+                status_code=422
+            )
+
+    job_id = await asyncio.to_thread(jobs.submit_batch, job.court, cases)
+    return JSONResponse(
+        content={"job_id": job_id, "court": job.court, "total": len(cases)},
+        status_code=202
+    )
+
+
+@app.get("/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    progress = await asyncio.to_thread(jobs.job_progress, job_id)
+    if progress is None:
+        return JSONResponse(content={"error": "job not found"}, status_code=404)
+    return progress
+
+
+@app.get("/jobs/{job_id}/items")
+async def get_ingest_job_items(job_id: str, status: Optional[str] = None,
+                               skip: int = 0, limit: int = 100):
+    items = await asyncio.to_thread(
+        jobs.list_job_items, job_id, status, max(skip, 0), min(max(limit, 1), 1000))
+    return {"job_id": job_id, "items": items}
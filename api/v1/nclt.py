@@ -7,6 +7,9 @@ from typing import Optional
 from dotenv import load_dotenv
 from core.database import collection
 from core.s3_client import s3_client
+from helpers.orders import OrderKeyIndex, record_order_outcomes
+from helpers.rate_limit import limiter_for
+from helpers.timing import stage, timed
 from botocore.exceptions import ClientError
 import os
 
@@ -24,19 +27,28 @@ class CaseRequest(BaseModel):
     court_complex_code: str
     est_code: Optional[str] = None
 
-def stream_upload_order_nclt(enc_path: str, filing_no: str, order_number: str):
+def nclt_order_index(filing_no: str):
+    return OrderKeyIndex(s3_client, BUCKET_NAME, f"case_data/orders/{filing_no}/")
+
+
+@timed("orders")
+def stream_upload_order_nclt(enc_path: str, filing_no: str, order_number: str,
+                             stored_keys: Optional[OrderKeyIndex] = None):
     if not enc_path:
         return None
     final_pdf_url = f"https://efiling.nclt.gov.in/ordersview.drt?path={enc_path}"
     s3_folder_path = f"case_data/orders/{filing_no}/"
     s3_file_path = f"{s3_folder_path}{filing_no}-{order_number}.pdf"
+    stored_keys = stored_keys or nclt_order_index(filing_no)
     try:
-        s3_client.head_object(Bucket=BUCKET_NAME, Key=s3_file_path)
-        return f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{s3_file_path}"
-    except ClientError as e:
-        if e.response["Error"]["Code"] != "404":
-            return None
+        if stored_keys.has(s3_file_path):
+            return f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{s3_file_path}"
+    except ClientError:
+        return None
+    limiter = limiter_for(final_pdf_url)
+    limiter.wait()
     with requests.get(final_pdf_url, stream=True) as response:
+        limiter.record(response.status_code)
         if response.status_code == 200:
             s3_client.upload_fileobj(
                 response.raw,
@@ -51,6 +63,52 @@ def stream_upload_order_nclt(enc_path: str, filing_no: str, order_number: str):
             return f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{s3_file_path}"
         return None
 
+def transform_case_data(query: dict, case_json: dict, details_json: dict, fetch_orders: bool = True):
+    main_panel = case_json['mainpanellist'][0]
+    filing_no = main_panel['filing_no']
+    cino = main_panel['case_no']
+    case_history = []
+    orders = []
+    stored_keys = nclt_order_index(filing_no) if fetch_orders else None
+    for idx, entry in enumerate(details_json.get("allproceedingdtls", []), start=1):
+        case_history.append({
+            "judge": entry.get("bench_location_name") or "Unknown Bench",
+            "businessOnDate": entry.get("listing_date") or None,
+            "hearingDate": entry.get("next_list_date") or None,
+            "purpose": entry.get("purpose") or None,
+            "inputType": "automatic",
+            "lawyerRemark": "null"
+        })
+        order_link = stream_upload_order_nclt(
+            entry.get("encPath"), filing_no, str(idx), stored_keys) if fetch_orders else None
+        orders.append({
+            "order_number": str(idx),
+            "order_date": entry.get("order_upload_date"),
+            "order_link": order_link
+        })
+    if fetch_orders:
+        record_order_outcomes("nclt", orders)
+    return {
+        "est_code": query.get("est_code"),
+        "cino": cino,
+        "state_code": query.get("state_code"),
+        "court_complex_code": query.get("court_complex_code"),
+        "rgyear": query.get("rgyear"),
+        "case_type": query.get("case_type"),
+        "dist_code": query.get("dist_code"),
+        "CNRNumber": cino,
+        "CaseStatus": details_json.get('isregistered', [{}])[0].get('status'),
+        "CaseType": main_panel['case_type_desc_cis'],
+        "FilingNumber": filing_no,
+        "FirstHearingDate": details_json.get('allfinalstatuslist', [{}])[0].get('listing_date'),
+        "RegistrationNumber": filing_no,
+        "case_history": case_history,
+        "orders": orders,
+        "petitioner_and_advocate": [details_json.get('partydetailslist', [{}])[0].get('party_name')],
+        "respondent_and_advocate": [details_json.get('partydetailslist', [{}, {}])[1].get('party_name')]
+    }
+
+
 @app.post("/nclt/getcaseInfo")
 def fetch_submit_hc_info(case_data: CaseRequest):
     session = requests.Session()
@@ -64,7 +122,8 @@ def fetch_submit_hc_info(case_data: CaseRequest):
         "dist_code": query.get("dist_code"),
         "court_complex_code": query.get("court_complex_code")
     }
-    existing_case = collection.find_one(ac_query)
+    with stage("mongo_lookup"):
+        existing_case = collection.find_one(ac_query)
     if existing_case:
         existing_case["_id"] = str(existing_case["_id"])
         existing_id = str(existing_case["_id"]) if existing_case else None
@@ -97,48 +156,21 @@ def fetch_submit_hc_info(case_data: CaseRequest):
             'Content-Type': 'application/json',
             'Cookie': 'SERVERID=efiling2-248'
         }
-        response = session.post("https://efiling.nclt.gov.in/caseHistoryoptional.drt", headers=headers, data=payload)
-        filing_no = response.json()['mainpanellist'][0]['filing_no']
-        cino = response.json()['mainpanellist'][0]['case_no']
-        response_additional = session.get(
-            f"https://efiling.nclt.gov.in/caseHistoryalldetails.drt?filing_no={filing_no}&flagIA=false", headers=headers)
-        case_history = []
-        orders = []
-        for idx, entry in enumerate(response_additional.json().get("allproceedingdtls", []), start=1):
-            case_history.append({
-                "judge": entry.get("bench_location_name") or "Unknown Bench",
-                "businessOnDate": entry.get("listing_date") or None,
-                "hearingDate": entry.get("next_list_date") or None,
-                "purpose": entry.get("purpose") or None,
-                "inputType": "automatic",
-                "lawyerRemark": "null"
-            })
-            order_link = stream_upload_order_nclt(entry.get("encPath"), filing_no, str(idx))
-            orders.append({
-                "order_number": str(idx),
-                "order_date": entry.get("order_upload_date"),
-                "order_link": order_link
-            })
-        final_response = {
-            "est_code": query.get("est_code"),
-            "cino": cino,
-            "state_code": query.get("state_code"),
-            "court_complex_code": query.get("court_complex_code"),
-            "rgyear": query.get("rgyear"),
-            "case_type": query.get("case_type"),
-            "dist_code": query.get("dist_code"),
-            "CNRNumber": cino,
-            "CaseStatus": response_additional.json().get('isregistered', [{}])[0].get('status'),
-            "CaseType": response.json()['mainpanellist'][0]['case_type_desc_cis'],
-            "FilingNumber": filing_no,
-            "FirstHearingDate": response_additional.json().get('allfinalstatuslist', [{}])[0].get('listing_date'),
-            "RegistrationNumber": filing_no,
-            "case_history": case_history,
-            "orders": orders,
-            "petitioner_and_advocate": [response_additional.json().get('partydetailslist', [{}])[0].get('party_name')],
-            "respondent_and_advocate": [response_additional.json().get('partydetailslist', [{}, {}])[1].get('party_name')]
-        }
-        result = collection.update_one(ac_query, {"$set": final_response}, upsert=True)
+        limiter = limiter_for("https://efiling.nclt.gov.in/")
+        limiter.wait()
+        with stage("search"):
+            response = session.post("https://efiling.nclt.gov.in/caseHistoryoptional.drt", headers=headers, data=payload)
+        limiter.record(response.status_code)
+        case_json = response.json()
+        filing_no = case_json['mainpanellist'][0]['filing_no']
+        limiter.wait()
+        with stage("history"):
+            response_additional = session.get(
+                f"https://efiling.nclt.gov.in/caseHistoryalldetails.drt?filing_no={filing_no}&flagIA=false", headers=headers)
+        limiter.record(response_additional.status_code)
+        final_response = transform_case_data(query, case_json, response_additional.json())
+        with stage("mongo_save"):
+            result = collection.update_one(ac_query, {"$set": final_response}, upsert=True)
         if result.upserted_id:
             final_response["_id"] = str(result.upserted_id)
         else:
@@ -0,0 +1,98 @@
+import asyncio
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from api.v1 import districtcourt, hc3, sci
+from api.v1.cases import enqueue_misses, partition_cases
+from api.v1.jobs import ingest_handler, route_endpoint
+
+app = APIRouter()
+
+
+def _dc_identity(row, case_data):
+    # eCourts leaves some viewHistory args blank; the search's own codes
+    # are the same court the row came from.
+    return {
+        "court": "dc",
+        "cino": row.get("cino"),
+        "case_no": row.get("case_no") or "",
+        "court_code": row.get("court_code") or "",
+        "state_code": row.get("state_code") or case_data.state_code,
+        "dist_code": row.get("dist_code") or case_data.dist_code,
+        "court_complex_code": row.get("court_complex_code") or case_data.court_complex_code,
+        "est_code": row.get("est_code"),
+        "rgyear": row.get("rgyear") or "",
+        "courtType": "distcourts",
+    }
+
+
+def _hc3_identity(row, case_data):
+    # hc3 bulk_i derives type/number/year from the 15-digit case_no itself
+    return {
+        "court": "hc3",
+        "cino": row.get("cino"),
+        "case_no": row.get("case_no") or "",
+        "court_code": row.get("court_code") or "",
+        "state_code": row.get("state_code") or "",
+        "dist_code": row.get("dist_code") or "",
+        "court_complex_code": row.get("court_code") or "",
+        "rgyear": row.get("rgyear") or "",
+        "courtType": "highcourt",
+    }
+
+
+def _sci_identity(row, case_data):
+    return {
+        "court": "sci",
+        "case_no": row.get("diary_number"),
+        "rgyear": row.get("year") or "",
+    }
+
+
+# pipeline path -> (bulk query router, its path, the request model, row -> identity)
+PIPELINES = {
+    "/pipeline/dc/bulk_q/partyname": (
+        districtcourt.app, "/dc/bulk_q/partyname", districtcourt.CaseRequestBulk, _dc_identity),
+    "/pipeline/hc3/bulk_q/advname": (
+        hc3.app, "/hc3/bulk_q/advname", hc3.CaseAdvocateBulk, _hc3_identity),
+    "/pipeline/hc3/bulk_q/partyname": (
+        hc3.app, "/hc3/bulk_q/partyname", hc3.CasePartyBulk, _hc3_identity),
+    "/pipeline/sci/bulk_q/aor": (
+        sci.app, "/sci/bulk_q/aor", sci.CaseRequestAOR, _sci_identity),
+    "/pipeline/sci/bulk_q/party_name": (
+        sci.app, "/sci/bulk_q/party_name", sci.CaseRequestPartyName, _sci_identity),
+}
+
+
+def pipeline_route(router, path, model, identity):
+    """Run the bulk query, then feed every case it found into ingestion:
+    cases already fresh in Mongo are skipped with one query, the rest are
+    queued for the job workers, which scrape on the court's warm sessions."""
+    run_query = ingest_handler(model, route_endpoint(router, path))
+
+    async def pipeline(case_data: model):
+        status_code, body = await run_query(case_data.dict())
+        if status_code != 200:
+            return JSONResponse(content=body, status_code=status_code)
+
+        rows = body.get("data") or []
+        hits, misses, invalid, to_queue = await asyncio.to_thread(
+            partition_cases, [identity(row, case_data) for row in rows])
+        queued = await asyncio.to_thread(enqueue_misses, to_queue)
+
+        return {
+            **body,
+            "ingest": {
+                "fresh": len(hits),
+                "queued": len(misses),
+                "invalid": invalid,
+                "jobs": queued,
+            },
+        }
+
+    return pipeline
+
+
+for _path, (_router, _query_path, _model, _identity) in PIPELINES.items():
+    app.post(_path)(pipeline_route(_router, _query_path, _model, _identity))
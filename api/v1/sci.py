@@ -4,6 +4,7 @@ import random
 import string
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Optional
 import requests
 from bs4 import BeautifulSoup
@@ -12,15 +13,26 @@ from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 import re
 from pydantic import BaseModel, field_validator
-from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
 from core.s3_client import s3_client
 from core.database import collection, save_case
 from core.lambda_client import lambda_client
-from helpers.solve_captcha import solve_captcha
+from helpers.solve_captcha import (
+    record_captcha_search,
+    record_captcha_verdict,
+    solve_captcha,
+)
 from helpers.requests import safe_get, safe_post
-from helpers.orders import order_pdf_s3_key, stable_order_doc_id
+from helpers.timing import stage, timed
+from helpers.ndjson import ndjson_response, peek_rows
+from helpers.orders import (
+    OrderKeyIndex,
+    order_pdf_s3_key,
+    record_order_outcomes,
+    stable_order_doc_id,
+    stored_order_links,
+)
 
 load_dotenv()
 
@@ -35,10 +47,6 @@ PARTY_NAME_FORM_URL = "https://www.sci.gov.in/case-status-party-name/"
 PARTY_NAME_FORM_ID = "sciapi-services-case-status-party-name"
 PARTY_NAME_ACTION = "get_case_status_party_name"
 
-client = MongoClient(os.getenv("MONGOCLIENT"))
-db = client["gylscrdata"]
-collection = db["casedetails"]
-
 BUCKET_NAME = os.getenv("BUCKET_NAME")
 REGION_NAME = os.getenv("REGION_NAME")
 
@@ -50,6 +58,17 @@ MAX_CAPTCHA_READS = 12
 FORM_CACHE_TTL = 6 * 60 * 60
 NONCE_FAILURE = "Nonce Verification Failed"
 
+# Case tabs in flight against sci.gov.in from this worker. The executor is
+# shared by every request, so its size is the cap.
+SCI_TAB_CONCURRENCY = int(os.getenv("SCI_TAB_CONCURRENCY", "4"))
+_tab_fetches = ThreadPoolExecutor(
+    max_workers=SCI_TAB_CONCURRENCY, thread_name_prefix="sci-tab")
+
+CASE_TAB_HEADERS = {
+    'referer': 'https://www.sci.gov.in/case-status-case-no/',
+    'x-requested-with': 'XMLHttpRequest'
+}
+
 
 def build_case_base_path(case_data: dict):
     return (
@@ -68,6 +87,7 @@ def build_orders_prefix(metadata: dict):
 def build_case_json_key(metadata: dict):
     return build_case_base_path(metadata) + "metadata.json"
 
+@timed("s3_metadata")
 def upload_case_json_to_s3(
     s3_client,
     bucket_name,
@@ -88,10 +108,9 @@ def upload_case_json_to_s3(
 
     return f"s3://{bucket_name}/{key}"
 
-def extract_case_data(html_content: str, case_status: str):
+def iter_case_data(html_content: str, case_status: str):
 
     soup = BeautifulSoup(html_content, "html.parser")
-    results = []
 
     rows = soup.select("table tbody tr")
 
@@ -104,24 +123,25 @@ def extract_case_data(html_content: str, case_status: str):
         petitioner = row.select_one("td.petitioners")
         respondent = row.select_one("td.respondents")
 
-        results.append({
+        yield {
             "diary_number": diary_no,
             "year": diary_year,
             "case_status": case_status,
             "petitioner_name": petitioner.get_text(strip=True) if petitioner else None,
             "respondent_name": respondent.get_text(strip=True) if respondent else None
-        })
+        }
+
 
-    return results
+def extract_case_data(html_content: str, case_status: str):
+    return list(iter_case_data(html_content, case_status))
 
 
 def cell_text(cells, index):
     return clean_text(cells[index].get_text(" ")) if len(cells) > index else None
 
 
-def extract_party_name_data(html_content, party_status):
+def iter_party_name_data(html_content, party_status):
     soup = BeautifulSoup(html_content or "", "html.parser")
-    results = []
 
     for row in soup.select("table tbody tr"):
         diary_no = row.get("data-diary-no")
@@ -133,7 +153,7 @@ def extract_party_name_data(html_content, party_status):
         respondent = row.select_one("td.respondents")
         link = row.select_one("a[href]")
 
-        results.append({
+        yield {
             "diary_number": diary_no,
             "year": row.get("data-diary-year"),
             "case_number": cell_text(cells, 2),
@@ -145,9 +165,11 @@ def extract_party_name_data(html_content, party_status):
             "details_link": (
                 "https://www.sci.gov.in/" + link["href"] if link else None
             ),
-        })
+        }
 
-    return results
+
+def extract_party_name_data(html_content, party_status):
+    return list(iter_party_name_data(html_content, party_status))
 
 
 _form_cache = {}
@@ -191,6 +213,7 @@ def results_html(data_value):
     return data_value if isinstance(data_value, str) else ""
 
 
+@timed("form")
 def scrape_form_fields(session, form_url, form_id):
     response = safe_get(session, form_url)
     form = BeautifulSoup(response.text, "html.parser").select_one("#" + form_id)
@@ -219,23 +242,27 @@ def get_form_fields(session, form_url, form_id, force_refresh=False):
 def submit_sci_form(session, form_url, form_id, action, fields):
     force_refresh = False
     submissions = 0
+    reads = 0
 
-    for _ in range(MAX_CAPTCHA_READS):
+    for reads in range(1, MAX_CAPTCHA_READS + 1):
         if submissions >= MAX_RETRIES:
+            reads -= 1
             break
 
         payload = get_form_fields(session, form_url, form_id, force_refresh=force_refresh)
         force_refresh = False
         payload["scid"] = generate_scid()
 
-        captcha_response = safe_get(
-            session=session,
-            url=CAPTCHA_IMAGE_URL + payload["scid"]
-        )
-        image_base64 = base64.b64encode(captcha_response.content).decode("utf-8")
-        expression = solve_captcha(
-            lambda_client=lambda_client, image_base64=image_base64, frm="sci"
-        )
+        with stage("captcha"):
+            captcha_response = safe_get(
+                session=session,
+                url=CAPTCHA_IMAGE_URL + payload["scid"]
+            )
+            image_base64 = base64.b64encode(captcha_response.content).decode("utf-8")
+            expression = solve_captcha(
+                lambda_client=lambda_client, image_base64=image_base64, frm="sci",
+                court="sci"
+            )
 
         result_captcha = evaluate_captcha(expression)
         if result_captcha is None:
@@ -256,16 +283,23 @@ def submit_sci_form(session, form_url, form_id, action, fields):
             "x-requested-with": "XMLHttpRequest"
         }
 
-        response = safe_post(session, BASE_URL, data=payload, headers=headers)
+        with stage("search"):
+            response = safe_post(session, BASE_URL, data=payload, headers=headers)
         response_json = response.json()
 
         if response_json.get("success") is False:
             if NONCE_FAILURE in str(response_json.get("data", "")):
                 force_refresh = True
+                record_captcha_verdict("sci", "nonce_failed", frm="sci")
+            else:
+                record_captcha_verdict("sci", "rejected", frm="sci")
             continue
 
+        record_captcha_verdict("sci", "accepted", frm="sci")
+        record_captcha_search("sci", reads, solved=True)
         return response_json
 
+    record_captcha_search("sci", reads, solved=False)
     return None
 
 
@@ -383,6 +417,7 @@ def extract_table_with_headers(soup, className=None, headers=None):
     return extracted_data
 
 
+@timed("parse")
 def parse_case_history(html, data):
 
     soup = BeautifulSoup(html, "html.parser")
@@ -428,6 +463,87 @@ def parse_case_history(html, data):
     return result
 
 
+def fetch_case_tab(session, case_data, tab_name=None):
+    params = {
+        'diary_no': case_data.case_no,
+        'diary_year': case_data.rgyear,
+        'action': "get_case_details",
+        'es_ajax_request': '1',
+        'language': 'en'
+    }
+    if tab_name:
+        params['tab_name'] = tab_name
+    response = safe_get(session, BASE_URL, params=params, headers=CASE_TAB_HEADERS)
+    return response.json().get("data")
+
+
+def parse_listing_dates(listing_html):
+    case_history = []
+    if not listing_html:
+        return case_history
+
+    listing_soup = BeautifulSoup(listing_html, "html.parser")
+    rows = listing_soup.find_all("tr")[2:]
+    for row in rows:
+        cols = [clean_text(td.get_text()) for td in row.find_all("td")]
+        if len(cols) >= 8:
+            case_history.append({
+                "judge": cols[5] if len(cols) > 5 else "",
+                "businessOnDate": cols[0],
+                "hearingDate": cols[0],
+                "purpose": cols[3],
+                "inputType": "automatic",
+                "lawyerRemark": cols[7] if len(cols) > 7 else "null"
+            })
+    return case_history
+
+
+def parse_order_links(order_html):
+    """(order_date, pdf url) for every link on the judgement_orders tab."""
+    if not order_html:
+        return []
+    order_soup = BeautifulSoup(order_html, "html.parser")
+    return [(clean_text(a.text), a["href"]) for a in order_soup.find_all("a", href=True)]
+
+
+def fetch_case_tab_alone(headers, cookies, case_data, tab_name, parse):
+    """Fetch and parse one tab on a session of its own - a requests.Session
+    is not safe to share between threads."""
+    with requests.Session() as tab_session:
+        tab_session.headers.update(headers)
+        tab_session.cookies.update(cookies)
+        return parse(fetch_case_tab(tab_session, case_data, tab_name))
+
+
+def is_missing_case(data_value):
+    return not data_value or "No records found" in str(data_value)
+
+
+@timed("history")
+def fetch_case_tabs(session, case_data):
+    """The details tab, then the listing_dates and judgement_orders tabs side
+    by side, each parsed in its fetch thread as it lands.
+
+    A case SCI does not know is answered from the details tab alone. The list
+    tabs go out with the cookies the details tab left on `session`, as they
+    did when all three shared it."""
+    data_value = fetch_case_tab(session, case_data)
+    if is_missing_case(data_value):
+        return data_value, [], []
+
+    # copied here, while no other thread touches the jar; one copy per tab
+    headers = dict(session.headers)
+    listings = _tab_fetches.submit(
+        fetch_case_tab_alone, headers, session.cookies.copy(), case_data,
+        "listing_dates", parse_listing_dates)
+    order_links = _tab_fetches.submit(
+        fetch_case_tab_alone, headers, session.cookies.copy(), case_data,
+        "judgement_orders", parse_order_links)
+
+    wait((listings, order_links))
+    return data_value, listings.result(), order_links.result()
+
+
 @app.post("/sci/getcaseInfo")
 def fetch_submit_info(case_data: CaseRequest):
     query = case_data.dict()
@@ -439,7 +555,8 @@ def fetch_submit_info(case_data: CaseRequest):
         "rgyear": query.get("rgyear")
     }
     print(ac_query)
-    existing_case = collection.find_one(ac_query)
+    with stage("mongo_lookup"):
+        existing_case = collection.find_one(ac_query)
 
     if existing_case and case_data.refresh == 0:
         existing_case["_id"] = str(existing_case["_id"])
@@ -449,66 +566,16 @@ def fetch_submit_info(case_data: CaseRequest):
 
     session = requests.Session()
     try:
-        payload = {
-            'diary_no': case_data.case_no,
-            'diary_year': case_data.rgyear,
-            'action': "get_case_details",
-            'es_ajax_request': '1',
-            'language': 'en'
-        }
-        headers = {
-            'referer': 'https://www.sci.gov.in/case-status-case-no/',
-            'x-requested-with': 'XMLHttpRequest'
-        }
-
-        response = safe_get(session, BASE_URL, params=payload, headers=headers)
-        response_json = response.json()
-        data_value = response_json.get("data")
-        if not data_value or "No records found" in str(data_value):
+        data_value, case_history, order_links = fetch_case_tabs(session, case_data)
+        if is_missing_case(data_value):
             return JSONResponse(content={"error": "Invalid Case Details"}, status_code=404)
 
-        listing_response = safe_get(session, BASE_URL, params={
-            'diary_no': case_data.case_no,
-            'diary_year': case_data.rgyear,
-            'tab_name': "listing_dates",
-            'action': "get_case_details",
-            'es_ajax_request': '1',
-            'language': 'en'
-        }, headers=headers)
-        listing_html = listing_response.json().get("data", "")
-
-        order_response = safe_get(session, BASE_URL, params={
-            'diary_no': case_data.case_no,
-            'diary_year': case_data.rgyear,
-            'tab_name': "judgement_orders",
-            'action': "get_case_details",
-            'es_ajax_request': '1',
-            'language': 'en'
-        }, headers=headers)
-        order_html = order_response.json().get("data", "")
-
         result = parse_case_history(data_value, case_data)
-
-        case_history = []
-        if listing_html:
-            listing_soup = BeautifulSoup(listing_html, "html.parser")
-            rows = listing_soup.find_all("tr")[2:]
-            for row in rows:
-                cols = [clean_text(td.get_text()) for td in row.find_all("td")]
-                if len(cols) >= 8:
-                    case_history.append({
-                        "judge": cols[5] if len(cols) > 5 else "",
-                        "businessOnDate": cols[0],
-                        "hearingDate": cols[0],
-                        "purpose": cols[3],
-                        "inputType": "automatic",
-                        "lawyerRemark": cols[7] if len(cols) > 7 else "null"
-                    })
         result["case_history"] = case_history
 
         print(
             f"[sci/getcaseInfo] case_no={case_data.case_no}/{case_data.rgyear} "
-            f"listing_html_len={len(listing_html or '')} history_rows={len(case_history)} "
+            f"history_rows={len(case_history)} orders={len(order_links)} "
             f"sample_dates={[h.get('hearingDate') for h in case_history[:3]]}"
         )
 
@@ -518,25 +585,22 @@ def fetch_submit_info(case_data: CaseRequest):
         )
         result["s3_prefix"] = case_json_s3_path
 
-        orders = []
-        seen_doc_ids = set()
-        if order_html:
-            order_soup = BeautifulSoup(order_html, "html.parser")
-            links = order_soup.find_all("a", href=True)
-            for a in links:
-                order_date = clean_text(a.text)
-                final_pdf_url = a["href"]
+        with stage("orders"):
+            orders = []
+            seen_doc_ids = set()
+            stored_keys = OrderKeyIndex(s3_client, BUCKET_NAME, orders_prefix)
+            known_orders = stored_order_links(existing_case)
+            for order_date, final_pdf_url in order_links:
                 source_ref = final_pdf_url.split("?")[0]
                 doc_id = stable_order_doc_id(source_ref)
                 if doc_id in seen_doc_ids:
                     continue
                 seen_doc_ids.add(doc_id)
                 s3_key = order_pdf_s3_key(orders_prefix, order_date, source_ref)
+                s3_url = known_orders.get(doc_id) or (
+                    f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{s3_key}")
                 try:
-                    s3_client.head_object(Bucket=BUCKET_NAME, Key=s3_key)
-                    s3_url = f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{s3_key}"
-                except s3_client.exceptions.ClientError as e:
-                    if e.response['Error']['Code'] == "404":
+                    if doc_id not in known_orders and not stored_keys.has(s3_key):
                         response_pdf = session.get(final_pdf_url, stream=True)
                         if response_pdf.status_code == 200:
                             s3_client.upload_fileobj(
@@ -548,16 +612,16 @@ def fetch_submit_info(case_data: CaseRequest):
                                     'ContentDisposition': 'inline'
                                 }
                             )
-                            s3_url = f"https://{BUCKET_NAME}.s3.{REGION_NAME}.amazonaws.com/{s3_key}"
                         else:
                             s3_url = None
-                    else:
-                        s3_url = None
+                except s3_client.exceptions.ClientError:
+                    s3_url = None
                 orders.append({
                     "order_number": str(len(orders) + 1),
                     "order_date": order_date,
                     "order_link": s3_url
                 })
+        record_order_outcomes("sci", orders)
         result["orders"] = orders
         result["_id"] = save_case(result, existing_case_id)
         return JSONResponse(content=result, status_code=200)
@@ -568,7 +632,7 @@ def fetch_submit_info(case_data: CaseRequest):
 
 
 @app.post("/sci/bulk_q/aor")
-def fetch_aor_info(case_data: CaseRequestAOR):
+def fetch_aor_info(case_data: CaseRequestAOR, stream: bool = False):
     session = requests.Session()
 
     try:
@@ -598,6 +662,15 @@ def fetch_aor_info(case_data: CaseRequestAOR):
                 status_code=404
             )
 
+        if stream:
+            rows = peek_rows(iter_case_data(results_html(data_value), case_data.case_status))
+            if rows is None:
+                return JSONResponse(
+                    content={"error": "No cases found for this AOR code"},
+                    status_code=404
+                )
+            return ndjson_response(rows)
+
         cases = extract_case_data(results_html(data_value), case_data.case_status)
         if not cases:
             return JSONResponse(
@@ -619,7 +692,7 @@ def fetch_aor_info(case_data: CaseRequestAOR):
 
 
 @app.post("/sci/bulk_q/party_name")
-def fetch_party_name_info(case_data: CaseRequestPartyName):
+def fetch_party_name_info(case_data: CaseRequestPartyName, stream: bool = False):
     session = requests.Session()
 
     try:
@@ -649,6 +722,16 @@ def fetch_party_name_info(case_data: CaseRequestPartyName):
                 status_code=404
             )
 
+        if stream:
+            rows = peek_rows(
+                iter_party_name_data(results_html(data_value), case_data.party_status))
+            if rows is None:
+                return JSONResponse(
+                    content={"error": "No cases found for this party name"},
+                    status_code=404
+                )
+            return ndjson_response(rows)
+
         cases = extract_party_name_data(results_html(data_value), case_data.party_status)
         if not cases:
             return JSONResponse(
@@ -1,17 +1,59 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 import sentry_sdk
-from api.v1 import districtcourt, hc2, hc3, cc, nclt,sci
-app = FastAPI(title="Secure Flow By Richstream")
+from api.v1 import districtcourt, hc2, hc3, cc, nclt,sci, jobs, cases, pipeline
+from helpers import metrics, rate_limit
+from helpers.solve_captcha import check_solver_config
+from helpers.timing import StageTimingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app):
+    check_solver_config()
+    districtcourt.start_pool_warmer()
+    jobs.start_job_workers()
+    yield
+    await jobs.stop_job_workers()
+    await districtcourt.stop_pool_warmer()
+    hc3.close_hc_pool()
+
+
+app = FastAPI(title="Secure Flow By Richstream", lifespan=lifespan)
 
 sentry_sdk.init(
     dsn="https://d5ba717dbd1a1f3eec57fb1ec6798284@o4508364047712256.ingest.us.sentry.io/4510724946853888",
     send_default_pii=True,
+    # share of requests traced as transactions carrying their scrape stages
+    traces_sample_rate=float(os.getenv("SENTRY_TRACES_SAMPLE_RATE", "0")),
 )
 
+app.add_middleware(StageTimingMiddleware)
+
 @app.get("/")
 async def root():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    # every gunicorn worker keeps its own numbers; the label keeps them apart
+    return PlainTextResponse(
+        metrics.render_prometheus(worker=os.getpid()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+@app.get("/metrics/captcha")
+async def captcha_metrics():
+    return metrics.snapshot("captcha_")
+
+@app.get("/metrics/rate_limits")
+async def rate_limit_metrics():
+    return {
+        "hosts": rate_limit.limiter_status(),
+        **metrics.snapshot("upstream_"),
+    }
+
 @app.get("/sentry-debug")
 async def trigger_error():
     division_by_zero = 1 / 0
@@ -22,6 +64,9 @@ app.include_router(hc3.app, prefix="/api/v1", tags=["Hccourt3"])
 app.include_router(cc.app, prefix="/api/v1", tags=["Consumer"])
 app.include_router(nclt.app, prefix="/api/v1", tags=["Nclt"])
 app.include_router(sci.app, prefix="/api/v1", tags=["Sci"])
+app.include_router(jobs.app, prefix="/api/v1", tags=["Jobs"])
+app.include_router(cases.app, prefix="/api/v1", tags=["Cases"])
+app.include_router(pipeline.app, prefix="/api/v1", tags=["Pipeline"])
 
 
 if __name__ == "__main__":
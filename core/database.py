@@ -1,10 +1,34 @@
 import json
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
 from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
 import os
+from helpers.metrics import Histogram
+from helpers.timing import timed
 load_dotenv()
-client = MongoClient(os.getenv("MONGOCLIENT"))
+
+MONGO_CALL_SECONDS = Histogram(
+    "mongo_call_seconds",
+    "Mongo command latency as the driver measured it, by command and "
+    "outcome (ok or error).",
+    labels=("command", "outcome"),
+)
+
+
+class _CommandTimer(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_CALL_SECONDS.observe(
+            event.duration_micros / 1e6, command=event.command_name, outcome="ok")
+
+    def failed(self, event):
+        MONGO_CALL_SECONDS.observe(
+            event.duration_micros / 1e6, command=event.command_name, outcome="error")
+
+
+client = MongoClient(os.getenv("MONGOCLIENT"), event_listeners=[_CommandTimer()])
 db = client["gylscrdata"]
 collection = db["casedetails"]
 
@@ -57,6 +81,7 @@ def _merge_append_only(existing_doc, result):
     return result
 
 
+@timed("mongo_save")
 def save_case(result, existing_case_id=None):
 
     if existing_case_id:
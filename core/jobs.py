@@ -0,0 +1,284 @@
+import asyncio
+import os
+import random
+import socket
+import time
+import uuid
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from core.database import db
+
+JOBS_COLLECTION = os.getenv("JOBS_COLLECTION", "ingest_jobs")
+JOB_ITEMS_COLLECTION = os.getenv("JOB_ITEMS_COLLECTION", "ingest_job_items")
+
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+JOBS_RETRY_BASE_SECONDS = float(os.getenv("JOBS_RETRY_BASE", "30"))
+JOBS_RETRY_MAX_SECONDS = float(os.getenv("JOBS_RETRY_MAX", "900"))
+# A claimed item whose worker died (deploy, OOM) is picked up again once its
+# lease runs out, so a batch never stalls on a vanished process.
+JOBS_LEASE_SECONDS = int(os.getenv("JOBS_LEASE", "600"))
+JOBS_POLL_SECONDS = float(os.getenv("JOBS_POLL", "5"))
+
+# The upstream court was down or throttling us (HTTP 502 from a failed
+# scrape, 503 from the breaker) - worth another go later. Anything else is
+# an answer about the case itself and is final.
+RETRY_STATUSES = {502, 503}
+
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+jobs = db[JOBS_COLLECTION]
+job_items = db[JOB_ITEMS_COLLECTION]
+
+
+def ensure_indexes():
+    job_items.create_index(
+        [("status", ASCENDING), ("court", ASCENDING), ("next_attempt_at", ASCENDING)],
+        name="job_items_claim",
+    )
+    job_items.create_index(
+        [("job_id", ASCENDING), ("seq", ASCENDING)],
+        name="job_items_by_job",
+        unique=True,
+    )
+    job_items.create_index(
+        [("job_id", ASCENDING), ("status", ASCENDING)],
+        name="job_items_progress",
+    )
+    jobs.create_index([("created_at", DESCENDING)], name="jobs_recent")
+
+
+def submit_batch(court, cases, route="bulk_i"):
+    """Queue one ingest per case and return the job id. `route` picks which
+    of the court's scrape routes runs each case (see JobWorkers)."""
+    job_id = uuid.uuid4().hex
+    now = time.time()
+
+    jobs.insert_one({
+        "_id": job_id,
+        "court": court,
+        "route": route,
+        "total": len(cases),
+        "created_at": now,
+    })
+    if cases:
+        job_items.insert_many(
+            [
+                {
+                    "job_id": job_id,
+                    "seq": seq,
+                    "court": court,
+                    "route": route,
+                    "payload": case,
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "lease_until": None,
+                    "owner": None,
+                    "last_status": None,
+                    "error": None,
+                    "case_id": None,
+                }
+                for seq, case in enumerate(cases)
+            ],
+            ordered=False,
+        )
+    return job_id
+
+
+def fail_abandoned(court, now):
+    """Fail items whose lease ran out on their last allowed attempt - the
+    case kept crashing or hanging its worker, so re-claiming it only would
+    again."""
+    job_items.update_many(
+        {
+            "court": court,
+            "status": "running",
+            "lease_until": {"$lt": now},
+            "attempts": {"$gte": JOBS_MAX_ATTEMPTS},
+        },
+        {
+            "$set": {
+                "status": "failed",
+                "lease_until": None,
+                "error": "lease expired on the last attempt",
+                "finished_at": now,
+            },
+        },
+    )
+
+
+def claim(court):
+    """Take the next runnable item for a court, or None."""
+    now = time.time()
+    fail_abandoned(court, now)
+    return job_items.find_one_and_update(
+        {
+            "court": court,
+            "$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {
+                    "status": "running",
+                    "lease_until": {"$lt": now},
+                    "attempts": {"$lt": JOBS_MAX_ATTEMPTS},
+                },
+            ],
+        },
+        {
+            "$set": {
+                "status": "running",
+                "owner": OWNER,
+                "lease_until": now + JOBS_LEASE_SECONDS,
+                "started_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("next_attempt_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def retry_delay(attempts):
+    delay = min(JOBS_RETRY_MAX_SECONDS, JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def complete(item, status_code, body=None, error=None):
+    """Record how one run went. status_code None means the run itself blew
+    up, which is retried like an upstream outage."""
+    now = time.time()
+    update = {
+        "last_status": status_code,
+        "error": error,
+        "lease_until": None,
+        "finished_at": now,
+    }
+
+    if status_code is not None and 200 <= status_code < 300:
+        update["status"] = "done"
+        update["case_id"] = (body or {}).get("_id") if isinstance(body, dict) else None
+    elif (status_code is None or status_code in RETRY_STATUSES) \
+            and item["attempts"] < JOBS_MAX_ATTEMPTS:
+        update["status"] = "pending"
+        update["next_attempt_at"] = now + retry_delay(item["attempts"])
+    else:
+        update["status"] = "failed"
+
+    # Only the current lease holder may record the outcome; a run that
+    # outlived its lease has been handed to someone else.
+    job_items.update_one({"_id": item["_id"], "owner": OWNER}, {"$set": update})
+    return update["status"]
+
+
+def job_progress(job_id):
+    job = jobs.find_one({"_id": job_id})
+    if not job:
+        return None
+
+    counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+    for row in job_items.aggregate([
+        {"$match": {"job_id": job_id}},
+        {"$group": {"_id": "$status", "n": {"$sum": 1}}},
+    ]):
+        counts[row["_id"]] = row["n"]
+    retrying = job_items.count_documents(
+        {"job_id": job_id, "status": "pending", "attempts": {"$gt": 0}})
+
+    if counts["pending"] + counts["running"] == 0:
+        status = "finished"
+    elif counts["done"] + counts["failed"] + counts["running"] + retrying == 0:
+        status = "queued"
+    else:
+        status = "running"
+
+    return {
+        "job_id": job_id,
+        "court": job["court"],
+        "route": job.get("route", "bulk_i"),
+        "status": status,
+        "total": job["total"],
+        "counts": {**counts, "retrying": retrying},
+        "created_at": job["created_at"],
+    }
+
+
+def list_job_items(job_id, status=None, skip=0, limit=100):
+    query = {"job_id": job_id}
+    if status:
+        query["status"] = status
+    cursor = (
+        job_items.find(query, {"_id": 0, "job_id": 0, "owner": 0, "lease_until": 0})
+        .sort("seq", ASCENDING)
+        .skip(skip)
+        .limit(limit)
+    )
+    return list(cursor)
+
+
+class JobWorkers:
+    """Drains the ingest queue inside the API process.
+
+    `handlers` maps a court name to {route: handler}, where a handler is an
+    async callable taking one item's payload and returning (status_code,
+    body). Each court gets as many drain loops as its concurrency cap -
+    shared by all of its routes - so a slow court never eats the slots of
+    another. Caps are per worker process.
+    """
+
+    def __init__(self, handlers, concurrency):
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self._tasks = []
+
+    def start(self):
+        if self._tasks:
+            return
+        for court, routes in self.handlers.items():
+            for _ in range(max(self.concurrency.get(court, 1), 0)):
+                self._tasks.append(asyncio.create_task(self._drain(court, routes)))
+
+    async def stop(self):
+        # Items interrupted here stay "running" until their lease expires
+        # and are then picked up again.
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _drain(self, court, routes):
+        while True:
+            try:
+                item = await asyncio.to_thread(claim, court)
+            except Exception as exc:
+                print(f"[jobs] claim for {court} failed: {exc}")
+                item = None
+
+            if item is None:
+                await asyncio.sleep(JOBS_POLL_SECONDS)
+                continue
+
+            await self._run(item, routes.get(item.get("route", "bulk_i")))
+
+    async def _run(self, item, handler):
+        body, error = None, None
+        try:
+            if handler is None:
+                raise LookupError(f"no handler for {item['court']} {item.get('route')}")
+            status_code, body = await handler(item["payload"])
+            if isinstance(body, dict):
+                error = body.get("error")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            status_code, error = None, str(exc)
+
+        try:
+            outcome = await asyncio.to_thread(complete, item, status_code, body, error)
+        except Exception as exc:
+            print(f"[jobs] recording {item['job_id']}#{item['seq']} failed: {exc}")
+            return
+
+        print(
+            f"[jobs] {item['court']} {item['job_id']}#{item['seq']} "
+            f"attempt={item['attempts']} status={status_code} -> {outcome}"
+        )
@@ -1,10 +1,35 @@
+import time
 import boto3
 from dotenv import load_dotenv
 import os 
+from helpers.metrics import Histogram
 load_dotenv()
 
 s3_client = boto3.client(
     "s3",
     aws_access_key_id=os.getenv("AWS_S3_KEY"),
     aws_secret_access_key=os.getenv("AWS_S3SEC_KEY")
-)
\ No newline at end of file
+)
+
+S3_CALL_SECONDS = Histogram(
+    "s3_call_seconds",
+    "S3 API call latency by operation and HTTP status, botocore's own retries "
+    "included. Calls that never got a response are not counted.",
+    labels=("operation", "status"),
+)
+
+
+def _call_started(context, **kwargs):
+    context["started_at"] = time.perf_counter()
+
+
+def _call_finished(context, model, http_response, **kwargs):
+    started = context.get("started_at")
+    if started is not None:
+        S3_CALL_SECONDS.observe(
+            time.perf_counter() - started,
+            operation=model.name, status=http_response.status_code)
+
+
+s3_client.meta.events.register("before-call.s3", _call_started)
+s3_client.meta.events.register("after-call.s3", _call_finished)
@@ -0,0 +1,174 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX dev boxes
+    fcntl = None
+
+BREAKER_STORE = os.getenv("ECOURTS_BREAKER_STORE", "file")
+BREAKER_FILE = os.getenv(
+    "ECOURTS_BREAKER_FILE",
+    os.path.join(tempfile.gettempdir(), "secureflow-ecourts-breaker.json"),
+)
+BREAKER_COLLECTION = os.getenv("ECOURTS_BREAKER_COLLECTION", "ecourts_breaker")
+BREAKER_MONGO_TIMEOUT_MS = int(os.getenv("ECOURTS_BREAKER_MONGO_TIMEOUT_MS", "2000"))
+
+
+def _state(doc):
+    return {
+        "failures": int(doc.get("failures") or 0),
+        "open_until": float(doc.get("open_until") or 0),
+    }
+
+
+class MemoryBreakerStore:
+    """No sharing - the process-local breaker is the only state."""
+
+    def load(self, key):
+        return None
+
+    def record_block(self, key, threshold, cooldown):
+        return None
+
+    def reset(self, key):
+        pass
+
+    def all(self):
+        return {}
+
+
+class FileBreakerStore:
+    """Breaker state for every egress on this host, in one flock-guarded file."""
+
+    def __init__(self, path=BREAKER_FILE):
+        self.path = path
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _read(self):
+        try:
+            with open(self.path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, states):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump(states, handle)
+        os.replace(tmp_path, self.path)
+
+    def load(self, key):
+        doc = self._read().get(key)
+        return _state(doc) if doc else None
+
+    def record_block(self, key, threshold, cooldown):
+        with self._locked():
+            states = self._read()
+            state = _state(states.get(key) or {})
+            state["failures"] += 1
+            state["tripped"] = state["failures"] >= threshold
+            if state["tripped"]:
+                state["failures"] = 0
+                state["open_until"] = time.time() + cooldown
+            states[key] = {"failures": state["failures"], "open_until": state["open_until"]}
+            self._write(states)
+            return state
+
+    def reset(self, key):
+        with self._locked():
+            states = self._read()
+            if key in states and states[key].get("failures"):
+                states[key]["failures"] = 0
+                self._write(states)
+
+    def all(self):
+        return {key: _state(doc) for key, doc in self._read().items()}
+
+
+class MongoBreakerStore:
+    """Breaker state shared by every replica, one document per egress."""
+
+    def __init__(self, collection_name=BREAKER_COLLECTION):
+        from pymongo import MongoClient
+
+        from core.database import db
+
+        # Its own client with short timeouts: an unreachable Mongo should cost
+        # a breaker call two seconds, not the driver's 30s server selection.
+        client = MongoClient(
+            os.getenv("MONGOCLIENT"),
+            serverSelectionTimeoutMS=BREAKER_MONGO_TIMEOUT_MS,
+            connectTimeoutMS=BREAKER_MONGO_TIMEOUT_MS,
+            socketTimeoutMS=BREAKER_MONGO_TIMEOUT_MS,
+        )
+        self.collection = client[db.name][collection_name]
+
+    def load(self, key):
+        doc = self.collection.find_one({"_id": key})
+        return _state(doc) if doc else None
+
+    def record_block(self, key, threshold, cooldown):
+        from pymongo import ReturnDocument
+
+        doc = self.collection.find_one_and_update(
+            {"_id": key},
+            {"$inc": {"failures": 1}, "$setOnInsert": {"open_until": 0}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        state = _state(doc)
+        state["tripped"] = False
+
+        if state["failures"] >= threshold:
+            open_until = time.time() + cooldown
+            # Several workers can cross the threshold together; the one whose
+            # update lands is the one that trips (and logs) the breaker.
+            result = self.collection.update_one(
+                {"_id": key, "failures": {"$gte": threshold}},
+                {"$set": {"failures": 0, "open_until": open_until}},
+            )
+            state["tripped"] = result.modified_count == 1
+            state["failures"] = 0
+            state["open_until"] = max(state["open_until"], open_until)
+
+        return state
+
+    def reset(self, key):
+        self.collection.update_one(
+            {"_id": key, "failures": {"$gt": 0}}, {"$set": {"failures": 0}})
+
+    def all(self):
+        return {doc["_id"]: _state(doc) for doc in self.collection.find({})}
+
+
+BREAKER_STORES = {
+    "memory": MemoryBreakerStore,
+    "file": FileBreakerStore,
+    "mongo": MongoBreakerStore,
+}
+
+
+def breaker_store_from_env():
+    try:
+        return BREAKER_STORES[BREAKER_STORE]()
+    except KeyError:
+        raise ValueError(
+            f"ECOURTS_BREAKER_STORE={BREAKER_STORE!r} is not one of "
+            f"{', '.join(sorted(BREAKER_STORES))}"
+        ) from None
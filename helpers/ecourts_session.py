@@ -1,7 +1,17 @@
+import asyncio
 import os
+import random
 import re
 import threading
 import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from helpers.breaker_store import MemoryBreakerStore, breaker_store_from_env
+from helpers.gate_store import gate_store_from_env
+from helpers.metrics import Counter, Gauge
+from helpers.timing import timed
 
 BASE_URL = "https://services.ecourts.gov.in/ecourtindia_v6/"
 COMPONENTS_URL = BASE_URL + "js/components.js"
@@ -22,9 +32,49 @@ REJECT_MARKER = "Invalid Request"
 
 GATE_TTL_SECONDS = int(os.getenv("ECOURTS_GATE_TTL", "600"))
 MAX_DISCOVERY_FETCHES = int(os.getenv("ECOURTS_GATE_MAX_FETCHES", "12"))
+GATE_LEASE_SECONDS = int(os.getenv("ECOURTS_GATE_LEASE", "90"))
+GATE_LEASE_POLL_SECONDS = 1.0
+GATE_KEY = "delimeter"
 
 BREAKER_THRESHOLD = int(os.getenv("ECOURTS_BREAKER_THRESHOLD", "5"))
 BREAKER_COOLDOWN_SECONDS = int(os.getenv("ECOURTS_BREAKER_COOLDOWN", "60"))
+BREAKER_SYNC_SECONDS = float(os.getenv("ECOURTS_BREAKER_SYNC", "2"))
+
+PROBE_TIMEOUT = httpx.Timeout(60, connect=10)
+
+GATE_RESOLUTIONS = Counter(
+    "ecourts_gate_resolutions_total",
+    "Gate refreshes per egress: discovered (this worker read components.js), "
+    "adopted (another worker's answer), blocked or failed.",
+    labels=("egress", "outcome"),
+)
+GATE_DECOYS = Counter(
+    "ecourts_gate_decoys_rejected_total",
+    "Delimeter candidates from components.js that failed the probe.",
+    labels=("egress",),
+)
+BREAKER_TRIPS = Counter(
+    "ecourts_breaker_trips_total",
+    "Times this worker tripped an egress breaker.",
+    labels=("egress",),
+)
+BREAKER_OPEN_SECONDS = Counter(
+    "ecourts_breaker_open_seconds_total",
+    "Cooldown seconds of every trip this worker recorded - the time the "
+    "egress was shedding requests.",
+    labels=("egress",),
+)
+BREAKER_COOLDOWN_LEFT = Gauge(
+    "ecourts_breaker_cooldown_seconds",
+    "Seconds each egress breaker stays open for, as this worker last read "
+    "the shared store; 0 while it is closed.",
+    labels=("egress",),
+    # the breakers' local cache only - a scrape never waits on the store
+    collect=lambda: [
+        ({"egress": egress.key}, round(egress.breaker.cooldown_remaining(), 1))
+        for egress in egresses
+    ],
+)
 
 
 class EcourtsGateError(Exception):
@@ -45,55 +95,136 @@ def gate_rejected(response):
     return REJECT_MARKER in response.text
 
 
+def egress_key(proxy):
+    """Identify an egress by proxy host:port. Never the full URL - proxy URLs
+    carry credentials and this key is stored and served on a status route."""
+    if not proxy:
+        return "direct"
+    parts = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    return f"{parts.hostname}:{parts.port}" if parts.port else str(parts.hostname)
+
+
 class _CircuitBreaker:
-    def __init__(self, threshold, cooldown):
+    """Per-egress breaker. The counters live in a shared store so every worker
+    and replica behind the same IP sheds together; the local copy is a cache
+    re-read at most every BREAKER_SYNC_SECONDS.
+
+    Only the async methods touch the store, and always off the event loop -
+    check(), is_open() and cooldown_remaining() read the cache alone, so call
+    refresh() first where a stale view matters."""
+
+    def __init__(self, threshold, cooldown, key="direct", store=None):
         self._threshold = threshold
         self._cooldown = cooldown
+        self._key = key
+        self._store = store or MemoryBreakerStore()
         self._lock = threading.Lock()
         self._failures = 0
         self._open_until = 0.0
+        self._synced_at = 0.0
 
-    def check(self):
+    async def _shared(self, call, *args):
+        try:
+            return await asyncio.to_thread(call, *args)
+        except Exception as exc:
+            print(f"[breaker] shared store {call.__name__} failed: {exc}")
+            return None
+
+    def _adopt(self, state):
+        """Fold shared state (wall-clock open_until) into the local cache."""
+        self._failures = state["failures"]
+        remaining = state["open_until"] - time.time()
+        self._open_until = max(self._open_until, time.monotonic() + remaining)
+        self._synced_at = time.monotonic()
+
+    async def refresh(self):
+        if time.monotonic() - self._synced_at < BREAKER_SYNC_SECONDS:
+            return
+        # claimed before the await so concurrent callers do not all reload
+        self._synced_at = time.monotonic()
+        state = await self._shared(self._store.load, self._key)
+        if state:
+            with self._lock:
+                self._adopt(state)
+
+    def cooldown_remaining(self):
         with self._lock:
-            remaining = self._open_until - time.monotonic()
-            if remaining > 0:
-                raise EcourtsBlockedError(
-                    f"eCourts circuit breaker is open for another "
-                    f"{int(remaining)}s after {self._threshold} consecutive "
-                    f"blocks. Requests are being shed so the IP can cool off."
-                )
-
-    def record_block(self):
+            return max(0.0, self._open_until - time.monotonic())
+
+    def is_open(self):
+        return self.cooldown_remaining() > 0
+
+    def check(self):
+        remaining = self.cooldown_remaining()
+        if remaining > 0:
+            raise EcourtsBlockedError(
+                f"eCourts circuit breaker is open for another "
+                f"{int(remaining)}s after {self._threshold} consecutive "
+                f"blocks. Requests are being shed so the IP can cool off."
+            )
+
+    async def record_block(self):
+        state = await self._shared(
+            self._store.record_block, self._key, self._threshold, self._cooldown)
         with self._lock:
-            self._failures += 1
-            if self._failures >= self._threshold:
-                self._open_until = time.monotonic() + self._cooldown
-                self._failures = 0
-                print(
-                    f"[breaker] eCourts blocked us {self._threshold}x - "
-                    f"shedding requests for {self._cooldown}s"
-                )
-
-    def record_success(self):
+            if state is not None:
+                self._adopt(state)
+                tripped = state["tripped"]
+            else:
+                self._failures += 1
+                tripped = self._failures >= self._threshold
+                if tripped:
+                    self._open_until = time.monotonic() + self._cooldown
+                    self._failures = 0
+        if tripped:
+            BREAKER_TRIPS.inc(egress=self._key)
+            BREAKER_OPEN_SECONDS.inc(self._cooldown, egress=self._key)
+            print(
+                f"[breaker] eCourts blocked {self._key} {self._threshold}x - "
+                f"shedding requests for {self._cooldown}s"
+            )
+
+    async def record_success(self):
         with self._lock:
-            self._failures = 0
+            had_failures, self._failures = self._failures, 0
+        if had_failures:
+            await self._shared(self._store.reset, self._key)
 
     def status(self):
+        """Blocking - re-reads the store. Run it off the loop."""
+        state = self._store.load(self._key)
         with self._lock:
+            if state:
+                self._adopt(state)
             remaining = max(0, int(self._open_until - time.monotonic()))
-            return {"open": remaining > 0, "cooldown_remaining": remaining,
+            return {"egress": self._key, "open": remaining > 0,
+                    "cooldown_remaining": remaining,
                     "consecutive_blocks": self._failures}
 
 
-breaker = _CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN_SECONDS)
+def fleet_breaker_status():
+    """Breaker state of every egress any worker has recorded, from the store."""
+    now = time.time()
+    return [
+        {"egress": key, "open": state["open_until"] > now,
+         "cooldown_remaining": max(0, int(state["open_until"] - now)),
+         "consecutive_blocks": state["failures"]}
+        for key, state in sorted(breaker_store.all().items())
+    ]
+
+
+breaker_store = breaker_store_from_env()
 
 
 class _GateCache:
     def __init__(self):
-        self.lock = threading.Lock()
+        self.lock = asyncio.Lock()
         self.value = None
         self.alias = None
         self.resolved_at = 0.0
+        # The last value eCourts bounced, so a copy still sitting in the
+        # shared store is not adopted straight back.
+        self.rejected = None
 
     def fresh(self):
         return (
@@ -108,18 +239,117 @@ class _GateCache:
         headers[self.alias] = self.value
         return headers
 
-    def store(self, value, alias):
+    def store(self, value, alias, age=0.0):
         self.value = value
         self.alias = alias
-        self.resolved_at = time.monotonic()
+        self.resolved_at = time.monotonic() - age
+        self.rejected = None
 
     def clear(self):
+        self.rejected = self.value or self.rejected
         self.value = None
         self.alias = None
         self.resolved_at = 0.0
 
 
-_cache = _GateCache()
+_store = gate_store_from_env()
+
+
+def configured_proxies():
+    """ECOURTS_PROXIES, comma separated, "direct" meaning no proxy; falls
+    back to the single ECOURTS_PROXY, then to going out direct."""
+    raw = os.getenv("ECOURTS_PROXIES") or os.getenv("ECOURTS_PROXY") or ""
+    proxies = [
+        None if entry.strip() == "direct" else entry.strip()
+        for entry in raw.split(",") if entry.strip()
+    ]
+    return proxies or [None]
+
+
+class Egress:
+    """One way out to eCourts. The throttle is per IP, so each egress has its
+    own breaker and its own gate - eCourts may serve different delimeters to
+    different IPs."""
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.key = egress_key(proxy)
+        self.breaker = _CircuitBreaker(
+            BREAKER_THRESHOLD, BREAKER_COOLDOWN_SECONDS, key=self.key, store=breaker_store)
+        self.gate = _GateCache()
+        self.gate_key = GATE_KEY if proxy is None else f"{GATE_KEY}@{self.key}"
+        # sessions on this egress currently checked out of the pool
+        self.in_use = 0
+
+
+egresses = list({egress.key: egress for egress in map(Egress, configured_proxies())}.values())
+
+
+def egress_of(session):
+    return getattr(session, "_egress", None) or egresses[0]
+
+
+async def refresh_breakers():
+    """Bring every egress breaker's cache up to date with the shared store."""
+    await asyncio.gather(*(egress.breaker.refresh() for egress in egresses))
+
+
+async def pick_egress():
+    """The least-loaded egress whose breaker is closed. When every breaker
+    is open, raises the shed error of the one that reopens first."""
+    await refresh_breakers()
+    healthy = [egress for egress in egresses if not egress.breaker.is_open()]
+    if not healthy:
+        min(egresses, key=lambda egress: egress.breaker.cooldown_remaining()).breaker.check()
+        healthy = egresses
+    return min(healthy, key=lambda egress: (egress.in_use, random.random()))
+
+
+def egress_status():
+    return [
+        {**egress.breaker.status(), "in_use": egress.in_use,
+         "gate_fresh": bool(egress.gate.fresh())}
+        for egress in egresses
+    ]
+
+
+async def _shared(call, *args, default=None):
+    """Run a blocking store call off the loop. The shared store is an
+    optimisation only - when it is down every worker resolves on its own."""
+    try:
+        return await asyncio.to_thread(call, *args)
+    except Exception as exc:
+        print(f"[gate] shared store {call.__name__} failed: {exc}")
+        return default
+
+
+async def _adopt_shared(egress):
+    """Copy a live gate another worker resolved into the local cache."""
+    shared = await _shared(_store.load, egress.gate_key)
+    if not shared or not shared.get("value") or not shared.get("alias"):
+        return False
+
+    age = time.time() - float(shared.get("resolved_at") or 0)
+    if age >= GATE_TTL_SECONDS or shared["value"] == egress.gate.rejected:
+        return False
+
+    egress.gate.store(shared["value"], shared["alias"], age=max(age, 0.0))
+    return True
+
+
+async def _await_resolver(egress):
+    """Wait for whoever holds the discovery lease. True when their gate was
+    adopted, False when the lease came free and is now ours."""
+    deadline = time.monotonic() + GATE_LEASE_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(GATE_LEASE_POLL_SECONDS)
+        if await _adopt_shared(egress):
+            return True
+        if await _shared(
+                _store.acquire_lease, egress.gate_key, GATE_LEASE_SECONDS, default=True):
+            return False
+    print("[gate] resolver lease never released - discovering without it")
+    return None
 
 
 def _candidate_headers(value, alias):
@@ -129,15 +359,15 @@ def _candidate_headers(value, alias):
     return headers
 
 
-def _probe(session, headers, app_token):
+async def _probe(session, headers, app_token):
     token = getattr(session, "_app_token", "") or app_token
 
     try:
-        response = session.post(
+        response = await session.post(
             PROBE_URL,
             data={"state_code": "1", "ajax_req": "true", "app_token": token},
             headers=headers,
-            timeout=(10, 60),
+            timeout=PROBE_TIMEOUT,
         )
     except Exception as exc:
         print(f"[gate] probe error: {exc}")
@@ -165,11 +395,11 @@ def _probe(session, headers, app_token):
     return "<option" in response.text or "dist_code" in response.text
 
 
-def _discover(session, app_token):
+async def _discover(session, app_token):
     tried = set()
 
     for attempt in range(1, MAX_DISCOVERY_FETCHES + 1):
-        response = session.get(COMPONENTS_URL, timeout=(10, 60))
+        response = await session.get(COMPONENTS_URL, timeout=PROBE_TIMEOUT)
 
         if looks_blocked(response):
             raise EcourtsBlockedError(
@@ -191,11 +421,12 @@ def _discover(session, app_token):
             continue
         tried.add((value, alias))
 
-        if _probe(session, _candidate_headers(value, alias), app_token):
+        if await _probe(session, _candidate_headers(value, alias), app_token):
             print(f"[gate] live delimeter found on fetch {attempt} (alias {alias})")
             return value, alias
 
         print(f"[gate] decoy delimeter rejected on fetch {attempt}")
+        GATE_DECOYS.inc(egress=egress_of(session).key)
 
     raise EcourtsGateError(
         f"eCourts delimeter unresolved after {MAX_DISCOVERY_FETCHES} fetches - "
@@ -204,29 +435,66 @@ def _discover(session, app_token):
     )
 
 
-def resolve_gate(session, app_token, force_refresh=False):
-    breaker.check()
-
-    if not force_refresh and _cache.fresh():
-        return _cache.headers()
+async def resolve_gate(session, app_token, force_refresh=False):
+    egress = egress_of(session)
+    cache = egress.gate
+    await egress.breaker.refresh()
+    egress.breaker.check()
 
-    with _cache.lock:
-        if not force_refresh and _cache.fresh():
-            return _cache.headers()
-        if force_refresh:
-            _cache.clear()
+    if not force_refresh and cache.fresh():
+        return cache.headers()
+    return await _refresh_gate(session, app_token, force_refresh)
 
-        try:
-            value, alias = _discover(session, app_token)
-        except EcourtsBlockedError:
-            breaker.record_block()
-            raise
 
-        _cache.store(value, alias)
-        breaker.record_success()
-        return _cache.headers()
+@timed("gate")
+async def _refresh_gate(session, app_token, force_refresh):
+    egress = egress_of(session)
+    cache = egress.gate
 
+    async with cache.lock:
+        if not force_refresh and cache.fresh():
+            return cache.headers()
+        if force_refresh:
+            cache.clear()
+
+        # Another worker may already have resolved (or re-resolved) the gate.
+        if await _adopt_shared(egress):
+            GATE_RESOLUTIONS.inc(egress=egress.key, outcome="adopted")
+            return cache.headers()
+
+        # One discovery per gate rotation fleet-wide: the lease holder fetches
+        # components.js, everyone else waits for its answer.
+        leased = await _shared(
+            _store.acquire_lease, egress.gate_key, GATE_LEASE_SECONDS, default=True)
+        if not leased:
+            adopted = await _await_resolver(egress)
+            if adopted:
+                GATE_RESOLUTIONS.inc(egress=egress.key, outcome="adopted")
+                return cache.headers()
+            leased = adopted is False
 
-def invalidate_gate():
-    with _cache.lock:
-        _cache.clear()
+        try:
+            try:
+                value, alias = await _discover(session, app_token)
+            except EcourtsBlockedError:
+                GATE_RESOLUTIONS.inc(egress=egress.key, outcome="blocked")
+                await egress.breaker.record_block()
+                raise
+            except EcourtsGateError:
+                GATE_RESOLUTIONS.inc(egress=egress.key, outcome="failed")
+                raise
+            await _shared(_store.save, egress.gate_key, value, alias)
+        finally:
+            if leased:
+                await _shared(_store.release_lease, egress.gate_key)
+
+        cache.store(value, alias)
+        await egress.breaker.record_success()
+        GATE_RESOLUTIONS.inc(egress=egress.key, outcome="discovered")
+        return cache.headers()
+
+
+def invalidate_gate(session):
+    # Runs on the event loop between awaits, so the clear cannot interleave
+    # with a discovery that is storing its result.
+    egress_of(session).gate.clear()
@@ -0,0 +1,148 @@
+import json
+import os
+import socket
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX dev boxes
+    fcntl = None
+
+GATE_STORE = os.getenv("ECOURTS_GATE_STORE", "file")
+GATE_FILE = os.getenv(
+    "ECOURTS_GATE_FILE",
+    os.path.join(tempfile.gettempdir(), "secureflow-ecourts-gate.json"),
+)
+GATE_COLLECTION = os.getenv("ECOURTS_GATE_COLLECTION", "ecourts_gate")
+
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class MemoryGateStore:
+    """No sharing at all - every process resolves its own gate."""
+
+    def load(self, key):
+        return None
+
+    def save(self, key, value, alias):
+        pass
+
+    def acquire_lease(self, key, ttl):
+        return True
+
+    def release_lease(self, key):
+        pass
+
+
+class FileGateStore:
+    """Shares the gate between workers on one host through a JSON file.
+
+    Point ECOURTS_GATE_FILE at /dev/shm to keep it off disk. The lease is an
+    flock on a sibling file, so it dies with the process that held it.
+    """
+
+    def __init__(self, path=GATE_FILE):
+        self.path = path
+        self._lease_fds = {}
+
+    def _file(self, key):
+        root, ext = os.path.splitext(self.path)
+        return f"{root}-{key}{ext or '.json'}"
+
+    def load(self, key):
+        try:
+            with open(self._file(key)) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, value, alias):
+        path = self._file(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump({"value": value, "alias": alias, "resolved_at": time.time()}, handle)
+        os.replace(tmp_path, path)
+
+    def acquire_lease(self, key, ttl):
+        if fcntl is None:
+            return True
+        fd = os.open(self._file(key) + ".lock", os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lease_fds[key] = fd
+        return True
+
+    def release_lease(self, key):
+        fd = self._lease_fds.pop(key, None)
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+class MongoGateStore:
+    """Shares the gate across replicas through a small Mongo collection."""
+
+    def __init__(self, collection_name=GATE_COLLECTION):
+        from core.database import db
+
+        self.collection = db[collection_name]
+
+    def load(self, key):
+        doc = self.collection.find_one({"_id": key})
+        if not doc:
+            return None
+        return {
+            "value": doc.get("value"),
+            "alias": doc.get("alias"),
+            "resolved_at": doc.get("resolved_at", 0),
+        }
+
+    def save(self, key, value, alias):
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {"value": value, "alias": alias, "resolved_at": time.time()}},
+            upsert=True,
+        )
+
+    def acquire_lease(self, key, ttl):
+        from pymongo.errors import DuplicateKeyError
+
+        now = time.time()
+        try:
+            # Matches only a lease that is free, expired or already ours; when
+            # another owner holds a live one the upsert collides on _id.
+            self.collection.update_one(
+                {
+                    "_id": f"{key}:lease",
+                    "$or": [{"expires_at": {"$lt": now}}, {"owner": OWNER}],
+                },
+                {"$set": {"owner": OWNER, "expires_at": now + ttl}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def release_lease(self, key):
+        self.collection.delete_one({"_id": f"{key}:lease", "owner": OWNER})
+
+
+GATE_STORES = {
+    "memory": MemoryGateStore,
+    "file": FileGateStore,
+    "mongo": MongoGateStore,
+}
+
+
+def gate_store_from_env():
+    try:
+        return GATE_STORES[GATE_STORE]()
+    except KeyError:
+        raise ValueError(
+            f"ECOURTS_GATE_STORE={GATE_STORE!r} is not one of "
+            f"{', '.join(sorted(GATE_STORES))}"
+        ) from None
@@ -0,0 +1,158 @@
+import threading
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Metric:
+    """collect, when given, is a callable returning [(labels dict, value), ...]
+    read on every scrape instead of stored values - for state the app already
+    keeps, such as pool sizes and pool stats."""
+
+    kind = ""
+
+    def __init__(self, name, help_text, labels=(), collect=None):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._collect = collect
+        self._lock = threading.Lock()
+        self._values = {}
+        with _registry_lock:
+            _registry[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def samples(self):
+        if self._collect is not None:
+            values = {self._key(labels): value for labels, value in self._collect()}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [
+            (dict(zip(self.labels, key)), value)
+            for key, value in sorted(values.items())
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {
+                    "buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][index] += 1
+            series["count"] += 1
+            series["sum"] += value
+
+    def samples(self):
+        with self._lock:
+            return [
+                (dict(zip(self.labels, key)), {
+                    "buckets": dict(zip(self.buckets, series["buckets"])),
+                    "count": series["count"],
+                    "sum": round(series["sum"], 6),
+                })
+                for key, series in sorted(self._values.items())
+            ]
+
+
+def snapshot(prefix=""):
+    """Every registered metric (optionally only those named prefix*) as plain
+    JSON-able dicts. Values are per worker process."""
+    with _registry_lock:
+        metrics = [m for name, m in sorted(_registry.items()) if name.startswith(prefix)]
+    return {
+        metric.name: {
+            "type": metric.kind,
+            "help": metric.help,
+            "samples": [
+                {"labels": labels, "value": value}
+                for labels, value in metric.samples()
+            ],
+        }
+        for metric in metrics
+    }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _series(name, labels, value):
+    if labels:
+        pairs = ",".join(f'{label}="{_escape(v)}"' for label, v in labels.items())
+        return f"{name}{{{pairs}}} {value}"
+    return f"{name} {value}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(**const_labels):
+    """Every registered metric in the Prometheus text exposition format.
+    const_labels are added to every series (e.g. the worker pid, since
+    values are per worker process)."""
+    with _registry_lock:
+        metrics = [m for _, m in sorted(_registry.items())]
+
+    lines = []
+    for metric in metrics:
+        samples = metric.samples()
+        help_text = metric.help.replace("\\", "\\\\").replace("\n", "\\n")
+        lines.append(f"# HELP {metric.name} {help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, value in samples:
+            labels = {**const_labels, **labels}
+            if metric.kind != "histogram":
+                lines.append(_series(metric.name, labels, _number(value)))
+                continue
+            for bound, count in value["buckets"].items():
+                lines.append(_series(
+                    f"{metric.name}_bucket", {**labels, "le": _number(bound)}, count))
+            lines.append(_series(f"{metric.name}_bucket", {**labels, "le": "+Inf"}, value["count"]))
+            lines.append(_series(f"{metric.name}_sum", labels, _number(value["sum"])))
+            lines.append(_series(f"{metric.name}_count", labels, value["count"]))
+    return "\n".join(lines) + "\n"
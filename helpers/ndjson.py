@@ -0,0 +1,27 @@
+import itertools
+import json
+
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def peek_rows(rows):
+    """Pull the first row so callers can still answer "nothing found" with a
+    proper status code. Returns None when there are no rows, otherwise an
+    iterator over all of them."""
+    rows = iter(rows)
+    for first in rows:
+        return itertools.chain((first,), rows)
+    return None
+
+
+def ndjson_response(rows, status_code=200):
+    """Stream rows as newline-delimited JSON, one object per line, as the
+    extractor yields them. Sync iterators run in Starlette's threadpool."""
+
+    def lines():
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), status_code=status_code, media_type=NDJSON_MEDIA_TYPE)
@@ -1,11 +1,22 @@
 import hashlib
 import os
 import re
+import threading
 import time
 from urllib.parse import parse_qs, urlparse
 
+from helpers.metrics import Counter
+
 ORDERS_RECHECK_SECONDS = int(os.getenv("ORDERS_RECHECK_SECONDS", str(24 * 3600)))
 
+ORDER_OUTCOMES = Counter(
+    "orders_total",
+    "Orders a scrape returned, by order_status: available (PDF in S3), "
+    "not_uploaded (the court published no file) or unavailable (fetch or "
+    "store failed).",
+    labels=("court", "status"),
+)
+
 
 def orders_stamp() -> float:
     return time.time()
@@ -35,6 +46,15 @@ def cached_case_needs_orders(existing_case) -> bool:
         return True
 
 
+def record_order_outcomes(court: str, orders) -> None:
+    """Count a scrape's orders. Courts that set no order_status count an
+    order with a link as available and one without as unavailable."""
+    for order in orders:
+        status = order.get("order_status") or (
+            "available" if order.get("order_link") else "unavailable")
+        ORDER_OUTCOMES.inc(court=court, status=status)
+
+
 def stable_order_doc_id(source_ref: str) -> str:
     return hashlib.md5(source_ref.encode("utf-8")).hexdigest()[:12]
 
@@ -45,7 +65,78 @@ def order_pdf_s3_key(orders_prefix: str, order_date: str, source_ref: str) -> st
     return f"{orders_prefix}order-{date_slug}-{stable_order_doc_id(source_ref)}.pdf"
 
 
+ORDER_KEY_DOC_ID_RE = re.compile(r"-([0-9a-f]{12})\.pdf$")
+
+
+def stored_order_links(existing_case) -> dict:
+    """Links of the orders a stored case already holds a PDF for, keyed by
+    the stable_order_doc_id that order_pdf_s3_key embeds in the link.
+
+    Lets a refresh skip display_pdf / download / S3 work for every order it
+    has seen before and only touch new ones. Orders saved before
+    order_status existed count as available when they have a link.
+    """
+    links = {}
+    for order in (existing_case or {}).get("orders") or []:
+        link = order.get("order_link")
+        if not link or order.get("order_status", "available") != "available":
+            continue
+        match = ORDER_KEY_DOC_ID_RE.search(link)
+        if match:
+            links[match.group(1)] = link
+    return links
+
+
 def hc_source_ref(pdf_url: str) -> str:
     query = parse_qs(urlparse(pdf_url).query)
     values = query.get("filename")
     return values[0] if values else pdf_url
+
+
+class OrderKeyIndex:
+    """Which order PDFs already exist under one S3 prefix.
+
+    One paginated list_objects_v2 replaces a head_object per order, so a
+    refresh of a case with a hundred stored orders costs one S3 round trip.
+    The listing happens on the first lookup; if it fails (e.g. the role lacks
+    s3:ListBucket) lookups fall back to head_object.
+    """
+
+    def __init__(self, s3_client, bucket, prefix):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self._keys = None
+        self._listed = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._listed:
+                return
+            self._listed = True
+            try:
+                keys = set()
+                paginator = self.s3_client.get_paginator("list_objects_v2")
+                for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+                    keys.update(obj["Key"] for obj in page.get("Contents", []))
+                self._keys = keys
+            except Exception as exc:
+                print(f"[orders] listing {self.prefix} failed, checking per order: {exc}")
+
+    def has(self, key):
+        self._load()
+        if self._keys is not None:
+            return key in self._keys
+        try:
+            self.s3_client.head_object(Bucket=self.bucket, Key=key)
+        except self.s3_client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] != "404":
+                raise
+            return False
+        return True
+
+    def add(self, key):
+        with self._lock:
+            if self._keys is not None:
+                self._keys.add(key)
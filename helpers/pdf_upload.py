@@ -0,0 +1,143 @@
+import base64
+import os
+import re
+
+# S3 wants every multipart part but the last to be at least 5 MiB. Bodies
+# smaller than one part go up with a single put_object.
+PART_SIZE = max(int(os.getenv("ORDER_PDF_PART_SIZE", str(8 * 1024 * 1024))), 5 * 1024 * 1024)
+CHUNK_SIZE = 64 * 1024
+
+# Courts leak a BOM (or a stray newline) ahead of the %PDF header; anything
+# that has no header within this many bytes is not a PDF.
+SNIFF_BYTES = 1024
+
+_NOT_BASE64_RE = re.compile(r"[^A-Za-z0-9+/=]")
+
+
+class NotAPdfError(Exception):
+    """The body did not start with a PDF header. `head` holds the first bytes
+    so callers can tell an "order not uploaded" page from a real failure."""
+
+    def __init__(self, head):
+        super().__init__(f"not a PDF (starts {head[:40]!r})")
+        self.head = head
+
+
+class PdfUpload:
+    """Streams one PDF into S3 with memory bounded by PART_SIZE.
+
+    Feed it the body chunk by chunk. The first SNIFF_BYTES are held back to
+    find the %PDF header and drop whatever precedes it; after that, data is
+    buffered only until a full part is ready. `feed` returns True when a part
+    should be flushed, so async callers can push the S3 call off the loop:
+
+        if upload.feed(chunk):
+            await asyncio.to_thread(upload.flush)
+        await asyncio.to_thread(upload.finish)
+    """
+
+    def __init__(self, s3_client, bucket, key, require_pdf=True, part_size=PART_SIZE):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.require_pdf = require_pdf
+        self.part_size = part_size
+        self.size = 0
+        self._buffer = bytearray()
+        self._sniffed = False
+        self._upload_id = None
+        self._parts = []
+
+    def _sniff(self, final=False):
+        if len(self._buffer) < SNIFF_BYTES and not final:
+            return
+        start = self._buffer.find(b"%PDF", 0, SNIFF_BYTES)
+        if start < 0:
+            if self.require_pdf:
+                raise NotAPdfError(bytes(self._buffer[:SNIFF_BYTES]))
+            start = 0
+        del self._buffer[:start]
+        self._sniffed = True
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        if not self._sniffed:
+            self._sniff()
+        return self._sniffed and len(self._buffer) >= self.part_size
+
+    def flush(self):
+        if self._upload_id is None:
+            self._upload_id = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                ContentType="application/pdf",
+                ContentDisposition="inline",
+            )["UploadId"]
+
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+
+    def _upload_part(self, body):
+        number = len(self._parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=number,
+            Body=body,
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+        self.size += len(body)
+
+    def finish(self):
+        """Upload what is left and return the stored size in bytes."""
+        if not self._sniffed:
+            self._sniff(final=True)
+
+        if self._upload_id is None:
+            body = bytes(self._buffer)
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=body,
+                ContentType="application/pdf",
+                ContentDisposition="inline",
+            )
+            self.size = len(body)
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+
+        self._buffer = bytearray()
+        return self.size
+
+    def abort(self):
+        """Drop a half-done multipart upload so S3 does not bill for its parts."""
+        self._buffer = bytearray()
+        if self._upload_id is None:
+            return
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+        except Exception as exc:
+            print(f"[orders] abort of multipart upload {self.key} failed: {exc}")
+        self._upload_id = None
+
+
+def iter_base64(data, chunk_size=CHUNK_SIZE):
+    """Decode a base64 string a slice at a time, so a large embedded PDF is
+    never held decoded in full. Slices are 4-character aligned; input with
+    line breaks or other padding falls back to one whole decode."""
+    if _NOT_BASE64_RE.search(data):
+        yield base64.b64decode(data)
+        return
+    step = chunk_size // 3 * 4
+    for start in range(0, len(data), step):
+        yield base64.b64decode(data[start:start + step])
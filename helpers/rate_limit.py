@@ -0,0 +1,143 @@
+import asyncio
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from helpers.metrics import Counter, Histogram
+
+# Requests per second each upstream host starts at, and the range AIMD keeps
+# it in. BURST requests can go out back to back on an idle host.
+RATE_INITIAL = float(os.getenv("UPSTREAM_RATE_INITIAL", "1.0"))
+RATE_MIN = float(os.getenv("UPSTREAM_RATE_MIN", "0.2"))
+RATE_MAX = float(os.getenv("UPSTREAM_RATE_MAX", "4.0"))
+RATE_BURST = float(os.getenv("UPSTREAM_RATE_BURST", "2"))
+# Every clean response adds RATE_STEP req/s; a push back multiplies the rate
+# by RATE_BACKOFF. Push backs inside RATE_BACKOFF_HOLD seconds of the last
+# cut are one event - requests already in flight all see the same block.
+RATE_STEP = float(os.getenv("UPSTREAM_RATE_STEP", "0.05"))
+RATE_BACKOFF = float(os.getenv("UPSTREAM_RATE_BACKOFF", "0.5"))
+RATE_BACKOFF_HOLD_SECONDS = float(os.getenv("UPSTREAM_RATE_BACKOFF_HOLD", "5"))
+
+# 403 (hcservices), 405 (the eCourts throttle stub), plus the generic ones.
+THROTTLE_STATUSES = {403, 405, 429, 503}
+
+UPSTREAM_THROTTLES = Counter(
+    "upstream_throttle_signals_total",
+    "Push backs seen per upstream host: throttle statuses, block pages and "
+    "dropped connections.",
+    labels=("host",),
+)
+UPSTREAM_CALLS = Counter(
+    "upstream_calls_total",
+    "Upstream HTTP calls per host by response status, or dropped / timeout "
+    "when none came back. Hosts reached through a proxy read host@proxy.",
+    labels=("host", "status"),
+)
+UPSTREAM_RATE_WAIT_SECONDS = Histogram(
+    "upstream_rate_wait_seconds",
+    "Time a request waited for its upstream host's rate limiter.",
+    labels=("host",),
+)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class HostLimiter:
+    """Token bucket for one upstream host whose rate follows AIMD.
+
+    Callers reserve a slot and sleep outside the lock, so the same limiter
+    paces threadpool routes (wait) and event-loop routes (wait_async).
+    Limits are per worker process.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.rate = RATE_INITIAL
+        self._tokens = RATE_BURST
+        self._updated = time.monotonic()
+        self._last_backoff = float("-inf")
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token, going into debt if none is left; returns how long
+        the caller has to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                RATE_BURST, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        UPSTREAM_RATE_WAIT_SECONDS.observe(delay, host=self.host)
+        return delay
+
+    def wait(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def record(self, status_code, blocked=False):
+        UPSTREAM_CALLS.inc(host=self.host, status=status_code)
+        if blocked or status_code in THROTTLE_STATUSES:
+            self.throttled()
+            return
+        with self._lock:
+            if time.monotonic() - self._last_backoff >= RATE_BACKOFF_HOLD_SECONDS:
+                self.rate = min(RATE_MAX, self.rate + RATE_STEP)
+
+    def dropped(self):
+        """The connection went away before a response - a push back."""
+        UPSTREAM_CALLS.inc(host=self.host, status="dropped")
+        self.throttled()
+
+    def timed_out(self):
+        UPSTREAM_CALLS.inc(host=self.host, status="timeout")
+
+    def throttled(self):
+        UPSTREAM_THROTTLES.inc(host=self.host)
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_backoff < RATE_BACKOFF_HOLD_SECONDS:
+                return
+            self._last_backoff = now
+            self.rate = max(RATE_MIN, self.rate * RATE_BACKOFF)
+            # no burst straight after a push back
+            self._tokens = min(self._tokens, 0.0)
+
+    def status(self):
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "tokens": round(self._tokens, 3),
+                "backed_off_ago": (
+                    round(time.monotonic() - self._last_backoff, 1)
+                    if self._last_backoff > float("-inf") else None
+                ),
+            }
+
+
+def limiter_for(url, egress=None):
+    """The shared limiter for url's host. Calls going out through a proxy
+    (egress, an egress_key) are paced apart from the direct ones - the
+    upstream sees a different IP."""
+    host = urlsplit(url).hostname or ""
+    if egress and egress != "direct":
+        host = f"{host}@{egress}"
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(host, HostLimiter(host))
+    return limiter
+
+
+def limiter_status():
+    with _limiters_lock:
+        limiters = sorted(_limiters.items())
+    return {host: limiter.status() for host, limiter in limiters}
@@ -1,13 +1,14 @@
 from http.client import RemoteDisconnected
-import random
 import requests
-import time
+
+from helpers.rate_limit import limiter_for
 
 
 def safe_get(session, url, params=None, max_retries=5,headers=None):
+    limiter = limiter_for(url)
     for attempt in range(max_retries):
         try:
-            time.sleep(random.uniform(1.5, 2.0))
+            limiter.wait()
 
             response = session.get(
                 url,
@@ -16,23 +17,27 @@ def safe_get(session, url, params=None, max_retries=5,headers=None):
                 headers=headers
             )
 
+            limiter.record(response.status_code)
             return response
 
         except (requests.exceptions.ConnectionError, RemoteDisconnected) as e:
             print(f"[warn] Server disconnected (attempt {attempt + 1})")
+            limiter.dropped()
 
             session.close()
             session = requests.Session()
 
         except requests.exceptions.Timeout:
             print(f"[warn] Timeout (attempt {attempt + 1})")
+            limiter.timed_out()
 
     raise Exception("[error] GET request failed after retries")
 
 def safe_post(session, url, data, headers,max_retries=5):
+    limiter = limiter_for(url)
     for attempt in range(max_retries):
         try:
-            time.sleep(random.uniform(1.5, 2.0))
+            limiter.wait()
 
             response = session.post(
                 url,
@@ -40,15 +45,18 @@ def safe_post(session, url, data, headers,max_retries=5):
                 timeout=(30, 180),
                 headers=headers
             )
+            limiter.record(response.status_code)
             return response
 
         except (requests.exceptions.ConnectionError, RemoteDisconnected) as e:
             print(f"[warn] Server disconnected (attempt {attempt+1})")
+            limiter.dropped()
 
             session.close()
             session = requests.Session()
 
         except requests.exceptions.Timeout:
             print(f"[warn] Timeout (attempt {attempt+1})")
+            limiter.timed_out()
 
     raise Exception("[error] eCourts viewHistory failed after retries")
@@ -0,0 +1,51 @@
+import asyncio
+
+from helpers.metrics import Counter
+
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Calls into a coalesced scrape: leader ran the upstream fetch, follower "
+    "joined one already in flight.",
+    labels=("flight", "role"),
+)
+
+
+def flight_key(*parts, **fields):
+    """Hashable key for a case identity such as a route's ac_query."""
+    return parts + tuple(sorted((name, str(value)) for name, value in fields.items()))
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one.
+
+    The first caller's coroutine runs; anyone arriving with the same key
+    before it finishes awaits that run and gets the same result (or
+    exception). Coalescing is per worker process.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._flights = {}
+
+    def _landed(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # every waiter may have gone away; don't leave the error unretrieved
+        if not flight.cancelled():
+            flight.exception()
+
+    async def run(self, key, work):
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(work())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._landed(key, done))
+            SINGLEFLIGHT_CALLS.inc(flight=self.name, role="leader")
+        else:
+            SINGLEFLIGHT_CALLS.inc(flight=self.name, role="follower")
+        # A client that disconnects cancels only its own wait, never the
+        # scrape the other callers are sharing.
+        return await asyncio.shield(flight)
+
+    def in_flight(self):
+        return len(self._flights)
@@ -1,5 +1,15 @@
+import base64
+import importlib.util
 import json
+import multiprocessing
+import os
 import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from helpers.metrics import Counter, Histogram
 
 
 # SCI serves arithmetic captchas ("8 + 5"), so the operator has to survive
@@ -9,6 +19,41 @@ MATH_CHARS = "+-x*"
 # OCR sometimes returns the typographic variants of the operators
 OPERATOR_LOOKALIKES = str.maketrans({"−": "-", "–": "-", "—": "-", "×": "x", "X": "x"})
 
+DEFAULT_FUNCTION_NAME = "GYL-MS-Swipe-Captcha-Solver-V1"
+
+# CAPTCHA_SOLVER picks the backend for every court; CAPTCHA_SOLVER_HC /
+# CAPTCHA_SOLVER_SCI override it for one `frm`. "chain" tries the backends in
+# CAPTCHA_SOLVER_CHAIN order until one gives a usable read.
+CAPTCHA_SOLVER = os.getenv("CAPTCHA_SOLVER", "lambda")
+CAPTCHA_SOLVER_CHAIN = os.getenv("CAPTCHA_SOLVER_CHAIN", "local,lambda")
+LOCAL_SOLVER_WORKERS = int(os.getenv("CAPTCHA_LOCAL_WORKERS", "2"))
+LOCAL_SOLVER_TIMEOUT_SECONDS = float(os.getenv("CAPTCHA_LOCAL_TIMEOUT", "5"))
+# the `frm` values callers solve for, each with its CAPTCHA_SOLVER_<FRM>
+SOLVER_FORMS = ("hc", "sci")
+
+CAPTCHA_SOLVE_SECONDS = Histogram(
+    "captcha_solve_seconds",
+    "Time one solver backend took to read one captcha image.",
+    labels=("court", "backend"),
+)
+CAPTCHA_READS = Counter(
+    "captcha_reads_total",
+    "Captcha reads by solver outcome: ok, empty (nothing usable) or error.",
+    labels=("court", "backend", "outcome"),
+)
+CAPTCHA_SUBMISSIONS = Counter(
+    "captcha_submissions_total",
+    "Solved captchas sent to the court, by the court's verdict: accepted, "
+    "rejected (wrong code) or nonce_failed (SCI form token went stale).",
+    labels=("court", "backend", "outcome"),
+)
+CAPTCHA_ATTEMPTS = Histogram(
+    "captcha_attempts_per_search",
+    "Captcha attempts a search used, by how the search ended.",
+    labels=("court", "outcome"),
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 12),
+)
+
 
 def clean_captcha_text(text, keep=""):
     if not text:
@@ -18,25 +63,179 @@ def clean_captcha_text(text, keep=""):
     return re.sub(r"[^" + allowed + r"]", "", normalized)
 
 
-def solve_captcha(lambda_client, image_base64, frm="hc", function_name="GYL-MS-Swipe-Captcha-Solver-V1"):
+def keep_chars(frm):
+    return MATH_CHARS if frm == "sci" else ""
 
-    try:
-        lambda_payload = {
-            "image_base64": image_base64,
-            "frm": frm
-        }
 
-        lambda_response = lambda_client.invoke(
-            FunctionName=function_name,
+class LambdaCaptchaSolver:
+    """The hosted solver - one Lambda invoke per captcha."""
+
+    name = "lambda"
+
+    def __init__(self, lambda_client, function_name=DEFAULT_FUNCTION_NAME):
+        self.lambda_client = lambda_client
+        self.function_name = function_name
+
+    def read(self, image_base64, frm):
+        lambda_response = self.lambda_client.invoke(
+            FunctionName=self.function_name,
             InvocationType="RequestResponse",
-            Payload=json.dumps(lambda_payload)
+            Payload=json.dumps({"image_base64": image_base64, "frm": frm})
         )
+        lambda_data = json.loads(lambda_response["Payload"].read().decode())
+        return lambda_data.get("text")
+
+
+_local_engine = None
+
+
+def _load_local_engine():
+    global _local_engine
+    # imported in the pool workers only, so the serving process never loads
+    # the model or onnxruntime
+    import ddddocr
+
+    _local_engine = ddddocr.DdddOcr(show_ad=False)
+
+
+def _local_read(image_base64):
+    return _local_engine.classification(base64.b64decode(image_base64))
+
+
+class LocalCaptchaSolver:
+    """OCR inside the container, on a small process pool so the model's CPU
+    work never holds the GIL of the worker serving requests."""
+
+    name = "local"
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                if importlib.util.find_spec("ddddocr") is None:
+                    raise RuntimeError(
+                        "the local captcha solver needs the ddddocr package")
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=LOCAL_SOLVER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_load_local_engine,
+                )
+            return cls._executor
+
+    def read(self, image_base64, frm):
+        try:
+            future = self.executor().submit(_local_read, image_base64)
+            return future.result(timeout=LOCAL_SOLVER_TIMEOUT_SECONDS)
+        except BrokenProcessPool:
+            # a crashed OCR worker poisons the whole pool; start a new one on
+            # the next captcha instead of failing every read from here on
+            with self._executor_lock:
+                broken, LocalCaptchaSolver._executor = LocalCaptchaSolver._executor, None
+            if broken is not None:
+                broken.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+class ChainCaptchaSolver:
+    """Try each backend in turn; the first usable read wins."""
+
+    name = "chain"
 
-        response_payload = lambda_response["Payload"].read().decode()
-        lambda_data = json.loads(response_payload)
+    def __init__(self, solvers):
+        self.solvers = solvers
 
-        keep = MATH_CHARS if frm == "sci" else ""
-        return clean_captcha_text(lambda_data.get("text"), keep=keep) or None
+    def read(self, image_base64, frm, court=None):
+        for solver in self.solvers:
+            try:
+                text = observed_read(solver, image_base64, frm, court or frm)
+            except Exception as e:
+                print(f"[captcha] {solver.name} solver failed: {e}")
+                continue
+            if clean_captcha_text(text, keep=keep_chars(frm)):
+                return text
+        return None
+
+
+def _backend(name, lambda_client, function_name):
+    if name == "lambda":
+        return LambdaCaptchaSolver(lambda_client, function_name)
+    if name == "local":
+        return LocalCaptchaSolver()
+    raise ValueError(f"unknown captcha solver backend {name!r}")
+
+
+def solver_name(frm):
+    return os.getenv(f"CAPTCHA_SOLVER_{frm.upper()}", CAPTCHA_SOLVER)
+
+
+def _backend_names(frm):
+    name = solver_name(frm)
+    if name != "chain":
+        return [name]
+    return [part.strip() for part in CAPTCHA_SOLVER_CHAIN.split(",") if part.strip()]
+
+
+def check_solver_config():
+    """Fail at startup, not on the first captcha, when a court is configured
+    for a backend that does not exist or cannot run in this image."""
+    names = {name for frm in SOLVER_FORMS for name in _backend_names(frm)}
+    unknown = names - {"lambda", "local"}
+    if unknown:
+        raise ValueError(f"unknown captcha solver backend(s) {', '.join(sorted(unknown))}")
+    if "local" in names and importlib.util.find_spec("ddddocr") is None:
+        raise RuntimeError(
+            "CAPTCHA_SOLVER selects the local captcha solver but the ddddocr "
+            "package is not installed")
+
+
+def solver_for(frm, lambda_client, function_name=DEFAULT_FUNCTION_NAME):
+    if solver_name(frm) != "chain":
+        return _backend(solver_name(frm), lambda_client, function_name)
+    return ChainCaptchaSolver([
+        _backend(name, lambda_client, function_name) for name in _backend_names(frm)
+    ])
+
+
+def observed_read(solver, image_base64, frm, court):
+    started = time.perf_counter()
+    try:
+        text = solver.read(image_base64, frm)
+    except Exception:
+        CAPTCHA_READS.inc(court=court, backend=solver.name, outcome="error")
+        raise
+    finally:
+        CAPTCHA_SOLVE_SECONDS.observe(
+            time.perf_counter() - started, court=court, backend=solver.name)
+
+    usable = clean_captcha_text(text, keep=keep_chars(frm))
+    CAPTCHA_READS.inc(
+        court=court, backend=solver.name, outcome="ok" if usable else "empty")
+    return text
+
+
+def record_captcha_verdict(court, outcome, frm="hc"):
+    """Count the court's answer to a submitted captcha. Backend is the one
+    configured for `frm` ("chain" when several may have produced the read)."""
+    CAPTCHA_SUBMISSIONS.inc(court=court, backend=solver_name(frm), outcome=outcome)
+
+
+def record_captcha_search(court, attempts, solved):
+    CAPTCHA_ATTEMPTS.observe(
+        attempts, court=court, outcome="success" if solved else "exhausted")
+
+
+def solve_captcha(lambda_client, image_base64, frm="hc", function_name=DEFAULT_FUNCTION_NAME,
+                  court=None):
+
+    try:
+        solver = solver_for(frm, lambda_client, function_name)
+        if isinstance(solver, ChainCaptchaSolver):
+            text = solver.read(image_base64, frm, court=court or frm)
+        else:
+            text = observed_read(solver, image_base64, frm, court or frm)
+        return clean_captcha_text(text, keep=keep_chars(frm)) or None
 
     except Exception as e:
         print(f"Error solving captcha: {e}")
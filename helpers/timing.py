@@ -0,0 +1,164 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import time
+
+import sentry_sdk
+
+from helpers.metrics import Histogram
+
+# Send a Server-Timing header with every response that ran a stage. Off by
+# default - it shows any caller where the request spent its time upstream.
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "0") == "1"
+
+SCRAPE_STAGE_SECONDS = Histogram(
+    "scrape_stage_seconds",
+    "Time one stage of a scrape took (session, gate, captcha, search, "
+    "history, parse, s3_metadata, orders, mongo_lookup, mongo_save...), by "
+    "the route that ran it; background for the pool warmer and job workers.",
+    labels=("route", "stage"),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time the app took to answer a request, by route template and status; "
+    "unmatched for paths no route serves.",
+    labels=("method", "route", "status"),
+)
+
+_current = contextvars.ContextVar("stage_timings", default=None)
+
+
+class StageTimings:
+    """Per-stage durations of one request.
+
+    A stage that runs more than once (captcha retries, orders fetched in
+    parallel) adds up, so the stages together can exceed the request's
+    wall time.
+    """
+
+    def __init__(self, scope):
+        self._scope = scope
+        self._stages = {}
+        self.started = time.perf_counter()
+
+    @property
+    def route(self):
+        # set once the router has matched, which is before any stage runs
+        route = self._scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+    def add(self, stage, seconds):
+        total, count = self._stages.get(stage, (0.0, 0))
+        self._stages[stage] = (total + seconds, count + 1)
+
+    def as_dict(self):
+        """{stage: {"ms": total, "count": runs}} in the order stages first ran."""
+        return {
+            stage: {"ms": round(total * 1000, 1), "count": count}
+            for stage, (total, count) in list(self._stages.items())
+        }
+
+    def server_timing(self):
+        entries = []
+        for stage, (total, count) in list(self._stages.items()):
+            entry = f"{stage};dur={total * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="x{count}"'
+            entries.append(entry)
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def record(stage, seconds):
+    timings = _current.get()
+    SCRAPE_STAGE_SECONDS.observe(
+        seconds, route=timings.route if timings else "background", stage=stage)
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time the block as one stage of the current request, inside a Sentry
+    span of the same name. Works around awaits as well as blocking code."""
+    started = time.perf_counter()
+    with sentry_sdk.start_span(op=f"scrape.{name}", name=name):
+        try:
+            yield
+        finally:
+            record(name, time.perf_counter() - started)
+
+
+def timed(name):
+    """Decorator form of stage() for sync and async functions."""
+
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def _report_to_sentry(timings):
+    stages = timings.as_dict()
+    if not stages:
+        return
+    # on the request's scope, so an error event shows where the time went
+    sentry_sdk.set_context("stages", stages)
+    transaction = sentry_sdk.get_current_scope().transaction
+    if transaction is not None:
+        for stage_name, entry in stages.items():
+            transaction.set_data(f"stage.{stage_name}.ms", entry["ms"])
+
+
+class StageTimingMiddleware:
+    """Collects the stages each HTTP request runs, attaches them to its Sentry
+    transaction and, with SERVER_TIMING=1, sends them as Server-Timing. Also
+    records the request itself in http_request_duration_seconds.
+
+    The header goes out with the response head, so stages a streamed
+    response runs after that only reach Sentry and the histogram.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = StageTimings(scope)
+        token = _current.set(timings)
+        # an app that fails before answering is a 500 to the client
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING_ENABLED and timings.as_dict():
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - timings.started,
+                method=scope["method"], route=timings.route, status=status)
+            _report_to_sentry(timings)
+            _current.reset(token)
@@ -0,0 +1,228 @@
+import os
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # pragma: no cover - districtcourt falls back to BeautifulSoup
+    lxml_html = None
+
+# "lxml" walks the viewHistory markup once; "soup" runs the BeautifulSoup
+# extractors in districtcourt, which stay the reference implementation.
+DC_HISTORY_PARSER = os.getenv("DC_HISTORY_PARSER", "lxml")
+
+CASE_STATUS_CLASS = "table case_status_table table-bordered"
+CASE_DETAILS_CLASS = "table case_details_table table-bordered"
+PETITIONER_CLASS = (
+    "table table-bordered Petitioner_Advocate_table petitioner-advocate-list border")
+RESPONDENT_CLASS = (
+    "table table-bordered Respondent_Advocate_table respondent-advocate-list border")
+FIR_CLASS = "FIR_details_table"
+ACTS_CLASS = "table acts_table table-bordered"
+HISTORY_CLASS = "history_table"
+TRANSFER_CLASS = "transfer_table table"
+ORDER_CLASS = "order_table"
+HEADINGS = {"h2", "h3", "h4"}
+
+
+def fast_parser_enabled():
+    return DC_HISTORY_PARSER == "lxml" and lxml_html is not None
+
+
+def empty_view_history():
+    return {
+        "case_status": {},
+        "case_details": {},
+        "petitioner_and_advocate": [],
+        "respondent_and_advocate": [],
+        "fir_details": {},
+        "actsandSection": {"acts": "null", "section": "null"},
+        "case_history": [],
+        "case_transfer": [],
+        "order_rows": [],
+    }
+
+
+# The helpers below reproduce BeautifulSoup's matching and text rules, so the
+# output is identical to the extract_* functions in districtcourt.
+
+def _class_is(classes, wanted):
+    """BeautifulSoup's class match: one of the classes, or the whole list."""
+    return wanted in classes or " ".join(classes) == wanted
+
+
+def _text(el):
+    """Tag.text"""
+    return "".join(el.itertext())
+
+
+def _joined(el, separator=""):
+    """Tag.get_text(separator, strip=True)"""
+    return separator.join(s.strip() for s in el.itertext() if s.strip())
+
+
+def _sanitize(data):
+    return {key.replace(".", "").replace("$", ""): value for key, value in data.items()}
+
+
+def _table_pairs(table, data):
+    for row in table.iter("tr"):
+        cells = list(row.iter("th", "td"))
+        if not cells:
+            continue
+
+        headers = [cell for cell in cells if cell.tag == "th"]
+        values = [cell for cell in cells if cell.tag == "td"]
+
+        if headers and values:
+            for h, v in zip(headers, values):
+                key = "".join(_joined(h).replace(":", "").split())
+                value = _joined(v, " ")
+
+                if "CNR" in key:
+                    span = next(v.iter("span"), None)
+                    if span is not None:
+                        value = _joined(span)
+
+                if key:
+                    data[key] = value
+
+        elif len(cells) >= 2:
+            key = "".join(_joined(cells[0], " ").replace(":", "").split())
+            if key:
+                data[key] = _joined(cells[1], " ")
+
+
+def _list_items(ul):
+    return [_joined(item, " ") for item in ul.iter("li")]
+
+
+def _fir_details(table):
+    details = {}
+    for row in table.iter("tr"):
+        cols = list(row.iter("td"))
+        if len(cols) == 2:
+            details[_joined(cols[0]).replace(" ", "")] = _joined(cols[1])
+    return details
+
+
+def _case_history(table):
+    history = []
+    for row in table.iter("tr"):
+        cols = list(row.iter("td"))
+        if len(cols) >= 4:
+            link = next(cols[1].iter("a"), None)
+            history.append({
+                "judge": _text(cols[0]).strip(),
+                "businessOnDate": _text(link).strip() if link is not None else _text(cols[2]).strip(),
+                "hearingDate": _text(cols[2]).strip(),
+                "purpose": _text(cols[3]).strip(),
+                "inputType": "automatic",
+                "lawyerRemark": "null"
+            })
+    return history
+
+
+def _case_transfer(table):
+    transfers = []
+    for row in list(table.iter("tr"))[1:]:
+        cols = list(row.iter("td"))
+        if len(cols) >= 4:
+            transfers.append({
+                "registrationNumber": _text(cols[0]).strip(),
+                "transferDate": _text(cols[1]).strip(),
+                "fromCourt": _text(cols[2]).strip(),
+                "toCourt": _text(cols[3]).strip(),
+                "inputType": "automatic",
+                "lawyerRemark": None
+            })
+    return transfers
+
+
+def _acts_and_sections(table, current):
+    for row in list(table.iter("tr"))[1:]:
+        cells = list(row.iter("td"))
+        if len(cells) == 2:
+            current = {"acts": _joined(cells[0]), "section": _joined(cells[1])}
+    return current
+
+
+def _order_type(heading):
+    text = _joined(heading, " ").lower() if heading is not None else ""
+    if "final" in text or "judgement" in text or "judgment" in text:
+        return "final"
+    if "interim" in text:
+        return "interim"
+    return "order"
+
+
+def _order_rows(table, order_type):
+    rows = []
+    for row in table.iter("tr"):
+        anchor = next(
+            (a for a in row.iter("a") if "displayPdf" in (a.get("onclick") or "")),
+            None,
+        )
+        rows.append({
+            "order_type": order_type,
+            "header": next(row.iter("th"), None) is not None,
+            "cells": [_text(td).strip() for td in row.iter("td")],
+            "onclick": anchor.get("onclick") if anchor is not None else None,
+        })
+    return rows
+
+
+def parse_view_history(markup):
+    """Every section of a viewHistory / viewCNRHistory fragment in one walk.
+
+    Returns the same pieces the districtcourt extractors build one find_all
+    at a time, plus the order table rows that fetch_and_store_orders reads.
+    """
+    parsed = empty_view_history()
+    if not markup or not markup.strip():
+        return parsed
+
+    status, details = {}, {}
+    # The single-table sections use the first match only, like soup.find().
+    found = set()
+    heading = None
+
+    for el in lxml_html.document_fromstring(markup).iter():
+        tag = el.tag
+        if tag in HEADINGS:
+            heading = el
+            continue
+
+        if tag == "ul":
+            classes = (el.get("class") or "").split()
+            for section, wanted in (("petitioner_and_advocate", PETITIONER_CLASS),
+                                    ("respondent_and_advocate", RESPONDENT_CLASS)):
+                if section not in found and _class_is(classes, wanted):
+                    found.add(section)
+                    parsed[section] = _list_items(el)
+            continue
+
+        if tag != "table":
+            continue
+
+        classes = (el.get("class") or "").split()
+        if _class_is(classes, CASE_STATUS_CLASS):
+            _table_pairs(el, status)
+        if _class_is(classes, CASE_DETAILS_CLASS):
+            _table_pairs(el, details)
+        if "fir_details" not in found and FIR_CLASS in " ".join(classes):
+            found.add("fir_details")
+            parsed["fir_details"] = _fir_details(el)
+        if "actsandSection" not in found and _class_is(classes, ACTS_CLASS):
+            found.add("actsandSection")
+            parsed["actsandSection"] = _acts_and_sections(el, parsed["actsandSection"])
+        if "case_history" not in found and _class_is(classes, HISTORY_CLASS):
+            found.add("case_history")
+            parsed["case_history"] = _case_history(el)
+        if "case_transfer" not in found and _class_is(classes, TRANSFER_CLASS):
+            found.add("case_transfer")
+            parsed["case_transfer"] = _case_transfer(el)
+        if _class_is(classes, ORDER_CLASS):
+            parsed["order_rows"].extend(_order_rows(el, _order_type(heading)))
+
+    parsed["case_status"] = _sanitize(status)
+    parsed["case_details"] = _sanitize(details)
+    return parsed
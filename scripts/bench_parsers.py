@@ -0,0 +1,294 @@
+"""Time every court's parsers on the recorded responses in
+scripts/fixtures/parsers and compare them with the saved baseline.
+
+    python -m scripts.bench_parsers                  # run, exit 1 on a regression
+    python -m scripts.bench_parsers -k hc3.          # only names containing "hc3."
+    python -m scripts.bench_parsers --save-baseline  # record this machine's numbers
+
+Each benchmark reports microseconds per case (best of --rounds) and the
+peak memory a single call allocates (tracemalloc). It regresses when it
+runs more than --tolerance slower, or peaks more than --alloc-tolerance
+higher, than the baseline. Allocations compare anywhere; timings only
+when the baseline was recorded on this host and Python version.
+
+Parsers that also store orders run against a fully synced case (every
+order already known) and an S3 client that drops writes, so nothing here
+touches the network.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+from collections import namedtuple
+
+from bs4 import BeautifulSoup
+
+from api.v1 import cc, districtcourt, hc2, hc3, nclt, sci
+from helpers.orders import hc_source_ref, stable_order_doc_id
+from helpers.view_history import lxml_html, parse_view_history
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "parsers")
+BASELINE = os.path.join(FIXTURES, "baseline.json")
+
+Benchmark = namedtuple("Benchmark", "name run cases")
+
+
+class _NullS3:
+    """Accepts the case JSON parse_case_history uploads and drops it."""
+
+    def put_object(self, **kwargs):
+        return {}
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def known_orders(markup):
+    """Every display_pdf.php order on the page, as already stored."""
+    soup = BeautifulSoup(markup, "html.parser")
+    return {
+        stable_order_doc_id(hc_source_ref(a["href"])): f"s3://fixtures/{a['href']}"
+        for a in soup.find_all("a", href=True)
+        if "display_pdf.php" in a["href"]
+    }
+
+
+def on_soup(prefix, markup, extractors):
+    """One benchmark per extractor, all reading the same pre-built soup so
+    the parse itself is not counted again."""
+    soup = BeautifulSoup(markup, "html.parser")
+    return [
+        Benchmark(f"{prefix}.{name}", lambda fn=fn: fn(soup), 1)
+        for name, fn in extractors
+    ]
+
+
+def dc_benchmarks():
+    page = fixture("dc_view_history.html")
+    cnr_page = json.loads(fixture("dc_cnr_history.json"))["data_list"]
+
+    benches = [
+        Benchmark("dc.parse_view_history_soup", lambda: districtcourt.parse_view_history_soup(page), 1),
+        Benchmark("dc.parse_view_history_soup.cnr", lambda: districtcourt.parse_view_history_soup(cnr_page), 1),
+    ]
+    if lxml_html is not None:
+        benches += [
+            Benchmark("dc.parse_view_history", lambda: parse_view_history(page), 1),
+            Benchmark("dc.parse_view_history.cnr", lambda: parse_view_history(cnr_page), 1),
+        ]
+
+    return benches + on_soup("dc", page, [
+        ("extract_table_data", lambda soup: districtcourt.extract_table_data(
+            soup, "table case_details_table table-bordered")),
+        ("extract_list_data", lambda soup: districtcourt.extract_list_data(
+            soup, "table table-bordered Petitioner_Advocate_table petitioner-advocate-list border")),
+        ("extract_fir_details", lambda soup: districtcourt.extract_fir_details(soup, "FIR_details_table")),
+        ("extract_case_history", districtcourt.extract_case_history),
+        ("extract_case_transfer", districtcourt.extract_case_transfer),
+        ("extract_acts_and_sections", districtcourt.extract_acts_and_sections),
+        ("extract_order_rows", districtcourt.extract_order_rows),
+    ])
+
+
+def hc3_benchmarks():
+    page = fixture("hc3_case_history.html")
+    records = fixture("hc3_case_records.txt")
+    orders = known_orders(page)
+    context = {
+        "case_no": "201010043212021", "case_reg_no": "4321", "rgyear": "2021",
+        "cino": "DLHC010123452021", "court_code": "1", "state_code": "26",
+        "dist_code": "1", "court_complex_code": "1", "case_type": "101",
+    }
+
+    return [
+        Benchmark("hc3.parse_case_records", lambda: hc3.parse_case_records(records),
+                  len(hc3.parse_case_records(records))),
+        Benchmark("hc3.parse_case_history",
+                  lambda: hc3.parse_case_history(page, context, None, known_orders=orders), 1),
+    ] + on_soup("hc3", page, [
+        (name, getattr(hc3, name)) for name in (
+            "extract_case_details", "extract_case_status", "extract_acts",
+            "extract_category_details", "extract_subordinate_court_info",
+            "extract_sub_matters", "extract_ia_details", "extract_case_conversion",
+            "extract_case_history", "extract_objections", "extract_document_details",
+            "extract_orders",
+        )
+    ] + [
+        ("extract_parties", lambda soup: hc3.extract_parties(soup, "Petitioner_Advocate_table")),
+    ])
+
+
+def hc2_benchmarks():
+    page = fixture("hc2_case_history.html")
+    orders = known_orders(page)
+    payload = {
+        "case_no": "567", "rgyear": "2020", "court_code": "1", "state_code": "5",
+        "dist_code": "1", "case_type": "52", "CaseType": "CRM-M",
+    }
+    second_payload = {"case_no": "205200005672020", "cino": "HRHC010056782020"}
+
+    return [
+        Benchmark("hc2.parse_case_history",
+                  lambda: hc2.parse_case_history(page, payload, second_payload, None,
+                                                 known_orders=orders), 1),
+    ] + on_soup("hc2", page, [
+        ("extract_table_data", lambda soup: hc2.extract_table_data(
+            soup, "Case Details", ["Filing Number", "Registration Number", "CNR Number"])),
+        ("extract_party_details", lambda soup: hc2.extract_party_details(
+            soup, "Petitioner_Advocate_table")),
+        ("extract_subordinate_court_info", hc2.extract_subordinate_court_info),
+        ("extract_high_court_case_history", hc2.extract_high_court_case_history),
+    ])
+
+
+def sci_benchmarks():
+    details = fixture("sci_case_details.html")
+    listing = fixture("sci_listing_dates.html")
+    orders = fixture("sci_judgement_orders.html")
+    results = fixture("sci_aor_results.html")
+    case_data = sci.CaseRequest(case_no="12345", rgyear="2023")
+    rows = len(sci.extract_case_data(results, "P"))
+
+    return [
+        Benchmark("sci.parse_case_history", lambda: sci.parse_case_history(details, case_data), 1),
+        Benchmark("sci.parse_listing_dates", lambda: sci.parse_listing_dates(listing), 1),
+        Benchmark("sci.parse_order_links", lambda: sci.parse_order_links(orders), 1),
+        Benchmark("sci.extract_case_data", lambda: sci.extract_case_data(results, "P"), rows),
+        Benchmark("sci.extract_party_name_data", lambda: sci.extract_party_name_data(results, "P"), rows),
+    ]
+
+
+def json_benchmarks():
+    cc_raw = fixture("cc_case.json")
+    nclt_search = fixture("nclt_case_search.json")
+    nclt_details = fixture("nclt_case_details.json")
+    nclt_query = {"case_type": "16", "case_reg_no": "123", "rgyear": "2023",
+                  "state_code": "7", "dist_code": "1", "court_complex_code": "7"}
+
+    return [
+        Benchmark("cc.transform_case_data", lambda: cc.transform_case_data(
+            json.loads(cc_raw), "DC/77/CC/123/2022", fetch_orders=False), 1),
+        Benchmark("nclt.transform_case_data", lambda: nclt.transform_case_data(
+            nclt_query, json.loads(nclt_search), json.loads(nclt_details),
+            fetch_orders=False), 1),
+    ]
+
+
+def benchmarks():
+    return (dc_benchmarks() + hc3_benchmarks() + hc2_benchmarks()
+            + sci_benchmarks() + json_benchmarks())
+
+
+@contextlib.contextmanager
+def offline():
+    """Null S3 for the case JSON upload, and the per-call order logging
+    sent to /dev/null so it does not swamp the report."""
+    saved = {module: module.s3_client for module in (hc2, hc3)}
+    for module in saved:
+        module.s3_client = _NullS3()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        for module, client in saved.items():
+            module.s3_client = client
+
+
+def measure(bench, rounds):
+    """(µs per case, peak KiB of one call)"""
+    bench.run()
+    timer = timeit.Timer(bench.run)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=rounds, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        bench.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return best * 1e6 / bench.cases, peak / 1024
+
+
+def host_tag():
+    return f"{platform.node()} / Python {platform.python_version()}"
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE):
+        return {"host": host_tag(), "benchmarks": {}}
+    with open(BASELINE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verdict(result, base, tolerance, alloc_tolerance, compare_time):
+    if not base:
+        return "new"
+    if compare_time and result["us_per_case"] > base["us_per_case"] * (1 + tolerance):
+        return "SLOWER"
+    if result["peak_kib"] > base["peak_kib"] * (1 + alloc_tolerance):
+        return "MORE MEMORY"
+    return "ok"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="match", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--tolerance", type=float,
+                        default=float(os.getenv("BENCH_TOLERANCE", "0.5")))
+    parser.add_argument("--alloc-tolerance", type=float,
+                        default=float(os.getenv("BENCH_ALLOC_TOLERANCE", "0.10")))
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline()
+    compare_time = baseline["host"] == host_tag()
+    if not compare_time:
+        print(f"baseline timings are from {baseline['host']}; comparing allocations only")
+    results = {}
+    regressions = []
+
+    print(f"{'benchmark':<46}{'us/case':>11}{'peak KiB':>11}{'baseline':>11}  status")
+    for bench in benchmarks():
+        if args.match not in bench.name:
+            continue
+
+        with offline():
+            us, kib = measure(bench, args.rounds)
+        result = {"us_per_case": round(us, 1), "peak_kib": round(kib, 1)}
+        results[bench.name] = result
+
+        base = baseline["benchmarks"].get(bench.name)
+        status = verdict(result, base, args.tolerance, args.alloc_tolerance, compare_time)
+        if status not in ("ok", "new"):
+            regressions.append(bench.name)
+
+        base_us = f"{base['us_per_case']:.1f}" if base else "-"
+        print(f"{bench.name:<46}{us:>11.1f}{kib:>11.1f}{base_us:>11}  {status}")
+
+    if args.save_baseline:
+        # timings from another host mean nothing next to this one's
+        kept = baseline["benchmarks"] if compare_time else {}
+        kept.update(results)
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump({"host": host_tag(), "benchmarks": dict(sorted(kept.items()))}, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved for {len(results)} benchmarks")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
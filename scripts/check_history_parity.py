@@ -0,0 +1,66 @@
+"""Run the lxml viewHistory parser and the BeautifulSoup extractors over
+captured pages and report every section where they disagree.
+
+    python -m scripts.check_history_parity captures/dc/
+
+Each capture is either the data_list HTML fragment or the JSON body
+viewHistory / viewCNRHistory returned. Exits 1 on any mismatch.
+"""
+import json
+import os
+import sys
+
+from api.v1.districtcourt import parse_view_history_soup
+from helpers.view_history import lxml_html, parse_view_history
+
+
+def captured_pages(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith((".html", ".htm", ".json")):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def load_markup(path):
+    with open(path, encoding="utf-8") as f:
+        raw = f.read()
+    if path.endswith(".json"):
+        return json.loads(raw).get("data_list", "")
+    return raw
+
+
+def main(paths):
+    if lxml_html is None:
+        print("lxml is not installed")
+        return 1
+    if not paths:
+        print(__doc__)
+        return 1
+
+    checked, mismatched = 0, 0
+    for path in captured_pages(paths):
+        markup = load_markup(path)
+        fast = parse_view_history(markup)
+        reference = parse_view_history_soup(markup)
+        checked += 1
+
+        diffs = [key for key in reference if fast.get(key) != reference[key]]
+        if not diffs:
+            continue
+
+        mismatched += 1
+        print(f"[mismatch] {path}")
+        for key in diffs:
+            print(f"  {key}:")
+            print(f"    lxml: {fast.get(key)!r}")
+            print(f"    soup: {reference[key]!r}")
+
+    print(f"{checked} pages checked, {mismatched} mismatched")
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,836 @@
+"""A local stand-in for every site the routers scrape, plus S3 and the
+captcha Lambda, so the whole app can be load tested without touching a court.
+
+    python -m scripts.fake_upstream --port 9100 --latency 0.15 --jitter 0.1
+    python -m scripts.fake_upstream --host services.ecourts.gov.in:rate=3 \\
+        --host services.ecourts.gov.in:block_seconds=60 --decoy-rate 0.5
+
+Point the app at it with scripts.run_with_fakes. Requests are told apart by
+their Host header: the court hosts get their own emulation, anything else
+on this port is S3 (path style) or Lambda.
+
+What is emulated, per court:
+
+- services.ecourts.gov.in: the casestatus index with its app_token (rotated
+  on every JSON answer), components.js with the delimeter pair (a decoy pair
+  on --decoy-rate of the reads, the live pair rotating every --gate-rotate
+  seconds), the fillDistrict probe, securimage, submitCaseNo /
+  submitPartyName, viewHistory (only after a search on the same session),
+  viewCNRHistory, display_pdf and the 405 "Search Page not Found" throttle.
+- hcservices.ecourts.gov.in: the search forms with their csrf-magic token,
+  case_no_qry records carrying a per-session token, both case history pages,
+  the bulk queries ("error1" on a wrong captcha), display_pdf.php and a 403
+  throttle.
+- www.sci.gov.in / api.sci.gov.in: the AOR and party name forms, the
+  arithmetic captcha per scid, admin-ajax searches and case tabs, order PDFs.
+- e-jagriti.gov.in and efiling.nclt.gov.in: case status JSON and order PDFs.
+
+Pages come from the recorded fixtures in scripts/fixtures/parsers, with the
+CNR swapped for one derived from the requested case so every case lands in
+its own S3 prefix and Mongo document.
+
+Every knob can also be changed while a run is going, which is how breaker
+and pool dynamics are exercised:
+
+    curl -X POST 127.0.0.1:9100/_fake/config \\
+        -d '{"hosts": {"services.ecourts.gov.in": {"rate": 1}}}'
+    curl 127.0.0.1:9100/_fake/stats
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import secrets
+import string
+import time
+from collections import Counter, OrderedDict
+from urllib.parse import parse_qsl
+from xml.sax.saxutils import escape
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "parsers")
+
+ECOURTS = "services.ecourts.gov.in"
+HCSERVICES = "hcservices.ecourts.gov.in"
+SCI = "www.sci.gov.in"
+SCI_API = "api.sci.gov.in"
+EJAGRITI = "e-jagriti.gov.in"
+NCLT = "efiling.nclt.gov.in"
+
+# scripts.run_with_fakes sends the proxy a request would have gone out
+# through here, so throttling and gates are kept per egress like the real
+# sites keep them per IP.
+EGRESS_HEADER = "x-fake-egress"
+
+# The CNRs baked into the fixtures, replaced by the requested case's own.
+FIXTURE_CNRS = {
+    "dc_view_history.html": "DLST010012342019",
+    "dc_cnr_history.json": "DLST010045672020",
+    "hc3_case_history.html": "DLHC010123452021",
+    "hc2_case_history.html": "HRHC010056782020",
+    "sci_case_details.html": "SCIN010123452023",
+}
+CC_FIXTURE_CASE = "DC/77/CC/123/2022"
+
+THROTTLE_BODY = "<html><body><h1>Search Page not Found here</h1></body></html>"
+CAPTCHA_MARK = b"SIMCAPTCHA:"
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+MAX_SESSIONS = 50_000
+
+DEFAULTS = {
+    # seconds added to every court response, plus up to `jitter` more
+    "latency": 0.0,
+    "jitter": 0.0,
+    # requests per second per host and egress; 0 turns throttling off
+    "rate": 0.0,
+    "burst": 5.0,
+    # once throttled, the egress stays blocked this long
+    "block_seconds": 0.0,
+    # share of components.js reads that carry a decoy delimeter pair
+    "decoy_rate": 0.3,
+    # seconds between live delimeter rotations; 0 never rotates
+    "gate_rotate": 0.0,
+    # reject posts whose app_token is not the session's latest
+    "strict_tokens": False,
+    # share of captcha reads the fake Lambda gets wrong, and how long one takes
+    "captcha_misread": 0.1,
+    "solver_latency": 0.05,
+    # share of orders the court has not published yet
+    "missing_order_rate": 0.1,
+    "party_rows": 10,
+    "pdf_kib": 64,
+}
+HOST_KNOBS = ("latency", "jitter", "rate", "burst", "block_seconds")
+
+knobs = dict(DEFAULTS)
+host_knobs = {}
+stats = Counter()
+in_flight = Counter()
+peak_in_flight = Counter()
+
+app = FastAPI(title="fake upstreams")
+
+
+def knob(name, host=None):
+    return host_knobs.get(host, {}).get(name, knobs[name])
+
+
+def count(host, event, n=1):
+    stats[f"{host} {event}"] += n
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+FIXTURE_TEXT = {}
+
+
+def page(name, cnr=None):
+    if name not in FIXTURE_TEXT:
+        FIXTURE_TEXT[name] = fixture(name)
+    text = FIXTURE_TEXT[name]
+    if cnr and name in FIXTURE_CNRS:
+        text = text.replace(FIXTURE_CNRS[name], cnr)
+    return text
+
+
+_pdf_cache = {}
+
+
+def pdf_bytes():
+    size = int(knob("pdf_kib")) * 1024
+    if size not in _pdf_cache:
+        body = b"1 0 obj << /Type /Catalog >> endobj\n" * (size // 36 + 1)
+        _pdf_cache.clear()
+        _pdf_cache[size] = b"%PDF-1.4\n" + body[:size] + b"\n%%EOF\n"
+    return _pdf_cache[size]
+
+
+def pdf_response(host):
+    count(host, "pdfs")
+    return Response(pdf_bytes(), media_type="application/pdf")
+
+
+def order_missing():
+    return random.random() < knob("missing_order_rate")
+
+
+def digits(value, width):
+    number = int(re.sub(r"\D", "", str(value or "")) or 0)
+    return f"{number % 10 ** width:0{width}d}"
+
+
+def case_no15(case_type, reg_no, year):
+    """eCourts' internal 15 digit case number: 2, type, number, year."""
+    return f"2{digits(case_type, 3)}{digits(reg_no, 7)}{digits(year, 4)}"
+
+
+def cnr(prefix, reg_no, year):
+    return f"{prefix}{digits(reg_no, 6)}{digits(year, 4)}"
+
+
+async def form_of(request):
+    """The urlencoded body every court form posts."""
+    return dict(parse_qsl((await request.body()).decode("utf-8", "replace")))
+
+
+def captcha_image(answer):
+    """A PNG in name only: the fake Lambda reads the answer straight back."""
+    return Response(PNG_HEADER + CAPTCHA_MARK + answer.encode() + b"\n",
+                    media_type="image/png")
+
+
+def new_code(length=6):
+    return "".join(random.choice(string.ascii_lowercase + string.digits) for _ in range(length))
+
+
+# --- per-session state --------------------------------------------------------
+
+SESSION_COOKIES = {
+    ECOURTS: "SERVICES_SESSID",
+    HCSERVICES: "HCSERVICES_SESSID",
+    SCI: "PHPSESSID",
+}
+_sessions = OrderedDict()
+
+
+def session_for(request, host):
+    """(session id, state, is_new) for the request's cookie on this host."""
+    cookie = SESSION_COOKIES.get(host)
+    sid = request.cookies.get(cookie) if cookie else None
+    state = _sessions.get((host, sid)) if sid else None
+    if state is not None:
+        _sessions.move_to_end((host, sid))
+        return sid, state, False
+
+    sid = secrets.token_hex(13)
+    state = {}
+    _sessions[(host, sid)] = state
+    while len(_sessions) > MAX_SESSIONS:
+        _sessions.popitem(last=False)
+    count(host, "sessions")
+    return sid, state, True
+
+
+def with_cookie(response, host, sid, is_new):
+    if is_new and host in SESSION_COOKIES:
+        response.set_cookie(SESSION_COOKIES[host], sid, path="/", secure=True, httponly=True)
+    return response
+
+
+# --- throttling ---------------------------------------------------------------
+
+class Bucket:
+    def __init__(self, burst):
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def allow(self, rate, burst, block_seconds):
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return False
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        if block_seconds:
+            self.blocked_until = now + block_seconds
+        return False
+
+
+_buckets = {}
+
+
+def throttled(host, egress):
+    rate = knob("rate", host)
+    if not rate:
+        return False
+    burst = max(1.0, knob("burst", host))
+    bucket = _buckets.setdefault((host, egress), Bucket(burst))
+    return not bucket.allow(rate, burst, knob("block_seconds", host))
+
+
+def throttle_response(host):
+    count(host, "throttled")
+    if host == ECOURTS:
+        return Response(THROTTLE_BODY, status_code=405, media_type="text/html")
+    if host == HCSERVICES:
+        return Response("Forbidden", status_code=403)
+    return Response("Too Many Requests", status_code=429)
+
+
+# --- services.ecourts.gov.in --------------------------------------------------
+
+class Gate:
+    def __init__(self):
+        self.rotate()
+
+    def rotate(self):
+        self.value = secrets.token_hex(16)
+        self.alias = "".join(random.choice(string.ascii_letters) for _ in range(10))
+        self.rotated_at = time.monotonic()
+
+    def live(self):
+        every = knob("gate_rotate")
+        if every and time.monotonic() - self.rotated_at > every:
+            self.rotate()
+            count(ECOURTS, "gate_rotations")
+        return self.value, self.alias
+
+
+_gates = {}
+
+
+def gate_for(egress):
+    return _gates.setdefault(egress, Gate())
+
+
+def components_js(egress):
+    value, alias = gate_for(egress).live()
+    if random.random() < knob("decoy_rate"):
+        count(ECOURTS, "decoys_served")
+        value, alias = secrets.token_hex(16), "".join(
+            random.choice(string.ascii_letters) for _ in range(10))
+    return (
+        "/* eCourts services */\n"
+        f'var delimeter = "{value}";\n'
+        "$.ajaxSetup({ headers: {\n"
+        '    "X-Requested-With": "XMLHttpRequest",\n'
+        '    "delimeter": delimeter,\n'
+        f'    "{alias}": delimeter\n'
+        "} });\n"
+    )
+
+
+def gate_open(request, egress):
+    value, alias = gate_for(egress).live()
+    return (request.headers.get("delimeter") == value
+            and request.headers.get(alias) == value)
+
+
+def ecourts_json(state, body):
+    state["app_token"] = secrets.token_hex(32)
+    return JSONResponse({**body, "app_token": state["app_token"]})
+
+
+def index_page(state):
+    state["app_token"] = secrets.token_hex(32)
+    return Response(
+        "<html><head><title>eCourts Services</title></head><body>"
+        '<form id="caseNoform">'
+        f'<input type="hidden" name="app_token" id="app_token" value="{state["app_token"]}">'
+        "</form></body></html>",
+        media_type="text/html",
+    )
+
+
+def view_history_anchor(case_no, cino, court_code, state_code, dist_code, complex_code):
+    return (
+        '<a href="#" class="someclass" onclick="viewHistory('
+        f"'{case_no}','{cino}','{court_code}','','CScaseNumber',"
+        f"'{state_code}','{dist_code}','{complex_code}','CScaseNumber')\">View</a>"
+    )
+
+
+def case_search_result(form):
+    year = form.get("rgyear", "2020")
+    case_no = case_no15(form.get("case_type"), form.get("case_no"), year)
+    cino = cnr("DLST01", form.get("case_no"), year)
+    anchor = view_history_anchor(
+        case_no, cino, "1", form.get("state_code", ""), form.get("dist_code", ""),
+        form.get("court_complex_code", ""))
+    return (
+        '<table class="table"><tr><th>Sr No</th><th>Case Type/Case Number/Case Year</th>'
+        "<th>Petitioner Name versus Respondent Name</th><th>View</th></tr>"
+        f"<tr><td>1</td><td>CS/{form.get('case_no')}/{year}</td>"
+        f"<td>SUNITA DEVI Vs RAMESH KUMAR</td><td>{anchor}</td></tr></table>"
+    )
+
+
+def party_search_result(form):
+    year = form.get("rgyearP", "2020")
+    seed = int(hashlib.sha1(form.get("petres_name", "").encode()).hexdigest()[:6], 16)
+    rows = []
+    for i in range(int(knob("party_rows"))):
+        reg_no = (seed + i * 7919) % 1000000
+        anchor = view_history_anchor(
+            case_no15("1", reg_no, year), cnr("DLST01", reg_no, year), "1",
+            form.get("state_code", ""), form.get("dist_code", ""),
+            form.get("court_complex_code", ""))
+        rows.append(
+            f"<tr><td>{i + 1}</td><td>CS/{reg_no}/{year}</td>"
+            f"<td>{escape(form.get('petres_name', '').upper())} Vs STATE</td><td>{anchor}</td></tr>")
+    return '<table class="table">' + "".join(rows) + "</table>"
+
+
+DISPLAY_PDF_RE = re.compile(
+    r"displayPdf\('normal_v=([^&']*)&case_val=([^&']*)&filename=([^&']*)&appFlag=([^']*)'\)")
+
+
+def dc_history(markup, cino):
+    """The fixture with its CNR swapped, and its order links in the
+    argument-list form fetch_and_store_orders reads."""
+    markup = markup.replace(FIXTURE_CNRS["dc_view_history.html"], cino or "")
+    return DISPLAY_PDF_RE.sub(r"displayPdf('\1','\2','1','\3','\4')", markup)
+
+
+def captcha_ok(state, given):
+    """securimage codes are single use and case insensitive."""
+    expected = state.pop("captcha", None)
+    return bool(expected) and (given or "").strip().lower() == expected
+
+
+async def ecourts(request, host, egress):
+    sid, state, is_new = session_for(request, host)
+    route = request.query_params.get("p", "")
+    path = request.url.path
+
+    if request.method == "GET":
+        if path.endswith("js/components.js"):
+            response = Response(components_js(egress), media_type="application/javascript")
+        elif path.endswith("securimage_show.php"):
+            state["captcha"] = new_code()
+            response = captcha_image(state["captcha"])
+        elif path.endswith(".pdf"):
+            response = pdf_response(host)
+        else:
+            response = index_page(state)
+        return with_cookie(response, host, sid, is_new)
+
+    form = await form_of(request)
+    if not gate_open(request, egress):
+        count(host, "gate_rejected")
+        return with_cookie(ecourts_json(state, {"errormsg": "Invalid Request"}), host, sid, is_new)
+    if knob("strict_tokens") and form.get("app_token") != state.get("app_token"):
+        count(host, "stale_tokens")
+        return with_cookie(ecourts_json(state, {"errormsg": "Invalid Request"}), host, sid, is_new)
+
+    if route == "casestatus/fillDistrict":
+        body = {"dist_list": '<option value="">Select District</option><option value="1">Central</option>'}
+    elif route in ("casestatus/submitCaseNo", "casestatus/submitPartyName"):
+        field = "case_captcha_code" if route.endswith("CaseNo") else "fcaptcha_code"
+        if not captcha_ok(state, form.get(field)):
+            count(host, "captcha_rejected")
+            body = {"errormsg": "Invalid Captcha...!!!"}
+        elif route.endswith("CaseNo"):
+            state["searched"] = True
+            body = {"case_data": case_search_result(form)}
+        else:
+            state["searched"] = True
+            body = {"party_data": party_search_result(form)}
+    elif route == "home/viewHistory":
+        # the real route reads the search out of the PHP session
+        if not state.get("searched"):
+            count(host, "history_without_search")
+            body = {"errormsg": "Invalid Request"}
+        else:
+            body = {"data_list": dc_history(page("dc_view_history.html"), form.get("cino"))}
+    elif route.startswith("cnr_status/viewCNRHistory"):
+        data_list = json.loads(page("dc_cnr_history.json"))["data_list"]
+        body = {"casetype_list": dc_history(data_list.replace(
+            FIXTURE_CNRS["dc_cnr_history.json"], form.get("cino", "")), form.get("cino"))}
+    elif route == "home/display_pdf":
+        name = os.path.basename(form.get("filename", "")) or f"{new_code()}.pdf"
+        body = {"order": "" if order_missing() else f"reports\\/{secrets.token_hex(8)}_{name}"}
+    else:
+        body = {"errormsg": "Invalid Request"}
+
+    return with_cookie(ecourts_json(state, body), host, sid, is_new)
+
+
+# --- hcservices.ecourts.gov.in ------------------------------------------------
+
+def hc_records(state, rows):
+    """case_no~case number~parties~cino~court_code~state~dist~token records,
+    the token bound to this session like the real search mints it."""
+    records = []
+    for case_type, reg_no, year, court_code in rows:
+        cino = cnr("DLHC01", reg_no, year)
+        token = secrets.token_hex(32)
+        state.setdefault("tokens", {})[cino] = token
+        records.append("~".join((
+            case_no15(case_type, reg_no, year), f"WP(C)/{reg_no}/{year}",
+            "SUNITA DEVI<br>Vs<br>UNION OF INDIA", cino, court_code or "1", "26", "1", token)))
+    return "##".join(records) + "##"
+
+
+async def hcservices(request, host, egress):
+    sid, state, is_new = session_for(request, host)
+    path = request.url.path
+
+    if "display_pdf.php" in path:
+        if order_missing():
+            response = Response("Orders is not uploaded for case number", media_type="text/html")
+        else:
+            response = pdf_response(host)
+        return with_cookie(response, host, sid, is_new)
+
+    if request.method == "GET":
+        if path.endswith("securimage_show.php"):
+            state["captcha"] = new_code()
+            response = captcha_image(state["captcha"])
+        else:
+            state.setdefault("csrf", "sid:" + secrets.token_hex(20))
+            response = Response(
+                "<html><body><form></form><script>"
+                f'var csrfMagicToken = "{state["csrf"]}";var csrfMagicName = "__csrf_magic";'
+                "</script></body></html>", media_type="text/html")
+        return with_cookie(response, host, sid, is_new)
+
+    form = await form_of(request)
+    if path.endswith("case_no_qry.php"):
+        body = hc_records(state, [(form.get("case_type"), form.get("case_no"),
+                                   form.get("rgyear"), form.get("court_code"))])
+    elif path.endswith(("qs_civil_advocate_qry.php", "ki_petres_qry.php")):
+        if not captcha_ok(state, form.get("captcha")):
+            count(host, "captcha_rejected")
+            body = "error1"
+        else:
+            year = form.get("rgyear") or "2021"
+            seed = int(hashlib.sha1(json.dumps(form, sort_keys=True).encode()).hexdigest()[:6], 16)
+            body = hc_records(state, [
+                ("101", (seed + i * 7919) % 1000000, year, form.get("court_code"))
+                for i in range(int(knob("party_rows")))
+            ])
+    elif path.startswith("/hcservices/cases_qry/o_civil_case_history.php"):
+        body = page("hc2_case_history.html", form.get("cino"))
+    elif path.endswith("o_civil_case_history.php"):
+        if state.get("tokens", {}).get(form.get("cino")) != form.get("token"):
+            count(host, "token_rejected")
+            body = "<html><body>Invalid Request</body></html>"
+        else:
+            body = page("hc3_case_history.html", form.get("cino"))
+    else:
+        body = ""
+
+    return with_cookie(Response("﻿" + body, media_type="text/html"), host, sid, is_new)
+
+
+# --- www.sci.gov.in -----------------------------------------------------------
+
+_sci_captchas = OrderedDict()
+
+
+def sci_form(form_id):
+    return Response(
+        f'<html><body><form id="{form_id}" method="post">'
+        f'<input type="hidden" name="_wpnonce" value="{secrets.token_hex(5)}">'
+        '<input type="hidden" name="_wp_http_referer" value="/case-status/">'
+        '<input type="text" name="siwp_captcha_value" value="">'
+        "</form></body></html>", media_type="text/html")
+
+
+def sci_case_tab(params):
+    year = params.get("diary_year", "2023")
+    tab = params.get("tab_name")
+    if tab == "listing_dates":
+        return page("sci_listing_dates.html")
+    if tab == "judgement_orders":
+        return page("sci_judgement_orders.html").replace(
+            "/2023/12345/12345_2023_", f"/{year}/{params.get('diary_no')}/{params.get('diary_no')}_{year}_")
+    return page("sci_case_details.html", cnr("SCIN01", params.get("diary_no"), year))
+
+
+async def sci(request, host, egress):
+    sid, state, is_new = session_for(request, host)
+    params = request.query_params
+    path = request.url.path
+
+    if host == SCI_API or path.endswith(".pdf"):
+        response = pdf_response(host)
+    elif request.method == "GET" and "_siwp_captcha" in params:
+        left, right = random.randint(1, 9), random.randint(1, 9)
+        _sci_captchas[params.get("id", "")] = left + right
+        while len(_sci_captchas) > MAX_SESSIONS:
+            _sci_captchas.popitem(last=False)
+        response = captcha_image(f"{left}+{right}")
+    elif request.method == "GET" and params.get("action") == "get_case_details":
+        response = JSONResponse({"success": True, "data": sci_case_tab(params)})
+    elif request.method == "GET":
+        slug = path.strip("/")
+        response = sci_form(f"sciapi-services-{slug}")
+    else:
+        form = await form_of(request)
+        expected = _sci_captchas.pop(form.get("scid", ""), None)
+        if expected is None or form.get("siwp_captcha_value") != str(expected):
+            count(host, "captcha_rejected")
+            response = JSONResponse({"success": False, "data": "The captcha code entered was incorrect."})
+        else:
+            response = JSONResponse({"success": True, "data": {"resultsHtml": page("sci_aor_results.html")}})
+
+    return with_cookie(response, host, sid, is_new)
+
+
+# --- e-jagriti.gov.in and efiling.nclt.gov.in ---------------------------------
+
+async def ejagriti(request, host, egress):
+    params = request.query_params
+    if request.url.path.endswith("getDailyOrderJudgementPdf"):
+        if order_missing():
+            return JSONResponse({"status": 200, "message": "Success", "data": {}})
+        count(host, "pdfs")
+        return JSONResponse({"status": 200, "message": "Success", "data": {
+            "dailyOrderPdf": base64.b64encode(pdf_bytes()).decode()}})
+
+    body = page("cc_case.json").replace(CC_FIXTURE_CASE, params.get("caseNumber", CC_FIXTURE_CASE))
+    return Response(body, media_type="application/json")
+
+
+async def nclt(request, host, egress):
+    path = request.url.path
+    if path.endswith("ordersview.drt"):
+        return pdf_response(host)
+    if path.endswith("caseHistoryoptional.drt"):
+        query = json.loads((await request.body()) or b"{}")
+        search = json.loads(page("nclt_case_search.json"))
+        panel = search["mainpanellist"][0]
+        panel["filing_no"] = (f"{digits(query.get('i_bench_id_case_no'), 3)}0102"
+                              f"{digits(query.get('case_no'), 5)}{digits(query.get('i_case_year_caseno'), 4)}")
+        panel["case_no"] = f"CP(IB)/{query.get('case_no')}(ND)/{query.get('i_case_year_caseno')}"
+        return JSONResponse(search)
+    return Response(page("nclt_case_details.json"), media_type="application/json")
+
+
+COURTS = {
+    ECOURTS: ecourts,
+    HCSERVICES: hcservices,
+    SCI: sci,
+    SCI_API: sci,
+    EJAGRITI: ejagriti,
+    NCLT: nclt,
+}
+
+
+# --- S3 and Lambda ------------------------------------------------------------
+
+S3_NS = "http://s3.amazonaws.com/doc/2006-03-01/"
+# bucket -> key -> (size, etag). Bodies are not kept: the app only ever
+# writes, lists and heads.
+_objects = {}
+_multipart = {}
+
+
+def s3_xml(tag, inner, status=200):
+    return Response(
+        f'<?xml version="1.0" encoding="UTF-8"?><{tag} xmlns="{S3_NS}">{inner}</{tag}>',
+        status_code=status, media_type="application/xml")
+
+
+def s3_error(code, status, key=""):
+    return Response(
+        f'<?xml version="1.0" encoding="UTF-8"?><Error><Code>{code}</Code>'
+        f"<Message>{code}</Message><Key>{escape(key)}</Key></Error>",
+        status_code=status, media_type="application/xml")
+
+
+def decoded_length(request, body):
+    """put_object may arrive aws-chunked; the decoded size is in a header."""
+    if "aws-chunked" in request.headers.get("content-encoding", ""):
+        return int(request.headers.get("x-amz-decoded-content-length", len(body)))
+    return len(body)
+
+
+def list_objects(bucket, params):
+    prefix = params.get("prefix", "")
+    max_keys = int(params.get("max-keys", 1000))
+    after = params.get("continuation-token") or params.get("start-after") or ""
+    keys = sorted(k for k in _objects.get(bucket, {}) if k.startswith(prefix) and k > after)
+    page_keys, truncated = keys[:max_keys], len(keys) > max_keys
+    contents = "".join(
+        f"<Contents><Key>{escape(key)}</Key><Size>{_objects[bucket][key][0]}</Size>"
+        f"<ETag>&quot;{_objects[bucket][key][1]}&quot;</ETag>"
+        "<StorageClass>STANDARD</StorageClass></Contents>"
+        for key in page_keys)
+    token = f"<NextContinuationToken>{escape(page_keys[-1])}</NextContinuationToken>" if truncated else ""
+    return s3_xml("ListBucketResult",
+                  f"<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>"
+                  f"<KeyCount>{len(page_keys)}</KeyCount><MaxKeys>{max_keys}</MaxKeys>"
+                  f"<IsTruncated>{'true' if truncated else 'false'}</IsTruncated>{contents}{token}")
+
+
+async def s3(request):
+    bucket, _, key = request.url.path.lstrip("/").partition("/")
+    params = request.query_params
+    method = request.method
+
+    if not key:
+        if method == "GET":
+            count("s3", "lists")
+            return list_objects(bucket, params)
+        return Response(status_code=200)
+
+    if "uploads" in params:
+        upload_id = secrets.token_hex(16)
+        _multipart[upload_id] = {}
+        return s3_xml("InitiateMultipartUploadResult",
+                      f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                      f"<UploadId>{upload_id}</UploadId>")
+    if "uploadId" in params:
+        upload_id = params["uploadId"]
+        if upload_id not in _multipart:
+            return s3_error("NoSuchUpload", 404, key)
+        if method == "PUT":
+            body = await request.body()
+            etag = hashlib.md5(body).hexdigest()
+            _multipart[upload_id][int(params["partNumber"])] = decoded_length(request, body)
+            return Response(headers={"ETag": f'"{etag}"'})
+        parts = _multipart.pop(upload_id)
+        if method == "DELETE":
+            return Response(status_code=204)
+        etag = f"{secrets.token_hex(16)}-{len(parts)}"
+        _objects.setdefault(bucket, {})[key] = (sum(parts.values()), etag)
+        count("s3", "puts")
+        return s3_xml("CompleteMultipartUploadResult",
+                      f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                      f"<ETag>&quot;{etag}&quot;</ETag>")
+
+    if method == "PUT":
+        body = await request.body()
+        etag = hashlib.md5(body).hexdigest()
+        _objects.setdefault(bucket, {})[key] = (decoded_length(request, body), etag)
+        count("s3", "puts")
+        return Response(headers={"ETag": f'"{etag}"'})
+
+    stored = _objects.get(bucket, {}).get(key)
+    if method == "HEAD":
+        count("s3", "heads")
+        if not stored:
+            return Response(status_code=404)
+        return Response(headers={"Content-Length": str(stored[0]), "ETag": f'"{stored[1]}"'})
+    if method == "DELETE":
+        _objects.get(bucket, {}).pop(key, None)
+        return Response(status_code=204)
+    return s3_error("NoSuchKey", 404, key)
+
+
+def misread(text):
+    """One character off - or, for an SCI sum, the operator lost."""
+    if "+" in text:
+        return text.replace("+", "")
+    i = random.randrange(len(text))
+    return text[:i] + random.choice(string.ascii_lowercase.replace(text[i], "")) + text[i + 1:]
+
+
+async def invoke_lambda(request):
+    payload = json.loads(await request.body() or b"{}")
+    await asyncio.sleep(knob("solver_latency"))
+    image = base64.b64decode(payload.get("image_base64") or "")
+    _, _, answer = image.partition(CAPTCHA_MARK)
+    text = answer.decode(errors="ignore").strip()
+    if text and random.random() < knob("captcha_misread"):
+        count("lambda", "misreads")
+        text = misread(text)
+    count("lambda", "invokes")
+    return JSONResponse({"text": text})
+
+
+# --- control routes and dispatch ----------------------------------------------
+
+def config_snapshot():
+    return {**knobs, "hosts": host_knobs}
+
+
+def apply_config(changes):
+    for name, value in changes.items():
+        if name == "hosts":
+            for host, overrides in value.items():
+                host_knobs.setdefault(host, {}).update(
+                    {k: float(v) for k, v in overrides.items() if k in HOST_KNOBS})
+        elif name in knobs:
+            knobs[name] = type(DEFAULTS[name])(value)
+    _pdf_cache.clear()
+
+
+def stats_snapshot():
+    return {
+        "events": dict(sorted(stats.items())),
+        "peak_in_flight": dict(peak_in_flight),
+        "s3_objects": sum(len(keys) for keys in _objects.values()),
+        "sessions": len(_sessions),
+        "gates": {egress: gate.alias for egress, gate in _gates.items()},
+    }
+
+
+async def control(request):
+    path = request.url.path
+    if path == "/_fake/config":
+        if request.method == "POST":
+            apply_config(json.loads(await request.body() or b"{}"))
+        return JSONResponse(config_snapshot())
+    if path == "/_fake/stats":
+        if request.method == "DELETE":
+            stats.clear()
+            peak_in_flight.clear()
+        return JSONResponse(stats_snapshot())
+    return JSONResponse({"error": "unknown control route"}, status_code=404)
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "HEAD", "DELETE"])
+async def dispatch(request: Request, path: str):
+    host = (request.headers.get("host") or "").split(":")[0].lower()
+    handler = COURTS.get(host)
+
+    if handler is None:
+        if request.url.path.startswith("/_fake/"):
+            return await control(request)
+        if request.url.path.startswith("/2015-03-31/functions/"):
+            return await invoke_lambda(request)
+        return await s3(request)
+
+    egress = request.headers.get(EGRESS_HEADER, "direct")
+    count(host, "requests")
+    in_flight[host] += 1
+    peak_in_flight[host] = max(peak_in_flight[host], in_flight[host])
+    try:
+        delay = knob("latency", host) + random.random() * knob("jitter", host)
+        if delay:
+            await asyncio.sleep(delay)
+        if throttled(host, egress):
+            return throttle_response(host)
+        return await handler(request, host, egress)
+    finally:
+        in_flight[host] -= 1
+
+
+def host_override(value):
+    host, _, setting = value.partition(":")
+    name, _, number = setting.partition("=")
+    if name not in HOST_KNOBS or not number:
+        raise argparse.ArgumentTypeError(f"expected HOST:{{{','.join(HOST_KNOBS)}}}=NUMBER, got {value!r}")
+    return host, name, float(number)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    for name, default in DEFAULTS.items():
+        flag = "--" + name.replace("_", "-")
+        if isinstance(default, bool):
+            parser.add_argument(flag, action="store_true")
+        else:
+            parser.add_argument(flag, type=type(default), default=default)
+    parser.add_argument("--host", dest="overrides", action="append", default=[],
+                        type=host_override, help="per-host knob, e.g. hcservices.ecourts.gov.in:rate=2")
+    args = parser.parse_args(argv)
+
+    apply_config({name: getattr(args, name) for name in DEFAULTS})
+    for host, name, value in args.overrides:
+        host_knobs.setdefault(host, {})[name] = value
+
+    import uvicorn
+    uvicorn.run(app, host=args.bind, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Drive the app's scrape routes concurrently and report throughput, latency
+and what the pools, breakers and rate limiters did meanwhile.
+
+    python -m scripts.load_test -n 2000 -c 64
+    python -m scripts.load_test -n 500 -c 16 --mix dc=3,hc3=2,sci=1 --cached 0.2
+
+Meant to run against scripts.run_with_fakes, whose upstream stand-in hands
+out a distinct case for every case number asked for. Every request asks for
+a case not seen before (refresh=1) unless --cached sends a share of them
+again for an already scraped one, which the routes answer out of Mongo.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+from scripts.fake_upstream import case_no15, cnr
+
+API = "/api/v1"
+
+
+def dc(n):
+    return {"case_type": "1", "case_reg_no": str(n), "rgyear": "2019", "state_code": "26",
+            "dist_code": "1", "court_complex_code": "1", "courtType": "distcourts", "refresh": 1}
+
+
+def dc_party(n):
+    return {"petres_name": f"party {n}", "rgyearP": "2019", "case_status": "Pending",
+            "state_code": "26", "dist_code": "1", "court_complex_code": "1"}
+
+
+def dc_ingest(n):
+    return {"court_code": "1", "state_code": "26", "dist_code": "1", "court_complex_code": "1",
+            "case_no": case_no15("1", n, "2019"), "cino": cnr("DLST01", n, "2019"),
+            "rgyear": "2019", "refresh": 1}
+
+
+def hc(n):
+    return {"case_type": "101", "case_reg_no": str(n), "rgyear": "2021", "state_code": "26",
+            "dist_code": "1", "court_complex_code": "1", "refresh": 1}
+
+
+def hc3_party(n):
+    return {"rgyear": "2021", "state_code": "26", "dist_code": "1", "court_code": "1",
+            "petres_name": f"party {n}", "case_status": "Pending"}
+
+
+def hc3_ingest(n):
+    return {"court_code": "1", "state_code": "26", "dist_code": "1", "court_complex_code": "1",
+            "case_no": case_no15("101", n, "2021"), "cino": cnr("DLHC01", n, "2021"),
+            "rgyear": "2021", "refresh": 1}
+
+
+def sci(n):
+    return {"case_no": str(n), "rgyear": "2023", "refresh": 1}
+
+
+def sci_aor(n):
+    return {"aor_code": str(n % 4000 + 1), "rgyear": "2023", "case_status": "P"}
+
+
+def cc(n):
+    return {"case_reg_no": f"DC/77/CC/{n}/2022", "refresh": "1"}
+
+
+def nclt(n):
+    return {"case_type": "16", "case_reg_no": str(n), "rgyear": "2023", "state_code": "7",
+            "dist_code": "1", "court_complex_code": "7"}
+
+
+# name -> (route, payload for case number n)
+ROUTES = {
+    "dc": ("/getcaseInfo", dc),
+    "dc_party": ("/dc/bulk_q/partyname", dc_party),
+    "dc_ingest": ("/dc/bulk_i/partyname", dc_ingest),
+    "hc3": ("/hc3/getcaseInfo", hc),
+    "hc3_party": ("/hc3/bulk_q/partyname", hc3_party),
+    "hc3_ingest": ("/hc3/bulk_i", hc3_ingest),
+    "hc2": ("/hc2/getcaseInfo", hc),
+    "sci": ("/sci/getcaseInfo", sci),
+    "sci_aor": ("/sci/bulk_q/aor", sci_aor),
+    "cc": ("/cc/getcaseInfo", cc),
+    "nclt": ("/nclt/getcaseInfo", nclt),
+}
+
+STATUS_ROUTES = {
+    "dc_pool": API + "/dc/pool",
+    "dc_breaker": API + "/dc/breaker",
+    "hc3_pool": API + "/hc3/pool",
+    "rate_limits": "/metrics/rate_limits",
+    "captcha": "/metrics/captcha",
+}
+
+
+def parse_mix(value):
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown route {name!r}; pick from {', '.join(ROUTES)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def uncached(payload):
+    if "refresh" in payload:
+        payload["refresh"] = "0" if isinstance(payload["refresh"], str) else 0
+    return payload
+
+
+async def run(args):
+    names, weights = zip(*args.mix.items())
+    plan = random.Random(args.seed).choices(names, weights=weights, k=args.requests)
+    start = args.start or random.randrange(1, 900_000)
+    sent = defaultdict(list)
+    results = defaultdict(list)
+    queue = asyncio.Queue()
+    for i, name in enumerate(plan):
+        queue.put_nowait((i, name))
+
+    async def worker(client):
+        while not queue.empty():
+            i, name = queue.get_nowait()
+            path, payload_for = ROUTES[name]
+            if sent[name] and random.random() < args.cached:
+                payload = uncached(payload_for(random.choice(sent[name])))
+            else:
+                payload = payload_for(start + i)
+                sent[name].append(start + i)
+
+            started = time.perf_counter()
+            try:
+                response = await client.post(API + path, json=payload)
+                status = response.status_code
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            results[name].append((status, time.perf_counter() - started))
+
+    # shorter than uvicorn's keep-alive, so an idle connection is never reused
+    # just as the server closes it
+    limits = httpx.Limits(max_connections=args.concurrency, keepalive_expiry=1)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        began = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - began
+
+        status = {}
+        for name, path in STATUS_ROUTES.items():
+            try:
+                status[name] = (await client.get(path)).json()
+            except (httpx.HTTPError, ValueError) as exc:
+                status[name] = f"unavailable: {exc}"
+
+    fake = None
+    if args.upstream:
+        try:
+            async with httpx.AsyncClient(base_url=args.upstream, timeout=10) as client:
+                fake = (await client.get("/_fake/stats")).json()
+        except (httpx.HTTPError, ValueError) as exc:
+            fake = f"unavailable: {exc}"
+
+    return elapsed, results, status, fake
+
+
+def report(elapsed, results, status, fake):
+    total = sum(len(rows) for rows in results.values())
+    print(f"{total} requests in {elapsed:.1f}s = {total / elapsed:.1f} req/s")
+    print(f"{'route':<12}{'count':>7}{'ok':>7}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}  statuses")
+    for name, rows in sorted(results.items()):
+        latencies = [seconds for _, seconds in rows]
+        statuses = Counter(str(code) for code, _ in rows)
+        ok = sum(n for code, n in statuses.items() if code.startswith("2"))
+        print(f"{name:<12}{len(rows):>7}{ok:>7}"
+              f"{percentile(latencies, 0.5):>9.2f}{percentile(latencies, 0.95):>9.2f}"
+              f"{percentile(latencies, 0.99):>9.2f}  {dict(sorted(statuses.items()))}")
+
+    for name, body in status.items():
+        print(f"\n[{name}]\n{json.dumps(body, indent=1, default=str)}")
+    if fake is not None:
+        print(f"\n[fake upstream]\n{json.dumps(fake, indent=1)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--upstream", default="http://127.0.0.1:9100",
+                        help="the fake upstream, for its stats; empty to skip")
+    parser.add_argument("-n", "--requests", type=int, default=1000)
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(",".join(ROUTES)),
+                        help="route=weight,... (default: every route equally)")
+    parser.add_argument("--cached", type=float, default=0.0,
+                        help="share of requests repeating a case already scraped")
+    parser.add_argument("--start", type=int, default=0, help="first case number (default random)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args(argv)
+
+    report(*asyncio.run(run(args)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
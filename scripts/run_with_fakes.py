@@ -0,0 +1,147 @@
+"""Serve the app with every upstream swapped for scripts.fake_upstream.
+
+    python -m scripts.fake_upstream --port 9100 &
+    python -m scripts.run_with_fakes --upstream http://127.0.0.1:9100 --mongo mock
+
+The routers keep building their real court URLs. The requests and httpx
+transports are patched so a court connection goes to the fake instead, with
+the original Host header, and S3 and Lambda are pointed at it through the
+AWS_ENDPOINT_URL_* variables boto3 reads. Nothing under api/ changes.
+
+Runs a single uvicorn worker in this process (the patches do not survive a
+worker fork). Sentry is left uninitialised unless --sentry is given, so a
+load run does not flood the real project. The app's own per-host rate
+limiter still applies: raise UPSTREAM_RATE_MAX / UPSTREAM_RATE_BURST in the
+environment to measure past it.
+"""
+import argparse
+import os
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+from requests.adapters import HTTPAdapter
+
+from scripts.fake_upstream import COURTS, EGRESS_HEADER
+
+
+def point_aws_at(upstream):
+    os.environ.update({
+        "AWS_ENDPOINT_URL_S3": upstream,
+        "AWS_ENDPOINT_URL_LAMBDA": upstream,
+        "AWS_S3_KEY": "fake",
+        "AWS_S3SEC_KEY": "fake",
+        "AWS_DEFAULT_REGION": "ap-south-1",
+        "REGION_NAME": "ap-south-1",
+        "BUCKET_NAME": os.getenv("FAKE_BUCKET_NAME", "fake-bucket"),
+        # the fake S3 wants plain bodies, not aws-chunked ones with trailers
+        "AWS_REQUEST_CHECKSUM_CALCULATION": "when_required",
+        "AWS_RESPONSE_CHECKSUM_VALIDATION": "when_required",
+        "CAPTCHA_SOLVER": "lambda",
+    })
+
+
+def patch_requests(upstream):
+    target = urlsplit(upstream)
+    send = HTTPAdapter.send
+
+    def send_to_fake(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        if parts.hostname not in COURTS:
+            return send(self, request, **kwargs)
+
+        routed = request.copy()
+        routed.url = urlunsplit((target.scheme, target.netloc, parts.path, parts.query, ""))
+        routed.headers["Host"] = parts.netloc
+        response = send(self, routed, **kwargs)
+        # Session.send reads cookies and redirects off these
+        response.url = request.url
+        response.request = request
+        return response
+
+    HTTPAdapter.send = send_to_fake
+
+
+def patch_httpx(upstream):
+    from helpers.ecourts_session import egress_key
+
+    target = httpx.URL(upstream)
+    init = httpx.AsyncHTTPTransport.__init__
+    handle = httpx.AsyncHTTPTransport.handle_async_request
+    direct = {}
+
+    def init_with_egress(self, *args, proxy=None, **kwargs):
+        init(self, *args, proxy=proxy, **kwargs)
+        url = proxy.url if isinstance(proxy, httpx.Proxy) else proxy
+        self._fake_egress = egress_key(str(url)) if url else "direct"
+
+    async def handle_to_fake(self, request):
+        if request.url.host not in COURTS:
+            return await handle(self, request)
+
+        headers = httpx.Headers(request.headers)
+        headers[EGRESS_HEADER] = self._fake_egress
+        routed = httpx.Request(
+            request.method,
+            request.url.copy_with(scheme=target.scheme, host=target.host, port=target.port),
+            headers=headers,
+            stream=request.stream,
+            extensions=request.extensions,
+        )
+        # A proxied client's own transport would dial the proxy; the fake
+        # tells egresses apart by the header instead.
+        transport = self
+        if self._fake_egress != "direct":
+            transport = direct.get("transport")
+            if transport is None:
+                transport = direct["transport"] = httpx.AsyncHTTPTransport(
+                    limits=httpx.Limits(max_connections=None, max_keepalive_connections=100))
+        return await handle(transport, routed)
+
+    httpx.AsyncHTTPTransport.__init__ = init_with_egress
+    httpx.AsyncHTTPTransport.handle_async_request = handle_to_fake
+
+
+def patch_mongo():
+    """One shared in-memory server for every MongoClient the app opens."""
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("--mongo mock needs the mongomock package") from None
+    import pymongo
+
+    shared = mongomock.MongoClient()
+    pymongo.MongoClient = lambda *args, **kwargs: shared
+
+    # the same unique indexes production has, so duplicate handling is real
+    import scripts.create_index  # noqa: F401
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--upstream", default="http://127.0.0.1:9100")
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--mongo", choices=("mock", "env"), default="mock",
+                        help="in-memory mongomock, or the MONGOCLIENT from the environment")
+    parser.add_argument("--sentry", action="store_true", help="keep reporting to Sentry")
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+
+    upstream = args.upstream.rstrip("/")
+    point_aws_at(upstream)
+    patch_requests(upstream)
+    patch_httpx(upstream)
+    if args.mongo == "mock":
+        patch_mongo()
+    if not args.sentry:
+        import sentry_sdk
+        sentry_sdk.init = lambda *a, **kw: None
+
+    import uvicorn
+    from app import app
+
+    uvicorn.run(app, host=args.bind, port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()